@@ -0,0 +1,172 @@
+"""
+Hydraulic computations of ``calculate_parameters`` for synthetic branches, as
+scalar per-branch calls and as array calls over all branches.
+"""
+
+import cmath
+
+import numpy as np
+
+from tests.helpers import idz_fun_arguments, idz_inputs, linear_sv_inputs
+
+from rtctools_channel_flow.calculate_parameters import (
+    GetIDZVariables,
+    GetLinearSVVariables,
+    IDZ_PARAMETERS,
+    IdzFun,
+    IdzFunVectorized,
+    SECTION_SHAPES,
+    idz_variables_batch,
+    linearised_sv_results,
+    linearised_sv_variables_batch,
+    normal_depth,
+    normal_depth_vectorized,
+)
+from rtctools_channel_flow.frequency_response import (
+    idz_step_response,
+    idz_transfer_matrix,
+)
+
+# Scalar per-branch loops are skipped above this number of computed nodes
+MAX_SCALAR_NODES = 100000
+
+
+class NormalDepth:
+    params = (["trapezoidal", "circular"], ["bisection", "newton"], [1, 100, 5000])
+    param_names = ["shape", "method", "n_branches"]
+    timeout = 300
+
+    def setup(self, shape, method, n_branches):
+        q, n, b0, m, sb, yx, L, shapes = idz_fun_arguments(
+            idz_inputs(n_branches, shape), shape
+        )
+        self.arguments = (q, n, b0, m, sb, yx, shapes)
+        self.L = L
+
+    def time_normal_depth(self, shape, method, n_branches):
+        q, n, b0, m, sb, yx, shapes = self.arguments
+        for i in range(len(q)):
+            normal_depth(
+                q[i], n[i], b0[i], m[i], sb[i], yx[i], self.L[i], shapes[i], method
+            )
+
+    def time_normal_depth_vectorized(self, shape, method, n_branches):
+        normal_depth_vectorized(*self.arguments, method=method)
+
+
+class IdzFunction:
+    params = (["trapezoidal", "circular"], [1, 100, 1000, 5000])
+    param_names = ["shape", "n_branches"]
+    timeout = 300
+
+    def setup(self, shape, n_branches):
+        self.arguments = idz_fun_arguments(idz_inputs(n_branches, shape), shape)
+
+    def time_idz_fun(self, shape, n_branches):
+        for args in zip(*(a.tolist() for a in self.arguments)):
+            IdzFun(*args)
+
+    def time_idz_fun_vectorized(self, shape, n_branches):
+        IdzFunVectorized(*self.arguments)
+
+    def peakmem_idz_fun_vectorized(self, shape, n_branches):
+        IdzFunVectorized(*self.arguments)
+
+
+class IDZVariables:
+    params = (["trapezoidal", "circular"], [1, 100, 1000, 5000])
+    param_names = ["shape", "n_branches"]
+    timeout = 300
+
+    def setup(self, shape, n_branches):
+        self.inputs = idz_inputs(n_branches, shape)
+        self.shape = SECTION_SHAPES[shape]
+
+    def time_get_variables(self, shape, n_branches):
+        for kwargs in zip(*(v.tolist() for v in self.inputs.values())):
+            GetIDZVariables(
+                **dict(zip(self.inputs.keys(), kwargs)), shape=self.shape
+            ).getVariables()
+
+    def time_idz_variables_batch(self, shape, n_branches):
+        idz_variables_batch(**self.inputs, shape=self.shape)
+
+    def peakmem_idz_variables_batch(self, shape, n_branches):
+        idz_variables_batch(**self.inputs, shape=self.shape)
+
+
+class LinearSVVariables:
+    params = ([1, 100, 1000, 5000], [4, 50, 500])
+    param_names = ["n_branches", "n_level_nodes"]
+    timeout = 300
+
+    def setup(self, n_branches, n_level_nodes):
+        self.inputs = linear_sv_inputs(n_branches, n_level_nodes)
+
+    def time_linearised_sv_variables_batch(self, n_branches, n_level_nodes):
+        linearised_sv_variables_batch(**self.inputs)
+
+    def peakmem_linearised_sv_variables_batch(self, n_branches, n_level_nodes):
+        linearised_sv_variables_batch(**self.inputs)
+
+
+class LinearSVVariablesPerBranch:
+    params = ([1, 100, 1000, 5000], [4, 50, 500])
+    param_names = ["n_branches", "n_level_nodes"]
+    timeout = 300
+
+    def setup(self, n_branches, n_level_nodes):
+        if n_branches * n_level_nodes > MAX_SCALAR_NODES:
+            raise NotImplementedError
+        inputs = linear_sv_inputs(n_branches, n_level_nodes)
+        self.models = [
+            GetLinearSVVariables(**dict(zip(inputs.keys(), kwargs)))
+            for kwargs in zip(*(v.tolist() for v in inputs.values()))
+        ]
+
+    def time_get_variables(self, n_branches, n_level_nodes):
+        for model in self.models:
+            model.getVariables()
+
+    def time_get_variables_vectorized(self, n_branches, n_level_nodes):
+        for model in self.models:
+            model.getVariables(vectorized=True)
+
+
+class LinearSVUniformVariables:
+    params = ([100, 1000], [50, 500], [False, True])
+    param_names = ["n_branches", "n_level_nodes", "uniform"]
+
+    def setup(self, n_branches, n_level_nodes, uniform):
+        self.inputs = linear_sv_inputs(n_branches, n_level_nodes)
+        if uniform:
+            self.inputs["y_nominal_down"] = self.inputs["y_nominal"]
+
+    def time_linearised_sv_results(self, n_branches, n_level_nodes, uniform):
+        linearised_sv_results(**self.inputs)
+
+
+class IDZFrequencyResponse:
+    params = [1, 100, 1000]
+    param_names = ["n_branches"]
+
+    def setup(self, n_branches):
+        self.parameters = idz_variables_batch(**idz_inputs(n_branches))
+        self.omega = np.logspace(-6.0, -1.0, 200)
+        self.times = np.linspace(0.0, 24 * 3600.0, 289)
+
+    def time_transfer_matrix_per_frequency(self, n_branches):
+        for values in zip(*(self.parameters[name].tolist() for name in IDZ_PARAMETERS)):
+            p11, p12, p21, p22, Au, Ad, delay = values
+            for omega in self.omega.tolist():
+                s = 1j * omega
+                (
+                    (1 / (Au * s) + p11, (1 / (Au * s) + p12) * cmath.exp(-s * delay)),
+                    ((1 / (Ad * s) + p21) * cmath.exp(-s * delay), 1 / (Ad * s) + p22),
+                )
+
+    def time_idz_transfer_matrix(self, n_branches):
+        idz_transfer_matrix(self.omega, self.parameters)
+
+    def time_idz_step_response(self, n_branches):
+        idz_step_response(self.times, self.parameters)
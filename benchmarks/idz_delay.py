@@ -0,0 +1,161 @@
+"""
+Optimization problems with chains of IDZ branches, with the delayed flows
+computed with ``delay()`` (``IDZ``) or with discrete shifts on the time grid
+(``IDZDiscreteDelay``).
+
+Unlike the other benchmarks, these compile a Modelica model and solve the
+optimization problem, so they measure the size and solve time of the resulting
+collocation problem.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from tests.helpers import IDZ_PARAMETER_NAMES, idz_inputs
+
+BLOCKS = {
+    "delay": "IDZ",
+    "discrete": "IDZDiscreteDelay",
+}
+
+# Optimization time grid: two days with a time step of 15 minutes
+TIMES = np.arange(0.0, 2 * 24 * 3600.0 + 1.0, 900.0)
+
+
+def idz_chain_model(n_branches, block, seed=0):
+    """
+    Modelica source of a chain of IDZ branches between an upstream discharge
+    and a downstream level boundary.
+    """
+    inputs = idz_inputs(n_branches, seed=seed)
+    # Chain the branches, so that each starts at the bed level where the previous ends
+    drop = inputs["h_b_up"] - inputs["h_b_down"]
+    inputs["h_b_up"] = -np.concatenate(([0.0], np.cumsum(drop)[:-1]))
+    inputs["h_b_down"] = inputs["h_b_up"] - drop
+    inputs["y_nominal"] = inputs["h_b_down"] + 3.0
+    inputs["q_nominal"] = np.full(n_branches, 20.0)
+
+    lines = [
+        "model Chain",
+        "  Deltares.ChannelFlow.Hydraulic.BoundaryConditions.Discharge upstream;",
+    ]
+    for i in range(n_branches):
+        modifications = ", ".join(
+            f"{IDZ_PARAMETER_NAMES[name]} = {float(values[i])!r}"
+            for name, values in inputs.items()
+        )
+        lines.append(
+            f"  Deltares.ChannelFlow.Hydraulic.Branches.{block} branch{i}({modifications});"
+        )
+    lines += [
+        "  Deltares.ChannelFlow.Hydraulic.BoundaryConditions.Level downstream;",
+        "  input Modelica.Units.SI.VolumeFlowRate Q_in(fixed = true);",
+        "  input Modelica.Units.SI.Position H_down(fixed = true);",
+        "equation",
+        "  connect(upstream.HQ, branch0.HQUp);",
+    ]
+    lines += [
+        f"  connect(branch{i}.HQDown, branch{i + 1}.HQUp);"
+        for i in range(n_branches - 1)
+    ]
+    lines += [
+        f"  connect(branch{n_branches - 1}.HQDown, downstream.HQ);",
+        "  upstream.Q = Q_in;",
+        "  downstream.H = H_down;",
+        "end Chain;",
+    ]
+    return "\n".join(lines), float(inputs["y_nominal"][-1])
+
+
+def chain_problem_class(n_branches, formulation, h_down):
+    """
+    Optimization problem class of the chain of :func:`idz_chain_model`.
+    """
+    import casadi as ca
+    from rtctools.optimization.collocated_integrated_optimization_problem import (
+        CollocatedIntegratedOptimizationProblem,
+    )
+    from rtctools.optimization.modelica_mixin import ModelicaMixin
+    from rtctools.optimization.timeseries import Timeseries
+
+    from rtctools_channel_flow.channel_flow_parameter_setting import (
+        ChannelFlowParameterSettingOpimizationMixin,
+    )
+
+    branches = [f"branch{i}" for i in range(n_branches)]
+
+    class Chain(
+        ChannelFlowParameterSettingOpimizationMixin,
+        ModelicaMixin,
+        CollocatedIntegratedOptimizationProblem,
+    ):
+        idz = True
+        idz_branches = branches
+        idz_discrete_delay_branches = branches if formulation == "discrete" else None
+
+        def times(self, variable=None):
+            return TIMES
+
+        def constant_inputs(self, ensemble_member):
+            constant_inputs = super().constant_inputs(ensemble_member)
+            constant_inputs["Q_in"] = Timeseries(
+                TIMES, 20.0 + 10.0 * np.sin(TIMES / 2e4)
+            )
+            constant_inputs["H_down"] = Timeseries(TIMES, np.full(len(TIMES), h_down))
+            return constant_inputs
+
+        def history(self, ensemble_member):
+            return {}
+
+        def objective(self, ensemble_member):
+            return ca.MX(0.0)
+
+        def solver_options(self):
+            options = super().solver_options()
+            options["ipopt.print_level"] = 0
+            options["print_time"] = False
+            return options
+
+    return Chain
+
+
+class IDZDelayFormulation:
+    params = ([5, 20], list(BLOCKS.keys()))
+    param_names = ["n_branches", "formulation"]
+    timeout = 600
+
+    def setup(self, n_branches, formulation):
+        self.folder = tempfile.mkdtemp()
+        source, h_down = idz_chain_model(n_branches, BLOCKS[formulation])
+        with open(os.path.join(self.folder, "Chain.mo"), "w") as f:
+            f.write(source)
+        self.problem_class = chain_problem_class(n_branches, formulation, h_down)
+        # Compile the model once, so that the timings do not include it
+        self.solve()
+
+    def teardown(self, n_branches, formulation):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def solve(self):
+        from rtctools.util import run_optimization_problem
+
+        return run_optimization_problem(
+            self.problem_class,
+            base_folder=self.folder,
+            model_folder=self.folder,
+            model_name="Chain",
+        )
+
+    def time_solve(self, n_branches, formulation):
+        self.solve()
+
+    def track_n_variables(self, n_branches, formulation):
+        return self.solve().solver_input.size1()
+
+    def track_n_constraints(self, n_branches, formulation):
+        # The transcription is repeated to obtain the bounds of the constraints
+        lbg = self.solve().transcribe()[3]
+        return len(lbg)
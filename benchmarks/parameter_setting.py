@@ -0,0 +1,65 @@
+"""
+``ChannelFlowParameterSettingOpimizationMixin.parameters`` for synthetic networks.
+"""
+
+from tests.helpers import idz_network, linear_sv_network, make_problem
+
+# Networks with more coefficients than this are skipped to bound memory use
+MAX_NODES = 500000
+
+
+class LinearSVParameters:
+    params = ([1, 100, 1000, 5000], [4, 50, 500])
+    param_names = ["n_branches", "n_level_nodes"]
+    timeout = 300
+
+    def setup(self, n_branches, n_level_nodes):
+        if n_branches * n_level_nodes > MAX_NODES:
+            raise NotImplementedError
+        parameters = linear_sv_network(n_branches, n_level_nodes)
+        attributes = dict(
+            linearised_sv=True,
+            linearised_sv_branches=[f"sv{i}" for i in range(n_branches)],
+        )
+        self.uncached = make_problem(
+            parameters, channel_flow_parameter_cache=False, **attributes
+        )
+        self.cached = make_problem(parameters, **attributes)
+        self.cached.parameters(0)
+
+    def time_parameters(self, n_branches, n_level_nodes):
+        self.uncached.parameters(0)
+
+    def time_parameters_cached(self, n_branches, n_level_nodes):
+        self.cached.parameters(0)
+
+    def peakmem_parameters(self, n_branches, n_level_nodes):
+        self.uncached.parameters(0)
+
+
+class IDZParameters:
+    params = ([1, 100, 1000, 5000], ["bisection", "newton"])
+    param_names = ["n_branches", "normal_depth_method"]
+    timeout = 300
+
+    def setup(self, n_branches, normal_depth_method):
+        parameters = idz_network(n_branches)
+        attributes = dict(
+            idz=True,
+            idz_branches=[f"idz{i}" for i in range(n_branches)],
+            idz_normal_depth_method=normal_depth_method,
+        )
+        self.uncached = make_problem(
+            parameters, channel_flow_parameter_cache=False, **attributes
+        )
+        self.cached = make_problem(parameters, **attributes)
+        self.cached.parameters(0)
+
+    def time_parameters(self, n_branches, normal_depth_method):
+        self.uncached.parameters(0)
+
+    def time_parameters_cached(self, n_branches, normal_depth_method):
+        self.cached.parameters(0)
+
+    def peakmem_parameters(self, n_branches, normal_depth_method):
+        self.uncached.parameters(0)
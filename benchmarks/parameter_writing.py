@@ -0,0 +1,56 @@
+"""
+Writing the computed LinearisedSV coefficients to the parameter dictionary.
+"""
+
+import numpy as np
+
+from tests.helpers import linear_sv_network, make_problem
+
+from rtctools_channel_flow.calculate_parameters import LINEARISED_SV_PARAMETERS
+
+
+class TimeLinearSVParameterWriting:
+    """
+    Compare the bulk write path of ``set_linear_sv_parameters`` with writing
+    every coefficient under a key built on the fly. The computed coefficients are
+    served from the parameter cache, so that the writing dominates.
+    """
+
+    params = ([10, 300], [10, 100])
+    param_names = ["n_branches", "n_level_nodes"]
+
+    def setup(self, n_branches, n_level_nodes):
+        branches = [f"sv{i}" for i in range(n_branches)]
+        self.problem = make_problem(
+            linear_sv_network(n_branches, n_level_nodes),
+            linearised_sv=True,
+            linearised_sv_branches=branches,
+        )
+        self.p = self.problem.parameters(0)
+        self.coefficients = [
+            {
+                name: np.array(
+                    [
+                        self.p[f"{branch}.{name}[{j + 1}]"]
+                        for j in range(
+                            {"h": n_level_nodes, "q": n_level_nodes + 1}.get(
+                                grid, 2 * n_level_nodes - 1
+                            )
+                        )
+                    ]
+                )
+                for name, (_, grid) in LINEARISED_SV_PARAMETERS.items()
+            }
+            for branch in branches
+        ]
+        self.branches = branches
+
+    def time_set_linear_sv_parameters(self, n_branches, n_level_nodes):
+        self.problem.set_linear_sv_parameters(self.p)
+
+    def time_write_per_index(self, n_branches, n_level_nodes):
+        p = self.p
+        for channel, result in zip(self.branches, self.coefficients):
+            for name, values in result.items():
+                for j in range(len(values)):
+                    p[channel + "." + name + "[" + str(j + 1) + "]"] = values[j]
@@ -0,0 +1,45 @@
+"""
+State-space export of chains of LinearisedSV branches, and simulation of many
+scenarios with the exponential integrator.
+"""
+
+import numpy as np
+
+from tests.helpers import chain_models
+
+from rtctools_channel_flow.state_space import (
+    ExponentialIntegrator,
+    linear_sv_chain_state_space,
+)
+
+# Simulated period: two days with a time step of 15 minutes
+TIME_STEP = 900.0
+N_STEPS = 192
+
+
+class StateSpaceExport:
+    params = [1, 10, 30]
+    param_names = ["n_branches"]
+
+    def setup(self, n_branches):
+        self.models = chain_models(n_branches)
+
+    def time_chain_state_space(self, n_branches):
+        linear_sv_chain_state_space(self.models)
+
+    def time_discretize(self, n_branches):
+        ExponentialIntegrator(linear_sv_chain_state_space(self.models), TIME_STEP)
+
+
+class StateSpaceSimulation:
+    params = ([10], [1, 100, 1000])
+    param_names = ["n_branches", "n_scenarios"]
+
+    def setup(self, n_branches, n_scenarios):
+        model = linear_sv_chain_state_space(chain_models(n_branches))
+        self.integrator = ExponentialIntegrator(model, TIME_STEP)
+        rng = np.random.default_rng(0)
+        self.u = rng.uniform(0.0, 10.0, (n_scenarios, N_STEPS, model.n_inputs))
+
+    def time_simulate(self, n_branches, n_scenarios):
+        self.integrator.simulate(self.u)
@@ -36,7 +36,7 @@ setup(
     license="LGPL",
     packages=find_packages("src"),
     package_dir={"": "src"},
-    install_requires=["pymoca >= 0.4.2"],
+    install_requires=["pymoca >= 0.4.2", "numpy", "scipy"],
     include_package_data=True,
     cmdclass=versioneer.get_cmdclass(),
     entry_points={
@@ -0,0 +1,124 @@
+import numpy as np
+
+# Inputs of the hydraulic calculators, with the suffix of the model parameter
+# they are read from.
+LINEARISED_SV_COLUMNS = {
+    "n_level_nodes": ".n_level_nodes",
+    "length": ".length",
+    "h_b_up": ".H_b_up",
+    "h_b_down": ".H_b_down",
+    "q_nominal": ".Q_nominal",
+    "width": ".width",
+    "y_nominal": ".H_nominal",
+    "y_nominal_down": ".H_nominal_down",
+    "friction_coefficient": ".friction_coefficient",
+}
+
+IDZ_COLUMNS = {
+    "length": ".length",
+    "h_b_up": ".H_b_up",
+    "h_b_down": ".H_b_down",
+    "q_nominal": ".Q_nominal",
+    "width": ".width",
+    "y_nominal": ".H_nominal",
+    "side_slope": ".side_slope",
+    "friction_coefficient": ".friction_coefficient",
+}
+
+# Circular IDZ branches have a radius instead of a bottom width and side slope.
+# As in the IDZ computations, the radius takes the place of the width.
+IDZ_CIRCULAR_COLUMNS = {
+    "length": ".length",
+    "h_b_up": ".H_b_up",
+    "h_b_down": ".H_b_down",
+    "q_nominal": ".Q_nominal",
+    "width": ".radius",
+    "y_nominal": ".H_nominal",
+    "friction_coefficient": ".friction_coefficient",
+}
+
+# Columns holding counts rather than physical quantities
+_INTEGER_COLUMNS = ("n_level_nodes",)
+
+
+class BranchGeometryTable:
+    """
+    Structure-of-arrays table with the geometry and nominal values of a set of
+    branches.
+
+    The parameter names of every branch and column are built once, when the
+    table is created. :meth:`load` then reads all values from the parameters
+    into one contiguous float64 block, with one row per column, that can be
+    passed to the hydraulic calculators without further conversion, e.g.
+    ``linearised_sv_variables_batch(**table.load(p).inputs())``.
+
+    :param branches: List of branch names.
+    :param columns: Dictionary mapping column names to parameter name suffixes,
+        e.g. :data:`LINEARISED_SV_COLUMNS` or :data:`IDZ_COLUMNS`.
+    :param block: Name of the block of the branches, used in messages.
+    """
+
+    def __init__(self, branches, columns, block="channel flow"):
+        self.branches = tuple(branches)
+        self.columns = dict(columns)
+        self.block = block
+        self.__index = {name: i for i, name in enumerate(self.columns.keys())}
+        self.__keys = [
+            [branch + suffix for branch in self.branches]
+            for suffix in self.columns.values()
+        ]
+        self.__data = np.full((len(self.columns), len(self.branches)), np.nan)
+
+    def __len__(self):
+        return len(self.branches)
+
+    def __getitem__(self, name):
+        return self.__data[self.__index[name]]
+
+    @property
+    def data(self):
+        """
+        The values as a 2-D float64 array with one row per column.
+        """
+        return self.__data
+
+    def load(self, p):
+        """
+        Read the values of all branches from the parameters.
+
+        A new block of data is allocated on every call, so arrays obtained from
+        a previous load are not modified.
+
+        :param p: The parameters of the model.
+        :return: The table itself.
+        """
+        data = np.empty((len(self.columns), len(self.branches)))
+        for row, keys in zip(data, self.__keys):
+            try:
+                row[:] = np.fromiter(map(p.__getitem__, keys), float, len(keys))
+            except KeyError:
+                self.__raise_missing(p, keys)
+                raise
+        self.__data = data
+        return self
+
+    def inputs(self):
+        """
+        :return: A dictionary with the column arrays, keyed on the column names.
+            Count columns such as ``n_level_nodes`` are converted to integers.
+        """
+        return {
+            name: self[name].astype(int) if name in _INTEGER_COLUMNS else self[name]
+            for name in self.columns.keys()
+        }
+
+    def __raise_missing(self, p, keys):
+        for branch, key in zip(self.branches, keys):
+            if key not in p:
+                raise ValueError(
+                    f"Parameter {key} is required to set "
+                    f"{self.block} parameters but is missing. "
+                    "This parameter can be set via the declaration of "
+                    f"the {self.block} branch, {branch}, in the model "
+                    ".mo file."
+                )
@@ -1,6 +1,253 @@
+import csv
 import math
 import numpy as np
 
+# Channel shape identifiers, as used by the ``shape`` arguments
+SECTION_SHAPES = {"trapezoidal": 0, "circular": 1}
+
+
+def trapezoidal_section(y, b0, m):
+    """
+    Compute the geometry of a trapezoidal cross section.
+
+    Parameters
+    ----------
+    y : float or np.ndarray
+        Flow depth [m].
+    b0 : float or np.ndarray
+        Bottom width of the channel [m].
+    m : float or np.ndarray
+        Side slope of the channel (horizontal/vertical) [-].
+
+    Returns
+    -------
+    area : float or np.ndarray
+        Wetted cross-sectional area [m²].
+    perimeter : float or np.ndarray
+        Wetted perimeter [m].
+    top_width : float or np.ndarray
+        Width of the water surface [m].
+    dperimeter_dy : float or np.ndarray
+        Derivative of the wetted perimeter with respect to the depth [-].
+    dtop_width_dy : float or np.ndarray
+        Derivative of the top width with respect to the depth [-].
+    """
+    side = (1 + m**2) ** 0.5
+    area = b0 * y + m * y**2
+    perimeter = b0 + 2 * y * side
+    top_width = b0 + 2 * y * m
+    return area, perimeter, top_width, 2 * side, 2 * m
+
+
+def circular_section(y, r, m=0):
+    """
+    Compute the geometry of a partially filled circular cross section.
+
+    Parameters
+    ----------
+    y : float or np.ndarray
+        Flow depth measured from the channel bottom [m].
+    r : float or np.ndarray
+        Radius of the channel [m].
+    m : float or np.ndarray, optional
+        Not used, included for interface consistency with
+        :func:`trapezoidal_section`.
+
+    Returns
+    -------
+    area, perimeter, top_width, dperimeter_dy, dtop_width_dy : float or np.ndarray
+        See :func:`trapezoidal_section`.
+
+    Notes
+    -----
+    With the central angle ``alpha = arccos(1 - y / r)`` of the wetted part,
+    ``A = r² (alpha - sin(alpha) cos(alpha))``, ``P = 2 r alpha`` and
+    ``T = 2 r sin(alpha)``. Only the arccos and one sine are evaluated.
+    """
+    cos_alpha = 1 - y / r
+    alpha = np.arccos(cos_alpha)
+    sin_alpha = np.sin(alpha)
+    area = r**2 * (alpha - sin_alpha * cos_alpha)
+    perimeter = 2 * r * alpha
+    top_width = 2 * r * sin_alpha
+    return area, perimeter, top_width, 2 / sin_alpha, 2 * cos_alpha / sin_alpha
+
+
+# Central angle at which the conveyance A R^(2/3) of a circular channel is at
+# its maximum, at a depth of about 0.938 times the diameter. Above this depth the
+# normal depth is not unique.
+_CIRCULAR_MAX_CONVEYANCE_ANGLE = 2.6390535689672223
+
+
+# Geometry kernel of each channel shape, see trapezoidal_section
+SECTION_KERNELS = {
+    SECTION_SHAPES["trapezoidal"]: trapezoidal_section,
+    SECTION_SHAPES["circular"]: circular_section,
+}
+
+
+def section_kernel(shape):
+    """
+    Return the geometry kernel of a channel shape.
+
+    Parameters
+    ----------
+    shape : int
+        Channel shape identifier, see ``SECTION_SHAPES``.
+
+    Returns
+    -------
+    kernel : callable
+        Function ``kernel(y, b0, m)`` returning the area, perimeter, top width
+        and the derivatives of the perimeter and top width, see
+        :func:`trapezoidal_section`.
+    """
+    try:
+        return SECTION_KERNELS[int(shape)]
+    except KeyError:
+        raise ValueError(
+            f"Unknown channel shape {shape}, should be one of "
+            f"{sorted(SECTION_KERNELS.keys())}."
+        ) from None
+
+
+def section_geometry(y, b0, m, shape=0):
+    """
+    Compute the geometry of many cross sections, each with its own shape.
+
+    Parameters
+    ----------
+    y, b0, m : array_like of float
+        Flow depth, bottom width or radius and side slope of each channel.
+    shape : array_like of int, default=0
+        Channel shape identifier of each channel, see ``SECTION_SHAPES``.
+
+    Returns
+    -------
+    area, perimeter, top_width, dperimeter_dy, dtop_width_dy : np.ndarray
+        See :func:`trapezoidal_section`.
+    """
+    y, b0, m = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (y, b0, m)))
+    shape = _check_shapes(shape, y.shape)
+    return _evaluate_by_shape(shape, SECTION_KERNELS, y, b0, m)
+
+
+def _check_shapes(shape, size):
+    shape = np.broadcast_to(np.asarray(shape, dtype=int), size)
+    if not np.isin(shape, list(SECTION_KERNELS.keys())).all():
+        raise ValueError(
+            f"Channel shape should be one of {sorted(SECTION_KERNELS.keys())}."
+        )
+    return shape
+
+
+def _max_normal_depth(shape, b0):
+    """
+    Largest depth at which the normal depth of cross sections is unique, at the
+    maximum of the conveyance. Infinite for trapezoidal sections.
+    """
+    return np.where(
+        shape == SECTION_SHAPES["circular"],
+        b0 * (1 - np.cos(_CIRCULAR_MAX_CONVEYANCE_ANGLE)),
+        np.inf,
+    )
+
+
+def _friction_slope(q, n, area, perimeter):
+    hydraulic_radius = area / perimeter
+    return (q**2 * n**2) / (area**2 * hydraulic_radius ** (4 / 3))
+
+
+def _wave_celerity(area, top_width):
+    # Celerity of shallow water waves, sqrt(g A / T), for every section shape
+    return np.sqrt(9.81 * area / top_width)
+
+
+class SectionState:
+    """
+    Hydraulic state of the flow through cross sections at given depths.
+
+    The geometry kernel of the shape is evaluated once, in the constructor, and
+    all section and flow properties are derived from its outputs, so consumers
+    that need several properties at the same depth share a single evaluation of
+    the transcendental functions of the section.
+
+    Parameters
+    ----------
+    y : float or array_like
+        Flow depth [m].
+    q : float or array_like
+        Discharge [m³/s].
+    n : float or array_like
+        Manning roughness coefficient [-].
+    b0 : float or array_like
+        Bottom width (trapezoidal) or radius (circular) [m].
+    m : float or array_like
+        Side slope (trapezoidal) [-].
+    shape : int or array_like of int, default=0
+        Channel shape identifier, see ``SECTION_SHAPES``. An array selects the
+        shape per entry.
+
+    Attributes
+    ----------
+    area, perimeter, top_width, dperimeter_dy, dtop_width_dy
+        Geometry of the section, see :func:`trapezoidal_section`.
+    hydraulic_radius
+        Area divided by the wetted perimeter [m].
+    celerity
+        Wave celerity ``sqrt(g A / T)`` [m/s].
+    velocity
+        Mean flow velocity [m/s].
+    froude
+        Froude number ``v / c`` [-].
+    friction_slope
+        Friction slope from Manning's equation [-]. Computed on first access.
+    """
+
+    __slots__ = (
+        "q",
+        "n",
+        "area",
+        "perimeter",
+        "top_width",
+        "dperimeter_dy",
+        "dtop_width_dy",
+        "hydraulic_radius",
+        "celerity",
+        "velocity",
+        "froude",
+        "_friction_slope",
+    )
+
+    def __init__(self, y, q, n, b0, m, shape=0):
+        if np.ndim(shape) == 0:
+            geometry = section_kernel(shape)(y, b0, m)
+        else:
+            y, b0, m = np.broadcast_arrays(y, b0, m)
+            geometry = _evaluate_by_shape(shape, SECTION_KERNELS, y, b0, m)
+        (
+            self.area,
+            self.perimeter,
+            self.top_width,
+            self.dperimeter_dy,
+            self.dtop_width_dy,
+        ) = geometry
+        self.q = q
+        self.n = n
+        self.hydraulic_radius = self.area / self.perimeter
+        self.celerity = _wave_celerity(self.area, self.top_width)
+        self.velocity = q / self.area
+        self.froude = self.velocity / self.celerity
+        self._friction_slope = None
+
+    @property
+    def friction_slope(self):
+        if self._friction_slope is None:
+            self._friction_slope = _friction_slope(
+                self.q, self.n, self.area, self.perimeter
+            )
+        return self._friction_slope
+
 
 def CircularChannelData(y, r, q):
     """
@@ -32,17 +279,21 @@ def CircularChannelData(y, r, q):
 
     Notes
     -----
-    The circular cross-section is assumed to be partially filled.
+    The circular cross-section is assumed to be partially filled. The geometry
+    is computed by :func:`circular_section`.
     """
-    diameter = 2 * r
-    alpha = np.arccos(1 - y / r)
-    area = (diameter**2) / 4 * (alpha - np.sin(2 * alpha) / 2)
-    perimeter = alpha * diameter
-    hydraulic_radius = (diameter / 4) * (1 - np.sin(2 * alpha) / (2 * alpha))
-    celerity = np.sqrt(9.81 * hydraulic_radius)
-    velocity = q / area
+    state = SectionState(y, q, 0, r, 0, SECTION_SHAPES["circular"])
+    alpha = state.perimeter / (2 * r)
+    celerity = np.sqrt(9.81 * state.hydraulic_radius)
 
-    return alpha, area, perimeter, hydraulic_radius, celerity, velocity
+    return (
+        alpha,
+        state.area,
+        state.perimeter,
+        state.hydraulic_radius,
+        celerity,
+        state.velocity,
+    )
 
 
 def froudeC(y, q, n, r, m):
@@ -72,20 +323,14 @@ def froudeC(y, q, n, r, m):
     Notes
     -----
     The Froude number is defined as the ratio of mean velocity to
-    kinematic wave celerity:
+    wave celerity:
 
         Fr = v / c
 
-    where c = sqrt(g * hydraulic_radius).
+    where c = sqrt(g * A / T), with A the wetted area and T the top width, as
+    for the other section shapes.
     """
-    g = 9.81
-    diameter = 2 * r
-    alpha = np.arccos(1 - y / r)
-    area = (diameter**2) / 4 * (alpha - np.sin(2 * alpha) / 2)
-    hydraulic_radius = diameter / 4 * (1 - np.sin(2 * alpha) / (2 * alpha))
-    celerity = np.sqrt(g * hydraulic_radius)
-    velocity = q / area
-    fr = velocity / celerity
+    fr = SectionState(y, q, n, r, m, SECTION_SHAPES["circular"]).froude
 
     return fr
 
@@ -121,14 +366,7 @@ def froude(y, q, n, b0, m):
 
     where A is the cross-sectional area and T is the top width.
     """
-    g = 9.81
-    area = b0 * y + m * y**2
-    top_width = b0 + 2 * y * m
-    celerity = np.sqrt(g * area / top_width)
-    velocity = q / area
-    fr = velocity / celerity
-
-    return fr
+    return SectionState(y, q, n, b0, m, SECTION_SHAPES["trapezoidal"]).froude
 
 
 def sf0C(y, q, n, r, m):
@@ -160,13 +398,7 @@ def sf0C(y, q, n, r, m):
 
         Sf = (Q² n²) / (A² R^(4/3))
     """
-    diameter = 2 * r
-    alpha = np.arccos(1 - y / r)
-    area = (diameter**2) / 4 * (alpha - np.sin(2 * alpha) / 2)
-    hydraulic_radius = diameter / 4 * (1 - np.sin(2 * alpha) / (2 * alpha))
-    sf0_ = (q**2 * n**2) / (area**2 * hydraulic_radius ** (4 / 3))
-
-    return sf0_
+    return SectionState(y, q, n, r, m, SECTION_SHAPES["circular"]).friction_slope
 
 
 def sf0(y, q, n, b0, m):
@@ -191,17 +423,14 @@ def sf0(y, q, n, b0, m):
     sf0_ : float
         Friction slope [-].
     """
-    area = b0 * y + m * y**2
-    perimeter = b0 + 2 * y * np.sqrt(1 + m**2)
-    hydraulic_radius = area / perimeter
-    sf0_ = (q**2 * n**2) / (area**2 * hydraulic_radius ** (4 / 3))
-
-    return sf0_
+    return SectionState(y, q, n, b0, m, SECTION_SHAPES["trapezoidal"]).friction_slope
 
 
-def normal_depth(q, n, b0, m, sb, yx, L, shape):
+def normal_depth(
+    q, n, b0, m, sb, yx, L, shape, method="bisection", tol=1e-12, max_iter=50
+):
     """
-    Compute the normal flow depth using a bisection method.
+    Compute the normal flow depth using a bisection or Newton method.
 
     Parameters
     ----------
@@ -221,9 +450,18 @@ def normal_depth(q, n, b0, m, sb, yx, L, shape):
         Channel length [m].
         (Not used in the current implementation.)
     shape : int
-        Channel shape identifier:
+        Channel shape identifier, see ``SECTION_SHAPES``:
         - 0 : Trapezoidal channel
         - 1 : Circular channel
+    method : str, default="bisection"
+        Solver to use:
+        - ``"bisection"`` : 25 bisection iterations on ``[0, 5 * yx]``.
+        - ``"newton"`` : Newton iterations with an analytic derivative,
+          safeguarded by bisection, see :func:`normal_depth_vectorized`.
+    tol : float, default=1e-12
+        Relative tolerance on the depth. Only used by the Newton solver.
+    max_iter : int, default=50
+        Maximum number of iterations. Only used by the Newton solver.
 
     Returns
     -------
@@ -234,32 +472,34 @@ def normal_depth(q, n, b0, m, sb, yx, L, shape):
     -----
     The normal depth is determined by solving Manning's equation
     such that the friction slope equals the bed slope.
-    A fixed number of bisection iterations (25) is used.
-    """
-    if shape == 0:
-        y1 = 0
-        y2 = yx * 5
-        for k in range(25):
-            y = (y1 + y2) / 2
-            a = b0 * y + m * y**2
-            p = b0 + 2 * y * (1 + m**2) ** 0.5
-            r = a / p
-            dif = (q**2 * n**2) / (a**2 * r ** (4 / 3)) - sb
-            if dif < 0:
-                y2 = (y1 + y2) / 2
-            else:
-                y1 = (y1 + y2) / 2
-    elif shape == 1:
-        y1 = 0
-        y2 = yx * 5
-        for k in range(25):
-            y = (y1 + y2) / 2
-            alpha, a, p, r, c, v = CircularChannelData(y, b0, q)
-            dif = (q**2 * n**2) / (a**2 * r ** (4 / 3)) - sb
-            if dif < 0:
-                y2 = (y1 + y2) / 2
-            else:
-                y1 = (y1 + y2) / 2
+    The bisection method uses a fixed number of iterations (25), which gives a
+    relative accuracy of about 1e-7 and silently returns a bound of the search
+    interval if it does not contain the root. For circular channels the search
+    interval is capped at the depth of maximum conveyance, about 0.938 times the
+    diameter. The Newton method converges to
+    ``tol`` in a handful of iterations and raises a ``ValueError`` if no normal
+    depth exists.
+    """
+    if method == "newton":
+        return float(
+            normal_depth_vectorized(
+                q, n, b0, m, sb, yx, shape, method=method, tol=tol, max_iter=max_iter
+            )
+        )
+    elif method != "bisection":
+        raise ValueError(f"Unknown normal depth method {method}.")
+
+    section = section_kernel(shape)
+    y1 = 0
+    y2 = min(yx * 5, float(_max_normal_depth(shape, b0)))
+    for k in range(25):
+        y = (y1 + y2) / 2
+        a, p = section(y, b0, m)[:2]
+        dif = _friction_slope(q, n, a, p) - sb
+        if dif < 0:
+            y2 = (y1 + y2) / 2
+        else:
+            y1 = (y1 + y2) / 2
 
     yn = y  # Normal depth
 
@@ -326,23 +566,33 @@ def backwater_area_upstream_direction(t, c, v, gamma, x):
     return au
 
 
-def alpha_kappa(a, hydraulic_radius, p, m, fr, sb):
-    kappa = 7 / 3 - 4 * a / (3 * hydraulic_radius * p) * 2 * (1 + m**2) ** 0.5
-    alpha = (hydraulic_radius * (2 + (kappa - 1) * fr**2) * sb) / (a * fr * (1 - fr**2))
+def alpha_kappa_section(a, top_width, p, dperimeter_dy, fr, sb):
+    kappa = 7 / 3 - 4 * a / (3 * top_width * p) * dperimeter_dy
+    alpha = (top_width * (2 + (kappa - 1) * fr**2) * sb) / (a * fr * (1 - fr**2))
     return alpha, kappa
 
 
-def calculate_gamma(hydraulic_radius, kappa, sb, fr, sx, v, m):
+def calculate_gamma_section(top_width, kappa, sb, fr, sx, v, dtop_width_dy):
     g = 9.81
-    gamma = v**2 * 2 * m * sx + (
-        g
-        * hydraulic_radius
-        * ((1 + kappa) * sb - (1 + kappa - fr**2 * (kappa - 2)) * sx)
+    gamma = v**2 * dtop_width_dy * sx + (
+        g * top_width * ((1 + kappa) * sb - (1 + kappa - fr**2 * (kappa - 2)) * sx)
     )
     return gamma
 
 
-def IdzFun(q, n, B, m, Sb, Y0, L, shape):
+def alpha_kappa(a, hydraulic_radius, p, m, fr, sb):
+    # Trapezoidal section with side slope m, see alpha_kappa_section. The second
+    # argument is the top width.
+    return alpha_kappa_section(a, hydraulic_radius, p, 2 * (1 + m**2) ** 0.5, fr, sb)
+
+
+def calculate_gamma(hydraulic_radius, kappa, sb, fr, sx, v, m):
+    # Trapezoidal section with side slope m, see calculate_gamma_section. The
+    # first argument is the top width.
+    return calculate_gamma_section(hydraulic_radius, kappa, sb, fr, sx, v, 2 * m)
+
+
+def IdzFun(q, n, B, m, Sb, Y0, L, shape, normal_depth_method="bisection"):
     """
     Compute parameters for an IDZ (Impulse-Delay-Zero) channel flow model.
 
@@ -375,9 +625,11 @@ def IdzFun(q, n, B, m, Sb, Y0, L, shape):
     L : float
         Channel length [m].
     shape : int
-        Channel geometry identifier:
+        Channel geometry identifier, see ``SECTION_SHAPES``:
         - ``0`` : Trapezoidal channel
         - ``1`` : Circular channel
+    normal_depth_method : str, default="bisection"
+        Solver used for the normal depth, see :func:`normal_depth`.
 
     Returns
     -------
@@ -407,11 +659,15 @@ def IdzFun(q, n, B, m, Sb, Y0, L, shape):
     -----
     - The bottom slope is constrained to a minimum value to avoid numerical
       singularities.
-    - Normal depth is computed using Manning’s equation and a bisection method.
+    - Normal depth is computed using Manning’s equation and a bisection or
+      Newton method.
     - The channel is split into upstream and downstream regions depending on
       the relationship between the normal depth and downstream depth.
     - Both low-frequency (storage, delay) and high-frequency (transfer matrix)
       components are computed.
+    - The cross section enters only through its area, wetted perimeter, top
+      width and their derivatives, computed by the kernel of the shape in
+      ``SECTION_KERNELS``. The wave celerity is ``sqrt(g A / T)`` for all shapes.
     - Gravitational acceleration is assumed to be 9.81 m/s².
 
     References
@@ -428,17 +684,14 @@ def IdzFun(q, n, B, m, Sb, Y0, L, shape):
     b0 = B  # Bottom width or radius
     h = Y0  # Initial / downstream depth
     yx = h  # Downstream depth
-    g = 9.81  # Gravitational acceleration [m/s^2]
 
-    yn = normal_depth(q, n, B, m, sb, Y0, L, shape)
+    yn = normal_depth(q, n, B, m, sb, Y0, L, shape, method=normal_depth_method)
 
     # ------------------------------------------------------------------
     # Water surface slope at downstream end
     # ------------------------------------------------------------------
-    if shape == 0:
-        sxx = (sb - sf0(yx, q, n, b0, m)) / (1 - froude(yx, q, n, b0, m) ** 2)
-    elif shape == 1:
-        sxx = (sb - sf0C(yx, q, n, b0, m)) / (1 - froudeC(yx, q, n, b0, m) ** 2)
+    state = SectionState(yx, q, n, b0, m, shape)
+    sxx = (sb - state.friction_slope) / (1 - state.froude**2)
 
     # ------------------------------------------------------------------
     # Location of transition point
@@ -464,20 +717,11 @@ def IdzFun(q, n, B, m, Sb, Y0, L, shape):
     # Part 2: Upstream section
     # ------------------------------------------------------------------
     if x1 != 0:
-        if shape == 0:
-            a = b0 * y1 + m * y1**2
-            p = b0 + 2 * y1 * (1 + m**2) ** 0.5
-            t = b0 + 2 * y1 * m
-            c = (g * a / t) ** 0.5
-            v = q / a
-            fr = froude(y1, q, n, b0, m)
-            alpha, kappa = alpha_kappa(a, t, p, m, fr, sb)
-            gamma = calculate_gamma(t, kappa, sb, fr, sxu, v, m)
-        elif shape == 1:
-            alpha, a, p, t, c, v = CircularChannelData(y1, b0, q)
-            fr = froudeC(y1, q, n, b0, m)
-            alpha, kappa = alpha_kappa(a, t, p, m, fr, sb)
-            gamma = calculate_gamma(t, kappa, sb, fr, sxu, v, 0)
+        a, p, t, dpdy, dtdy, c, v, fr = _flow_state(
+            SectionState(y1, q, n, b0, m, shape)
+        )
+        alpha, kappa = alpha_kappa_section(a, t, p, dpdy, fr, sb)
+        gamma = calculate_gamma_section(t, kappa, sb, fr, sxu, v, dtdy)
 
         # Low frequencies
         x = x1
@@ -494,27 +738,11 @@ def IdzFun(q, n, B, m, Sb, Y0, L, shape):
         p22_inf = calculate_p22_inf(t, c, v, fr, alpha, gamma, x)
 
     # Part 3 ----Downstream part------------------------------------------------
-    if shape == 0:
-        a = b0 * y2 + m * y2**2
-        p = b0 + 2 * y2 * (1 + m**2) ** 0.5
-        # r = a / p
-        t = b0 + 2 * y2 * m
-        c = (g * a / t) ** 0.5
-        v = q / a
-        fr = v / c
-
-        sxd = (sb - sf0(yx, q, n, b0, m)) / (1 - (froude(yx, q, n, b0, m)) ** 2)
-    elif shape == 1:
-        m = 0
-        alpha, a, p, t, c, v = CircularChannelData(y1, b0, q)
-        fr = froudeC(y1, q, n, b0, m)
-        alpha, kappa = alpha_kappa(a, t, p, m, fr, sb)
-        sxd = (sb - sf0(yx, q, n, b0, m)) / (1 - (froude(yx, q, n, b0, m)) ** 2)
-
-    dtdy = 2 * m
+    a, p, t, dpdy, dtdy, c, v, fr = _flow_state(SectionState(y2, q, n, b0, m, shape))
+    sxd = sxx
 
     x = L - x1
-    kappa = alpha_kappa(a, t, p, m, fr, sb)[1]
+    kappa = alpha_kappa_section(a, t, p, dpdy, fr, sb)[1]
     alpha = (
         t
         / (a * fr * (1 - fr**2))
@@ -524,7 +752,7 @@ def IdzFun(q, n, B, m, Sb, Y0, L, shape):
         )
     )
 
-    gamma = calculate_gamma(t, kappa, sb, fr, sxd, v, m)
+    gamma = calculate_gamma_section(t, kappa, sb, fr, sxd, v, dtdy)
 
     # Low frequencies
     td_ = x / (c + v)
@@ -578,8 +806,1368 @@ def IdzFun(q, n, B, m, Sb, Y0, L, shape):
     )
 
 
+def _evaluate_by_shape(shape, functions, *args):
+    """
+    Evaluate shape-specific functions on the entries of array arguments.
+
+    Parameters
+    ----------
+    shape : np.ndarray of int
+        Channel shape identifier of each entry.
+    functions : dict[int, callable]
+        Function of each shape, taking the (masked) arrays in ``args`` and
+        returning a tuple of arrays of the same length, e.g. ``SECTION_KERNELS``.
+    *args : np.ndarray
+        Arrays with the same shape as ``shape``.
+
+    Returns
+    -------
+    results : tuple of np.ndarray
+        The outputs of the functions merged back into full-size arrays.
+    """
+    first = int(shape.flat[0]) if shape.size else next(iter(functions))
+    if not shape.size or (shape == first).all():
+        return functions[first](*args)
+
+    results = None
+    codes = np.unique(shape)
+    for code in codes:
+        mask = shape == code
+        values = functions[code](*(arg[mask] for arg in args))
+        if results is None:
+            results = tuple(np.empty(shape.shape) for _ in values)
+        for result, value in zip(results, values):
+            result[mask] = value
+    return results
+
+
+def normal_depth_vectorized(
+    q, n, b0, m, sb, yx, shape, method="bisection", tol=1e-12, max_iter=50
+):
+    """
+    Compute the normal flow depth of many channels at once.
+
+    This is the array counterpart of :func:`normal_depth`.
+
+    With ``method="bisection"`` the same 25 bisection iterations on
+    ``[0, 5 * yx]``, capped for circular channels, are performed for all
+    channels simultaneously, so the results are identical to the scalar
+    function.
+
+    With ``method="newton"`` Manning's equation is solved in conveyance form,
+
+        ln(A R^(2/3)) = ln(q n / sqrt(sb)),
+
+    using the derivatives of the area and wetted perimeter of the cross
+    section given by its kernel in ``SECTION_KERNELS``. The root is first bracketed: the upper bound ``5 * yx`` is doubled
+    until it lies above the normal depth. Newton steps that leave the bracket are
+    replaced by bisection steps, and each channel stops iterating once its
+    relative update is below ``tol``.
+
+    Parameters
+    ----------
+    q, n, b0, m, sb, yx : array_like of float
+        Discharge, Manning coefficient, bottom width or radius, side slope,
+        bed slope and reference depth of each channel, see :func:`normal_depth`.
+    shape : array_like of int
+        Channel shape identifier of each channel, see ``SECTION_SHAPES``.
+    method : str, default="bisection"
+        ``"bisection"`` or ``"newton"``.
+    tol : float, default=1e-12
+        Relative tolerance on the depth. Only used by the Newton solver.
+    max_iter : int, default=50
+        Maximum number of Newton iterations and of bracket expansions. Only used
+        by the Newton solver.
+
+    Returns
+    -------
+    yn : np.ndarray
+        Normal flow depth of each channel [m]. With the Newton solver, channels
+        without discharge get a depth of zero, and channels with a bed slope
+        that is not positive get an infinite depth.
+
+    Raises
+    ------
+    ValueError
+        If the Newton solver cannot bracket the normal depth, e.g. when the
+        discharge exceeds the capacity of a circular channel, or does not
+        converge within ``max_iter`` iterations.
+    """
+    q, n, b0, m, sb, yx = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (q, n, b0, m, sb, yx))
+    )
+    shape = _check_shapes(shape, q.shape)
+
+    if method == "newton":
+        return _normal_depth_newton(q, n, b0, m, sb, yx, shape, tol, max_iter)
+    elif method != "bisection":
+        raise ValueError(f"Unknown normal depth method {method}.")
+
+    y1 = np.zeros(q.shape)
+    y2 = np.minimum(yx * 5, _max_normal_depth(shape, b0))
+    for k in range(25):
+        y = (y1 + y2) / 2
+        a, p = _evaluate_by_shape(shape, SECTION_KERNELS, y, b0, m)[:2]
+        dif = _friction_slope(q, n, a, p) - sb
+        y2 = np.where(dif < 0, y, y2)
+        y1 = np.where(dif < 0, y1, y)
+
+    return y
+
+
+def _log_conveyance(shape, y, b0, m):
+    """
+    Logarithm of the conveyance A R^(2/3) of cross sections and its derivative
+    with respect to the depth.
+    """
+    a, p, t, dpdy, _ = _evaluate_by_shape(shape, SECTION_KERNELS, y, b0, m)
+    f = 5 / 3 * np.log(a) - 2 / 3 * np.log(p)
+    dfdy = 5 / 3 * t / a - 2 / 3 * dpdy / p
+    return f, dfdy
+
+
+def _normal_depth_newton(q, n, b0, m, sb, yx, shape, tol, max_iter):
+    yn = np.empty(q.shape)
+    yn[q == 0] = 0.0
+    yn[(q != 0) & (sb <= 0)] = np.inf
+    active = (q != 0) & (sb > 0)
+    if not active.any():
+        return yn
+
+    idx = np.flatnonzero(active)
+    q, n, b0, m, sb, yx, shape = (
+        np.ravel(x)[idx] for x in (q, n, b0, m, sb, yx, shape)
+    )
+    target = np.log(q * n / np.sqrt(sb))
+
+    def residual(y, k):
+        f, dfdy = _log_conveyance(shape[k], y, b0[k], m[k])
+        return f - target[k], dfdy
+
+    # Bracket the root. The residual tends to -inf for y -> 0, so only the
+    # upper bound needs to be expanded.
+    y_cap = _max_normal_depth(shape, b0)
+    lower = np.zeros(q.shape)
+    upper = np.where(yx > 0, 5 * yx, 1.0)
+    upper = np.minimum(upper, y_cap)
+    bracketed = np.zeros(q.shape, dtype=bool)
+    for _ in range(max_iter):
+        k = np.flatnonzero(~bracketed)
+        if len(k) == 0:
+            break
+        f, _ = residual(upper[k], k)
+        found = f >= 0
+        bracketed[k[found]] = True
+        k = k[~found]
+        if np.any(upper[k] >= y_cap[k]):
+            raise ValueError(
+                "Cannot compute the normal depth: the discharge exceeds the "
+                "capacity of the circular channel."
+            )
+        lower[k] = upper[k]
+        upper[k] = np.minimum(2 * upper[k], y_cap[k])
+    if not bracketed.all():
+        raise ValueError(
+            "Cannot compute the normal depth: no upper bound found after "
+            f"{max_iter} bracket expansions."
+        )
+
+    # Safeguarded Newton iterations
+    y = np.where((yx > lower) & (yx < upper), yx, (lower + upper) / 2)
+    converged = np.zeros(q.shape, dtype=bool)
+    for _ in range(max_iter):
+        k = np.flatnonzero(~converged)
+        if len(k) == 0:
+            break
+        f, dfdy = residual(y[k], k)
+        lower[k] = np.where(f < 0, y[k], lower[k])
+        upper[k] = np.where(f > 0, y[k], upper[k])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            y_new = y[k] - f / dfdy
+        outside = ~((y_new > lower[k]) & (y_new < upper[k]))
+        y_new = np.where(outside, (lower[k] + upper[k]) / 2, y_new)
+        converged[k] = (f == 0) | (np.abs(y_new - y[k]) <= tol * np.abs(y_new))
+        y[k] = np.where(f == 0, y[k], y_new)
+    if not converged.all():
+        raise ValueError(
+            f"Normal depth did not converge within {max_iter} Newton iterations."
+        )
+
+    yn.flat[idx] = y
+    return yn
+
+
+def _flow_state(state):
+    """
+    Unpack the variables of a :class:`SectionState` used by the IDZ
+    computations.
+    """
+    return (
+        state.area,
+        state.perimeter,
+        state.top_width,
+        state.dperimeter_dy,
+        state.dtop_width_dy,
+        state.celerity,
+        state.velocity,
+        state.froude,
+    )
+
+
+def _idz_vectorized(q, n, B, m, Sb, Y0, L, shape, normal_depth_method):
+    """
+    Core of :func:`IdzFunVectorized`.
+
+    Returns a dictionary with the outputs of :func:`IdzFun`, keyed ``p11``,
+    ``p12``, ``p21``, ``p22``, ``au``, ``ad``, ``tu``, ``td``, ``yn`` and
+    ``x2``, together with the intermediate variables of the computation: the
+    start ``x1`` of the backwater section, the depths ``y1`` at the start and
+    ``y2`` in the middle of the backwater section, the water surface slope
+    ``sxx`` at the downstream end, the Froude numbers ``fr_uniform`` and
+    ``fr_backwater`` of both sections (NaN for channels without uniform
+    section) and the mask ``backwater_only``.
+    """
+    q, n, b0, m, sb, yx, L = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (q, n, B, m, Sb, Y0, L))
+    )
+    shape = _check_shapes(shape, q.shape)
+
+    yn = normal_depth_vectorized(q, n, b0, m, sb, yx, shape, method=normal_depth_method)
+
+    # Water surface slope at downstream end
+    state = SectionState(yx, q, n, b0, m, shape)
+    sxx = (sb - state.friction_slope) / (1 - state.froude**2)
+
+    # Location of transition point
+    x1 = np.fmax(0, L - (yx - yn) / sxx)
+    backwater_only = x1 == 0
+    y1 = np.where(backwater_only, yx - sxx * L, yn)
+    x2 = (L + x1) / 2
+    y2 = np.where(backwater_only, yx - (L - x2) * sxx, yn + (x2 - x1) * sxx)
+
+    # Upstream section, only for channels with a uniform flow region
+    upstream = ~backwater_only
+    td, tu, ad, au, p11_inf, p12_inf, p21_inf, p22_inf, fr_uniform = (
+        np.full(q.shape, np.nan) for _ in range(9)
+    )
+    if upstream.any():
+        sb_u = sb[upstream]
+        a, p, t, dpdy, dtdy, c, v, fr = _flow_state(
+            SectionState(
+                *(x[upstream] for x in (y1, q, n, b0, m)), shape=shape[upstream]
+            )
+        )
+        alpha, kappa = alpha_kappa_section(a, t, p, dpdy, fr, sb_u)
+        gamma = calculate_gamma_section(t, kappa, sb_u, fr, 0, v, dtdy)
+        x = x1[upstream]
+        fr_uniform[upstream] = fr
+        td[upstream] = x / (c + v)
+        tu[upstream] = x / (c - v)
+        ad[upstream] = backwater_area_downstream_direction(t, c, v, gamma, x)
+        au[upstream] = backwater_area_upstream_direction(t, c, v, gamma, x)
+        p11_inf[upstream] = calculate_p11_inf(t, c, v, fr, alpha, gamma, x)
+        p12_inf[upstream] = calculate_p12_inf(t, c, v, fr, alpha, gamma, x)
+        p21_inf[upstream] = calculate_p21_inf(t, c, v, fr, alpha, gamma, x)
+        p22_inf[upstream] = calculate_p22_inf(t, c, v, fr, alpha, gamma, x)
+
+    # Downstream section. The water surface slope is the one at the
+    # downstream end.
+    a, p, t, dpdy, dtdy, c, v, fr = _flow_state(SectionState(y2, q, n, b0, m, shape))
+    sxd = sxx
+
+    x = L - x1
+    kappa = alpha_kappa_section(a, t, p, dpdy, fr, sb)[1]
+    alpha = (
+        t
+        / (a * fr * (1 - fr**2))
+        * (
+            (2 + (kappa - 1) * fr**2) * sb
+            - (2 + (kappa - 1) * fr**2 - (a / t**2 * dtdy + kappa - 2) * fr**4) * sxx
+        )
+    )
+
+    gamma = calculate_gamma_section(t, kappa, sb, fr, sxd, v, dtdy)
+
+    td_ = x / (c + v)
+    tu_ = x / (c - v)
+
+    ad_ = backwater_area_downstream_direction(t, c, v, gamma, x)
+    au_ = backwater_area_upstream_direction(t, c, v, gamma, x)
+
+    p11_inf_ = calculate_p11_inf(t, c, v, fr, alpha, gamma, x)
+    p12_inf_ = calculate_p12_inf(t, c, v, fr, alpha, gamma, x)
+    p21_inf_ = calculate_p21_inf(t, c, v, fr, alpha, gamma, x)
+    p22_inf_ = calculate_p22_inf(t, c, v, fr, alpha, gamma, x)
+
+    # Global model. Channels with only a backwater part take the downstream
+    # section values, the others combine both sections.
+    td_hat = np.where(backwater_only, td_, td + td_)
+    tu_hat = np.where(backwater_only, tu_, tu + tu_)
+
+    ad_hat = np.where(backwater_only, ad_, ad_ * (1 + (ad / au_)))
+    au_hat = np.where(backwater_only, au_, au * (1 + (au_ / ad)))
+
+    p11_inf_hat = np.where(
+        backwater_only, p11_inf_, p11_inf + (p12_inf * p21_inf) / (p11_inf_ + p22_inf)
+    )
+    p12_inf_hat = np.where(
+        backwater_only, p12_inf_, (p12_inf * p12_inf_) / (p11_inf_ + p22_inf)
+    )
+    p21_inf_hat = np.where(
+        backwater_only, p21_inf_, (p21_inf * p21_inf_) / (p11_inf_ + p22_inf)
+    )
+    p22_inf_hat = np.where(
+        backwater_only,
+        p22_inf_,
+        p22_inf_ + (p12_inf_ * p21_inf_) / (p11_inf_ + p22_inf),
+    )
+
+    return {
+        "p11": p11_inf_hat,
+        "p12": p12_inf_hat,
+        "p21": p21_inf_hat,
+        "p22": p22_inf_hat,
+        "au": au_hat,
+        "ad": ad_hat,
+        "tu": tu_hat,
+        "td": td_hat,
+        "yn": yn,
+        "x2": x2,
+        "x1": x1,
+        "y1": y1,
+        "y2": y2,
+        "sxx": sxx,
+        "fr_uniform": fr_uniform,
+        "fr_backwater": fr,
+        "backwater_only": backwater_only,
+    }
+
+
+def IdzFunVectorized(q, n, B, m, Sb, Y0, L, shape, normal_depth_method="bisection"):
+    """
+    Compute the IDZ parameters of many channels at once.
+
+    This is the array counterpart of :func:`IdzFun`. All inputs are broadcast
+    against each other, so each may be a scalar or an array with one entry per
+    channel. The branching of :func:`IdzFun` on the channel shape and on the
+    presence of a uniform flow region (``x1 == 0``) is replaced by masks, and
+    the results are identical to calling :func:`IdzFun` channel by channel.
+
+    Parameters
+    ----------
+    q, n, B, m, Sb, Y0, L : array_like of float
+        Discharge, Manning coefficient, bottom width or radius, side slope,
+        bed slope, downstream water depth and length of each channel, see
+        :func:`IdzFun`.
+    shape : array_like of int
+        Channel geometry identifier of each channel, see ``SECTION_SHAPES``.
+    normal_depth_method : str, default="bisection"
+        Solver used for the normal depth, see :func:`normal_depth_vectorized`.
+
+    Returns
+    -------
+    p11, p12, p21, p22, au, ad, tu, td, yn, x2 : np.ndarray
+        The outputs of :func:`IdzFun`, one entry per channel.
+    """
+    values = _idz_vectorized(q, n, B, m, Sb, Y0, L, shape, normal_depth_method)
+    return tuple(
+        values[name]
+        for name in ("p11", "p12", "p21", "p22", "au", "ad", "tu", "td", "yn", "x2")
+    )
+
+
+# Output parameters of the IDZ block
+IDZ_PARAMETERS = ("p11", "p12", "p21", "p22", "Au", "Ad", "Delay_in_hour")
+
+
+def idz_variables_batch(
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    side_slope,
+    friction_coefficient,
+    normal_depth_method="bisection",
+    keep_intermediates=False,
+    shape=0,
+):
+    """
+    Compute the IDZ block parameters for many branches at once.
+
+    This is the array counterpart of :meth:`GetIDZVariables.getVariables`. Every
+    argument is a 1-D array with one entry per branch, and all branches are
+    evaluated in a single call to :func:`IdzFunVectorized`.
+
+    Parameters
+    ----------
+    length, h_b_up, h_b_down, q_nominal, width, y_nominal, side_slope, \
+    friction_coefficient : array_like of float
+        Branch geometry and nominal flow, see :class:`GetIDZVariables`.
+    normal_depth_method : str, default="bisection"
+        Solver used for the normal depth, see :func:`normal_depth_vectorized`.
+    keep_intermediates : bool, default=False
+        If True, also return the upstream and downstream delays ``tu`` and
+        ``td``, the normal depth ``yn`` and the length ``x2`` of the
+        downstream section.
+    shape : array_like of int, default=0
+        Channel shape identifier of each branch, see ``SECTION_SHAPES``. For
+        circular branches, ``width`` is the radius and ``side_slope`` is not
+        used.
+
+    Returns
+    -------
+    values : dict[str, np.ndarray]
+        Arrays keyed by the parameter names of the Modelica block, see
+        ``IDZ_PARAMETERS``.
+    """
+    idz = _idz_branches(
+        length,
+        h_b_up,
+        h_b_down,
+        q_nominal,
+        width,
+        y_nominal,
+        side_slope,
+        friction_coefficient,
+        normal_depth_method,
+        shape,
+    )
+
+    values = {
+        "p11": idz["p11"],
+        "p12": idz["p12"],
+        "p21": idz["p21"],
+        "p22": idz["p22"],
+        "Au": idz["au"],
+        "Ad": idz["ad"],
+        "Delay_in_hour": (idz["tu"] + idz["td"]) / 2,
+    }
+    if keep_intermediates:
+        values.update({name: idz[name] for name in ("tu", "td", "yn", "x2")})
+    return values
+
+
+def _idz_branches(
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    side_slope,
+    friction_coefficient,
+    normal_depth_method,
+    shape,
+):
+    """
+    Evaluate :func:`_idz_vectorized` for branches described by the inputs of the
+    IDZ block.
+    """
+    length = np.asarray(length, dtype=float)
+    h_b_down = np.asarray(h_b_down, dtype=float)
+    Sb = (np.asarray(h_b_up, dtype=float) - h_b_down) / length
+    Y0 = np.asarray(y_nominal, dtype=float) - h_b_down
+    return _idz_vectorized(
+        q_nominal,
+        friction_coefficient,
+        width,
+        side_slope,
+        Sb,
+        Y0,
+        length,
+        shape,
+        normal_depth_method,
+    )
+
+
+# Flow regimes of an IDZ branch in the diagnostics
+IDZ_REGIME_BACKWATER = 0
+IDZ_REGIME_UNIFORM_BACKWATER = 1
+
+# Fields of the IDZ diagnostics, see idz_diagnostics_batch
+IDZ_DIAGNOSTICS_FIELDS = (
+    ("yn", "f8"),
+    ("x1", "f8"),
+    ("x2", "f8"),
+    ("y1", "f8"),
+    ("y2", "f8"),
+    ("surface_slope", "f8"),
+    ("froude_uniform", "f8"),
+    ("froude_backwater", "f8"),
+    ("regime", "i1"),
+    ("tu", "f8"),
+    ("td", "f8"),
+)
+
+
+def idz_diagnostics_batch(
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    side_slope,
+    friction_coefficient,
+    normal_depth_method="bisection",
+    shape=0,
+    branches=None,
+):
+    """
+    Compute diagnostics of the IDZ computation for many branches at once.
+
+    The arguments are the same as for :func:`idz_variables_batch`. Instead of the
+    block parameters, the intermediate results that determine them are returned,
+    to find badly conditioned branches, e.g. with a Froude number close to one,
+    a normal depth far above the nominal depth or a very short backwater
+    section.
+
+    Parameters
+    ----------
+    branches : list of str, optional
+        Names of the branches. If given, they are included as the first field,
+        ``branch``, of the result.
+
+    Returns
+    -------
+    diagnostics : np.ndarray
+        Structured array with one row per branch and the fields:
+
+        - ``yn``: normal depth [m].
+        - ``x1``: length of the uniform flow section, where the backwater
+          section starts [m].
+        - ``x2``: location of the middle of the backwater section [m].
+        - ``y1``, ``y2``: water depth at the start and in the middle of the
+          backwater section [m].
+        - ``surface_slope``: slope of the water surface relative to the bed at
+          the downstream end [-].
+        - ``froude_uniform``: Froude number of the uniform flow section, NaN if
+          there is none [-].
+        - ``froude_backwater``: Froude number of the backwater section [-].
+        - ``regime``: ``IDZ_REGIME_BACKWATER`` if the whole branch is in
+          backwater, ``IDZ_REGIME_UNIFORM_BACKWATER`` if it has a uniform flow
+          section upstream of the backwater section.
+        - ``tu``, ``td``: upstream and downstream wave travel times [s].
+
+    See Also
+    --------
+    save_idz_diagnostics : Write the diagnostics to a file.
+    """
+    idz = _idz_branches(
+        length,
+        h_b_up,
+        h_b_down,
+        q_nominal,
+        width,
+        y_nominal,
+        side_slope,
+        friction_coefficient,
+        normal_depth_method,
+        shape,
+    )
+    columns = {
+        "yn": idz["yn"],
+        "x1": idz["x1"],
+        "x2": idz["x2"],
+        "y1": idz["y1"],
+        "y2": idz["y2"],
+        "surface_slope": idz["sxx"],
+        "froude_uniform": idz["fr_uniform"],
+        "froude_backwater": idz["fr_backwater"],
+        "regime": np.where(
+            idz["backwater_only"], IDZ_REGIME_BACKWATER, IDZ_REGIME_UNIFORM_BACKWATER
+        ),
+        "tu": idz["tu"],
+        "td": idz["td"],
+    }
+    fields = list(IDZ_DIAGNOSTICS_FIELDS)
+    if branches is not None:
+        branches = np.asarray(branches, dtype=str)
+        if len(branches) != len(idz["yn"]):
+            raise ValueError(
+                f"Got {len(branches)} branch names for {len(idz['yn'])} branches."
+            )
+        fields.insert(0, ("branch", branches.dtype))
+        columns["branch"] = branches
+
+    diagnostics = np.empty(len(idz["yn"]), dtype=fields)
+    for name, values in columns.items():
+        diagnostics[name] = values
+    return diagnostics
+
+
+def save_idz_diagnostics(path, diagnostics):
+    """
+    Write IDZ diagnostics to a file.
+
+    The format follows from the extension of the path: ``.csv`` writes a text
+    file with a header row and one row per branch, ``.npz`` writes a numpy
+    archive with one array per field, which can be loaded column by column with
+    ``np.load``.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        Path of the file.
+    diagnostics : np.ndarray
+        Structured array, see :func:`idz_diagnostics_batch`.
+    """
+    path = str(path)
+    names = diagnostics.dtype.names
+    if path.endswith(".npz"):
+        np.savez(path, **{name: diagnostics[name] for name in names})
+    elif path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(zip(*(diagnostics[name].tolist() for name in names)))
+    else:
+        raise ValueError(
+            f"Cannot write IDZ diagnostics to {path}: use a .csv or .npz file."
+        )
+
+
+def idz_discrete_delay(delay, step, fractional=True):
+    """
+    Convert IDZ delays to shifts on an equidistant time grid.
+
+    The flow delayed by ``delay`` at time index ``i`` is approximated by
+    ``(1 - weight) * Q[i - shift] + weight * Q[i - shift - 1]``, i.e. by linear
+    interpolation between the two time steps around the delayed time. Delays
+    within round-off of a whole number of time steps get a weight of zero.
+
+    Parameters
+    ----------
+    delay : float or array_like of float
+        Delay of each branch [s], e.g. the ``Delay_in_hour`` parameters.
+    step : float
+        Time step of the optimization time grid [s].
+    fractional : bool, default=True
+        If False, the delays are rounded to the nearest whole number of time
+        steps and all weights are zero.
+
+    Returns
+    -------
+    shift : np.ndarray of int
+        Whole number of time steps of each delay.
+    weight : np.ndarray of float
+        Fraction of a time step by which each delay exceeds ``shift``, in
+        [0, 1).
+    """
+    delay = np.asarray(delay, dtype=float)
+    if not (np.isfinite(step) and step > 0):
+        raise ValueError(f"Time step must be positive, got {step}.")
+    if not np.all(np.isfinite(delay) & (delay >= 0)):
+        raise ValueError("Delays must be finite and non-negative.")
+
+    steps = delay / step
+    nearest = np.rint(steps)
+    if fractional:
+        whole = np.isclose(steps, nearest, rtol=0.0, atol=1e-9)
+        shift = np.where(whole, nearest, np.floor(steps))
+        weight = np.where(whole, 0.0, steps - shift)
+    else:
+        shift = nearest
+        weight = np.zeros_like(steps)
+    return shift.astype(int), weight
+
+
+def linearised_sv_variables(
+    n_level_nodes,
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    y_nominal_down,
+    friction_coefficient,
+):
+    """
+    Compute the steady-state and linearized Saint-Venant variables of a
+    rectangular reach with whole-array NumPy operations.
+
+    This is the array-based counterpart of :meth:`GetLinearSVVariables.getVariables`.
+    The staggered H- and Q-point quantities are evaluated with slicing instead of
+    per-node loops, and the results agree with the list-based implementation up
+    to round-off.
+
+    All inputs except ``n_level_nodes`` may also be 1-D arrays of equal length,
+    one entry per branch. The branches are then computed together and every
+    output gets a leading branch axis. All branches share the same
+    ``n_level_nodes``; see :func:`linearised_sv_variables_batch` for branches
+    with different node counts.
+
+    Parameters
+    ----------
+    n_level_nodes : int
+        Number of water level (H) nodes along the channel, including both ends.
+    length : float or np.ndarray
+        Channel reach length [m].
+    h_b_up : float or np.ndarray
+        Upstream bed elevation [m].
+    h_b_down : float or np.ndarray
+        Downstream bed elevation [m].
+    q_nominal : float or np.ndarray
+        Nominal discharge [m³/s].
+    width : float or np.ndarray
+        Channel top width [m].
+    y_nominal : float or np.ndarray
+        Nominal upstream flow depth [m].
+    y_nominal_down : float or np.ndarray
+        Nominal downstream flow depth [m].
+    friction_coefficient : float or np.ndarray
+        Manning friction coefficient [-].
+
+    Returns
+    -------
+    variables : dict[str, np.ndarray]
+        Arrays keyed by the attribute names used by :class:`GetLinearSVVariables`:
+        ``q0``, ``t0``, ``y0``, ``a0``, ``p0``, ``r``, ``v0``, ``sf``, ``c0``,
+        ``f0``, ``dydx``, ``delta``, ``kappa``, ``f2`` and ``gamma``.
+    """
+    n = n_level_nodes
+    length = np.asarray(length, dtype=float)[..., None]
+    q_nominal = np.asarray(q_nominal, dtype=float)[..., None]
+    h_b_up = np.asarray(h_b_up, dtype=float)[..., None]
+    h_b_down = np.asarray(h_b_down, dtype=float)[..., None]
+    s_b = (h_b_up - h_b_down) / length
+    g_n = 9.80665
+    dx = length / (n - 1)
+    friction_2 = np.asarray(friction_coefficient, dtype=float)[..., None] ** 2
+
+    # Same as np.linspace(y_nominal_down, y_nominal, n), but evaluated per
+    # branch: linspace switches formulas for the whole batch when any of the
+    # steps is zero, which would make the results depend on the batch.
+    y_nominal, y_nominal_down = np.broadcast_arrays(
+        np.asarray(y_nominal, dtype=float), np.asarray(y_nominal_down, dtype=float)
+    )
+    y0 = np.arange(n) * ((y_nominal - y_nominal_down) / (n - 1))[..., None]
+    y0 += y_nominal_down[..., None]
+    y0[..., -1] = y_nominal
+    shape = y0.shape[:-1]
+    q0 = np.broadcast_to(q_nominal, shape + (n + 1,))
+    t0 = np.broadcast_to(np.asarray(width, dtype=float)[..., None], shape + (n,))
+    a0 = t0 * y0
+    p0 = t0 + 2 * y0
+    r = a0 / p0
+
+    # Discharge, area and hydraulic radius at the H points (even staggered
+    # indices) and at the interior Q points (odd staggered indices)
+    q_h = np.empty(shape + (n,))
+    q_h[..., 0] = q0[..., 0]
+    q_h[..., 1:-1] = (q0[..., 2:-1] + q0[..., 1:-2]) / 2
+    q_h[..., -1] = q0[..., n]
+    q_q = q0[..., 1:-1]
+    a_q = (a0[..., :-1] + a0[..., 1:]) / 2
+    r_q = (r[..., :-1] + r[..., 1:]) / 2
+
+    v0 = np.empty(shape + (2 * n - 1,))
+    v0[..., 0::2] = q_h / a0
+    v0[..., 1::2] = q_q / a_q
+
+    sf = np.empty(shape + (2 * n - 1,))
+    sf[..., 0::2] = (q_h**2 * friction_2) / (a0**2 * r ** (4 / 3))
+    sf[..., 1::2] = (q_q**2 * friction_2) / (a_q**2 * r_q ** (4 / 3))
+
+    c0 = np.empty(shape + (n + 1,))
+    c0[..., 0] = np.sqrt(g_n * y0[..., 0])
+    c0[..., 1:-1] = np.sqrt(g_n * (y0[..., :-1] + y0[..., 1:]) / 2)
+    c0[..., n] = np.sqrt(g_n * y0[..., n - 1])
+
+    f0 = np.empty(shape + (2 * n - 1,))
+    f0[..., 0] = v0[..., 0] / c0[..., 0]
+    f0[..., 1::2] = v0[..., 1::2] / c0[..., 1:-1]
+    # Interior H points use the velocity of the Q point just upstream
+    f0[..., 2:-1:2] = v0[..., 1:-2:2] / ((c0[..., 2:-1] + c0[..., 1:-2]) / 2)
+    f0[..., -1] = v0[..., -1] / c0[..., n]
+
+    dydx = (s_b - sf) / (1 - f0**2)
+
+    v_delta = np.concatenate((v0[..., :1], v0[..., 1::2], v0[..., -1:]), axis=-1)
+    dydx_delta = np.concatenate(
+        (dydx[..., :1], dydx[..., 1::2], dydx[..., -1:]), axis=-1
+    )
+    # Branches without nominal flow get a zero delta to avoid dividing by v0 = 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = (2 * g_n / v_delta) * (s_b - dydx_delta)
+    delta = np.where(q_nominal == 0, 0.0, delta)
+
+    # The factor 2 is the value of the PDE because of rectangular shape
+    kappa = 7 / 3 - ((4 * a0) / (3 * t0 * p0)) * 2
+
+    v_h = v0[..., 0::2]
+    f2 = (v_h**2 * t0) / (g_n * a0)
+
+    dtdx = np.empty(shape + (n,))
+    dtdx[..., 0] = (t0[..., 1] - t0[..., 0]) / dx[..., 0]
+    dtdx[..., 1:-1] = (t0[..., 2:] - t0[..., :-2]) / (2 * dx)
+    dtdx[..., -1] = (t0[..., n - 1] - t0[..., n - 2]) / dx[..., 0]
+    gamma = v_h**2 * dtdx + g_n * t0 * (
+        (1 + kappa) * s_b - (1 + kappa - (kappa - 2) * f2) * dydx[..., 0::2]
+    )
+
+    return {
+        "q0": np.array(q0),
+        "t0": np.array(t0),
+        "y0": y0,
+        "a0": a0,
+        "p0": p0,
+        "r": r,
+        "v0": v0,
+        "sf": sf,
+        "c0": c0,
+        "f0": f0,
+        "dydx": dydx,
+        "delta": delta,
+        "kappa": kappa,
+        "f2": f2,
+        "gamma": gamma,
+    }
+
+
+def linearised_sv_uniform(y_nominal, y_nominal_down):
+    """
+    Determine which reaches can use the uniform-depth fast path of
+    :func:`linearised_sv_variables_uniform`.
+
+    The LinearisedSV reaches are rectangular with a constant width and a
+    linear nominal depth profile. If the upstream and downstream nominal depths
+    are equal, all nodes share the same nominal state.
+
+    Parameters
+    ----------
+    y_nominal, y_nominal_down : float or np.ndarray
+        Nominal upstream and downstream flow depths [m].
+
+    Returns
+    -------
+    uniform : np.ndarray of bool
+        True for the reaches with a uniform nominal depth.
+    """
+    return np.asarray(y_nominal, dtype=float) == np.asarray(y_nominal_down, dtype=float)
+
+
+def linearised_sv_variables_uniform(
+    n_level_nodes,
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    friction_coefficient,
+):
+    """
+    Closed-form counterpart of :func:`linearised_sv_variables` for reaches with
+    a uniform nominal depth.
+
+    With a constant width, depth and discharge, the nominal state is the same
+    at every node, so each variable is evaluated once per reach and broadcast
+    over the nodes. The expressions are those of the general path evaluated in
+    the same order, and the results are identical to it.
+
+    Parameters
+    ----------
+    n_level_nodes : int
+        Number of water level (H) nodes along the channel, including both ends.
+    length, h_b_up, h_b_down, q_nominal, width, y_nominal, \
+    friction_coefficient : float or np.ndarray
+        Branch geometry, nominal flow and uniform nominal depth, see
+        :func:`linearised_sv_variables`.
+
+    Returns
+    -------
+    variables : dict[str, np.ndarray]
+        The same arrays as :func:`linearised_sv_variables`, as read-only
+        broadcast views.
+    """
+    n = n_level_nodes
+    g_n = 9.80665
+    length = np.asarray(length, dtype=float)[..., None]
+    q = np.asarray(q_nominal, dtype=float)[..., None]
+    s_b = (
+        np.asarray(h_b_up, dtype=float)[..., None]
+        - np.asarray(h_b_down, dtype=float)[..., None]
+    ) / length
+    friction_2 = np.asarray(friction_coefficient, dtype=float)[..., None] ** 2
+    t = np.asarray(width, dtype=float)[..., None]
+    y = np.asarray(y_nominal, dtype=float)[..., None]
+
+    a = t * y
+    p = t + 2 * y
+    r = a / p
+    v = q / a
+    sf = (q**2 * friction_2) / (a**2 * r ** (4 / 3))
+    c = np.sqrt(g_n * y)
+    f = v / c
+    dydx = (s_b - sf) / (1 - f**2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = (2 * g_n / v) * (s_b - dydx)
+    delta = np.where(q == 0, 0.0, delta)
+    kappa = 7 / 3 - ((4 * a) / (3 * t * p)) * 2
+    f2 = (v**2 * t) / (g_n * a)
+    gamma = g_n * t * ((1 + kappa) * s_b - (1 + kappa - (kappa - 2) * f2) * dydx)
+
+    shape = np.broadcast_shapes(
+        length.shape, q.shape, s_b.shape, friction_2.shape, t.shape, y.shape
+    )[:-1]
+    sizes = {"h": n, "q": n + 1, "s": 2 * n - 1}
+    variables = {
+        "q0": (q, "q"),
+        "t0": (t, "h"),
+        "y0": (y, "h"),
+        "a0": (a, "h"),
+        "p0": (p, "h"),
+        "r": (r, "h"),
+        "v0": (v, "s"),
+        "sf": (sf, "s"),
+        "c0": (c, "q"),
+        "f0": (f, "s"),
+        "dydx": (dydx, "s"),
+        "delta": (delta, "q"),
+        "kappa": (kappa, "h"),
+        "f2": (f2, "h"),
+        "gamma": (gamma, "h"),
+    }
+    return {
+        name: np.broadcast_to(value, shape + (sizes[grid],))
+        for name, (value, grid) in variables.items()
+    }
+
+
+def _linearised_sv_groups(n_level_nodes, inputs):
+    """
+    Evaluate branches grouped by node count and by path.
+
+    Yields the number of nodes, whether the uniform-depth fast path was used,
+    the indices of the branches in the group, and their variables.
+    """
+    uniform = linearised_sv_uniform(inputs["y_nominal"], inputs["y_nominal_down"])
+    for n in np.unique(n_level_nodes):
+        for fast in (False, True):
+            branches = np.flatnonzero((n_level_nodes == n) & (uniform == fast))
+            if len(branches) == 0:
+                continue
+            group = {name: value[branches] for name, value in inputs.items()}
+            if fast:
+                del group["y_nominal_down"]
+                variables = linearised_sv_variables_uniform(
+                    n_level_nodes=int(n), **group
+                )
+            else:
+                variables = linearised_sv_variables(n_level_nodes=int(n), **group)
+            yield int(n), fast, branches, variables
+
+
+# Output parameters of the LinearisedSV block, with the staggered grid they
+# live on: "h" has n_level_nodes entries, "q" has n_level_nodes + 1 entries and
+# "s" has 2 * n_level_nodes - 1 entries.
+LINEARISED_SV_PARAMETERS = {
+    "T0": ("t0", "h"),
+    "V0": ("v0", "s"),
+    "Delta": ("delta", "q"),
+    "Gamma": ("gamma", "h"),
+    "C0": ("c0", "q"),
+}
+
+
+def linearised_sv_offsets(n_level_nodes):
+    """
+    Compute the offsets of each branch in the flat (ragged) output arrays of
+    :func:`linearised_sv_variables_batch`.
+
+    Parameters
+    ----------
+    n_level_nodes : array_like of int
+        Number of water level nodes of each branch.
+
+    Returns
+    -------
+    offsets : dict[str, np.ndarray]
+        For each staggered grid (``"h"``, ``"q"`` and ``"s"``) an integer array
+        of length ``n_branches + 1``. The values of branch ``i`` are found at
+        ``offsets[grid][i]:offsets[grid][i + 1]``.
+    """
+    n_level_nodes = np.asarray(n_level_nodes, dtype=int)
+    sizes = {
+        "h": n_level_nodes,
+        "q": n_level_nodes + 1,
+        "s": 2 * n_level_nodes - 1,
+    }
+    offsets = {}
+    for grid, size in sizes.items():
+        offsets[grid] = np.zeros(len(n_level_nodes) + 1, dtype=int)
+        np.cumsum(size, out=offsets[grid][1:])
+    return offsets
+
+
+def linearised_sv_variables_batch(
+    n_level_nodes,
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    y_nominal_down,
+    friction_coefficient,
+):
+    """
+    Compute the LinearisedSV parameters ``T0``, ``V0``, ``Delta``, ``Gamma`` and
+    ``C0`` for many branches at once.
+
+    Every argument is a 1-D array with one entry per branch. Branches may have
+    different node counts: they are grouped by ``n_level_nodes``, each group is
+    computed with a single call to :func:`linearised_sv_variables`, and the
+    results are scattered into flat ragged arrays. Branches with a uniform
+    nominal depth use the fast path :func:`linearised_sv_variables_uniform`,
+    see :func:`linearised_sv_uniform`.
+
+    Parameters
+    ----------
+    n_level_nodes : array_like of int
+        Number of water level (H) nodes of each branch.
+    length, h_b_up, h_b_down, q_nominal, width, y_nominal, y_nominal_down, \
+    friction_coefficient : array_like of float
+        Branch geometry and nominal flow, see :func:`linearised_sv_variables`.
+
+    Returns
+    -------
+    values : dict[str, np.ndarray]
+        Flat arrays keyed by the parameter names of the Modelica block.
+    offsets : dict[str, np.ndarray]
+        Offsets into the arrays of ``values``, keyed by the same names. The
+        values of branch ``i`` for parameter ``name`` are
+        ``values[name][offsets[name][i]:offsets[name][i + 1]]``.
+    """
+    n_level_nodes = np.asarray(n_level_nodes, dtype=int)
+    inputs = {
+        "length": length,
+        "h_b_up": h_b_up,
+        "h_b_down": h_b_down,
+        "q_nominal": q_nominal,
+        "width": width,
+        "y_nominal": y_nominal,
+        "y_nominal_down": y_nominal_down,
+        "friction_coefficient": friction_coefficient,
+    }
+    inputs = {name: np.asarray(value, dtype=float) for name, value in inputs.items()}
+
+    grid_offsets = linearised_sv_offsets(n_level_nodes)
+    offsets = {
+        name: grid_offsets[grid] for name, (_, grid) in LINEARISED_SV_PARAMETERS.items()
+    }
+    values = {
+        name: np.empty(offsets[name][-1]) for name in LINEARISED_SV_PARAMETERS.keys()
+    }
+
+    for _, _, branches, variables in _linearised_sv_groups(n_level_nodes, inputs):
+        for name, (variable, _) in LINEARISED_SV_PARAMETERS.items():
+            result = variables[variable]
+            # Flat positions of the group's entries in the ragged array
+            index = offsets[name][branches][:, None] + np.arange(result.shape[-1])
+            values[name][index] = result
+
+    return values, offsets
+
+
+# The LinearisedSV model has separate momentum equations for the first and last
+# interior flows, and a loop over the flows in between that must not be empty
+LINEARISED_SV_MIN_LEVEL_NODES = 4
+
+
+def linearised_sv_states(n_level_nodes):
+    """
+    Number of states of a LinearisedSV branch: the flows in between the
+    boundaries and the cross sections at the level nodes.
+
+    Parameters
+    ----------
+    n_level_nodes : int or array_like of int
+        Number of water level nodes of each branch.
+
+    Returns
+    -------
+    states : int or np.ndarray of int
+    """
+    return 2 * np.asarray(n_level_nodes) - 1
+
+
+def linearised_sv_node_counts(
+    n_level_nodes,
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    y_nominal_down,
+    friction_coefficient,
+    time_step,
+    period=None,
+    points_per_wavelength=8.0,
+    max_courant=2.0,
+):
+    """
+    Select the smallest number of level nodes of each LinearisedSV branch that
+    resolves the waves the optimization time grid can represent.
+
+    The branches are linearized with their current node counts, and two
+    criteria are evaluated with the celerities ``C0`` and velocities ``V0``:
+
+    - Wave number: a wave with period ``period`` has a wavelength of
+      ``(C0 - |V0|) * period`` along the slowest characteristic. The node
+      spacing ``dx`` is chosen such that this wavelength spans at least
+      ``points_per_wavelength`` nodes, i.e. ``k * dx <= 2 * pi /
+      points_per_wavelength``.
+    - Courant: the spacing is not refined below the distance that the fastest
+      wave, ``C0 + |V0|``, travels in ``time_step / max_courant``, as the time
+      discretization then limits the accuracy.
+
+    Parameters
+    ----------
+    n_level_nodes : array_like of int
+        Current number of water level nodes of each branch.
+    length, h_b_up, h_b_down, q_nominal, width, y_nominal, y_nominal_down, \
+    friction_coefficient : array_like of float
+        Branch geometry and nominal flow, see :func:`linearised_sv_variables`.
+    time_step : float
+        Time step of the optimization time grid [s].
+    period : float, optional
+        Shortest wave period to resolve [s]. Defaults to
+        ``points_per_wavelength * time_step``, the shortest period that the time
+        grid resolves with as many points.
+    points_per_wavelength : float, default=8.0
+        Minimum number of nodes per wavelength.
+    max_courant : float, default=2.0
+        Maximum Courant number ``(C0 + |V0|) * time_step / dx``. The implicit
+        time discretization is accurate up to Courant numbers of a few.
+
+    Returns
+    -------
+    n_level_nodes : np.ndarray of int
+        Selected number of level nodes of each branch, at least
+        ``LINEARISED_SV_MIN_LEVEL_NODES``. This can exceed the current number of
+        nodes if the current grid is too coarse for the wave-number criterion.
+    """
+    if not (np.isfinite(time_step) and time_step > 0):
+        raise ValueError(f"Time step must be positive, got {time_step}.")
+    if period is None:
+        period = points_per_wavelength * time_step
+    if not (period > 0 and points_per_wavelength > 0 and max_courant > 0):
+        raise ValueError(
+            "The period, points per wavelength and maximum Courant number must be "
+            "positive."
+        )
+
+    n_level_nodes = np.asarray(n_level_nodes, dtype=int)
+    length = np.asarray(length, dtype=float)
+    values, offsets = linearised_sv_variables_batch(
+        n_level_nodes,
+        length,
+        h_b_up,
+        h_b_down,
+        q_nominal,
+        width,
+        y_nominal,
+        y_nominal_down,
+        friction_coefficient,
+    )
+    # Extreme celerities and speeds of each branch over its nodes
+    c0_min = np.minimum.reduceat(values["C0"], offsets["C0"][:-1])
+    c0_max = np.maximum.reduceat(values["C0"], offsets["C0"][:-1])
+    v0_max = np.maximum.reduceat(np.abs(values["V0"]), offsets["V0"][:-1])
+
+    dx_wave = np.abs(c0_min - v0_max) * period / points_per_wavelength
+    dx_courant = (c0_max + v0_max) * time_step / max_courant
+    # The wave number sets the minimum number of intervals, the Courant number
+    # caps it
+    intervals = np.minimum(
+        np.ceil(length / dx_wave - 1e-9), np.floor(length / dx_courant + 1e-9)
+    )
+    counts = intervals.astype(int) + 1
+    return np.maximum(counts, LINEARISED_SV_MIN_LEVEL_NODES)
+
+
+class LinearSVResult:
+    """
+    Compact LinearisedSV coefficients of a single branch.
+
+    The coefficients ``T0``, ``V0``, ``Delta``, ``Gamma`` and ``C0`` are float64
+    views into one contiguous array. The intermediate variables of the
+    computation are only kept, in ``intermediates``, if requested.
+
+    Items can be accessed by name, e.g. ``result["T0"]``.
+    """
+
+    __slots__ = tuple(LINEARISED_SV_PARAMETERS.keys()) + ("intermediates",)
+
+    def __init__(self, T0, V0, Delta, Gamma, C0, intermediates=None):
+        self.T0 = T0
+        self.V0 = V0
+        self.Delta = Delta
+        self.Gamma = Gamma
+        self.C0 = C0
+        self.intermediates = intermediates
+
+    @classmethod
+    def from_array(cls, data, n_level_nodes, intermediates=None):
+        """
+        Create a result from the concatenated coefficients, in the order of
+        ``LINEARISED_SV_PARAMETERS``.
+        """
+        sizes = {"h": n_level_nodes, "q": n_level_nodes + 1, "s": 2 * n_level_nodes - 1}
+        bounds = np.cumsum(
+            [0] + [sizes[grid] for _, grid in LINEARISED_SV_PARAMETERS.values()]
+        )
+        return cls(
+            *(data[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])),
+            intermediates=intermediates,
+        )
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def items(self):
+        return ((name, getattr(self, name)) for name in LINEARISED_SV_PARAMETERS)
+
+
+class IDZResult:
+    """
+    Compact IDZ parameters of a single branch.
+
+    The parameters ``p11``, ``p12``, ``p21``, ``p22``, ``Au``, ``Ad`` and
+    ``Delay_in_hour`` are floats. The intermediate variables of the computation
+    are only kept, in ``intermediates``, if requested.
+
+    Items can be accessed by name, e.g. ``result["p11"]``.
+    """
+
+    __slots__ = IDZ_PARAMETERS + ("intermediates",)
+
+    def __init__(self, p11, p12, p21, p22, Au, Ad, Delay_in_hour, intermediates=None):
+        self.p11 = p11
+        self.p12 = p12
+        self.p21 = p21
+        self.p22 = p22
+        self.Au = Au
+        self.Ad = Ad
+        self.Delay_in_hour = Delay_in_hour
+        self.intermediates = intermediates
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def items(self):
+        return ((name, getattr(self, name)) for name in IDZ_PARAMETERS)
+
+
+def linearised_sv_results(
+    n_level_nodes,
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    y_nominal_down,
+    friction_coefficient,
+    keep_intermediates=False,
+):
+    """
+    Compute the LinearisedSV coefficients of many branches as compact
+    per-branch results.
+
+    The arguments are the same as for :func:`linearised_sv_variables_batch`,
+    and the coefficients are identical. The coefficients of the branches with
+    the same ``n_level_nodes`` share one contiguous array, and all other
+    variables are released unless ``keep_intermediates`` is True.
+
+    Returns
+    -------
+    results : list[LinearSVResult]
+        The result of each branch.
+    """
+    n_level_nodes = np.asarray(n_level_nodes, dtype=int)
+    inputs = {
+        "length": length,
+        "h_b_up": h_b_up,
+        "h_b_down": h_b_down,
+        "q_nominal": q_nominal,
+        "width": width,
+        "y_nominal": y_nominal,
+        "y_nominal_down": y_nominal_down,
+        "friction_coefficient": friction_coefficient,
+    }
+    inputs = {name: np.asarray(value, dtype=float) for name, value in inputs.items()}
+
+    results = [None] * len(n_level_nodes)
+    for n, _, branches, variables in _linearised_sv_groups(n_level_nodes, inputs):
+        data = np.concatenate(
+            [variables[variable] for variable, _ in LINEARISED_SV_PARAMETERS.values()],
+            axis=-1,
+        )
+        for row, i in enumerate(branches):
+            intermediates = None
+            if keep_intermediates:
+                intermediates = {name: value[row] for name, value in variables.items()}
+            results[i] = LinearSVResult.from_array(data[row], n, intermediates)
+
+    return results
+
+
+def idz_results(
+    length,
+    h_b_up,
+    h_b_down,
+    q_nominal,
+    width,
+    y_nominal,
+    side_slope,
+    friction_coefficient,
+    normal_depth_method="bisection",
+    keep_intermediates=False,
+    shape=0,
+):
+    """
+    Compute the IDZ parameters of many branches as compact per-branch results.
+
+    The arguments are the same as for :func:`idz_variables_batch`, and the
+    parameters are identical. The intermediate variables ``tu``, ``td``,
+    ``yn`` and ``x2`` are only kept if ``keep_intermediates`` is True.
+
+    Returns
+    -------
+    results : list[IDZResult]
+        The result of each branch.
+    """
+    values = idz_variables_batch(
+        length,
+        h_b_up,
+        h_b_down,
+        q_nominal,
+        width,
+        y_nominal,
+        side_slope,
+        friction_coefficient,
+        normal_depth_method=normal_depth_method,
+        keep_intermediates=keep_intermediates,
+        shape=shape,
+    )
+    rows = zip(*(values[name].tolist() for name in IDZ_PARAMETERS))
+    if not keep_intermediates:
+        return [IDZResult(*row) for row in rows]
+    intermediates = zip(*(values[name].tolist() for name in ("tu", "td", "yn", "x2")))
+    return [
+        IDZResult(*row, intermediates=dict(zip(("tu", "td", "yn", "x2"), extra)))
+        for row, extra in zip(rows, intermediates)
+    ]
+
+
 class GetLinearSVVariables:
-    
     """
     Pre-compute steady-state and linearized shallow-water (Saint-Venant) variables
     for a 1D open-channel flow in a rectangular cross-section.
@@ -625,7 +2213,6 @@ class GetLinearSVVariables:
         y_nominal_down=0,
         friction_coefficient=0,
     ):
-        
         """
         Initialize channel and nominal-flow parameters.
 
@@ -668,11 +2255,17 @@ class GetLinearSVVariables:
         self.y_nominal_down = y_nominal_down
         self.friction_coefficient = friction_coefficient
 
-    def getVariables(self):
-        
+    def getVariables(self, vectorized=False):
         """
         Compute and store all derived steady/linearized arrays in-place.
 
+        Parameters
+        ----------
+        vectorized : bool, default=False
+            If True, the arrays are computed with :func:`linearised_sv_variables`
+            and stored as ``np.ndarray``. Otherwise the per-node reference
+            implementation below is used, which stores Python lists.
+
         After calling this method, the following attributes are created:
 
         Geometry / base fields
@@ -711,7 +2304,7 @@ class GetLinearSVVariables:
         Linearization auxiliaries
         -------------------------
         delta : list[float], length n_level_nodes + 1
-            Array used in linearized momentum relations, coefficient of the 
+            Array used in linearized momentum relations, coefficient of the
             discharge term; set to zeros if
             `q_nominal == 0` to avoid division by zero, otherwise computed from
             `v0`, `s_b`, and `dydx`.
@@ -734,8 +2327,8 @@ class GetLinearSVVariables:
         - This function does not return a value; it populates instance attributes.
         - If `q_nominal == 0`, `delta` is set to a zero array (to prevent division
           by zero in `v0` terms).
-        - The detailed description of this linearization of the Saint-Venant equations 
-          can be found in Litrico, X., & Fromion, V. (2009). Modeling and control of 
+        - The detailed description of this linearization of the Saint-Venant equations
+          can be found in Litrico, X., & Fromion, V. (2009). Modeling and control of
           hydrosystems. London: Springer London.
 
         Raises
@@ -745,6 +2338,22 @@ class GetLinearSVVariables:
             Ensure inputs are physically meaningful before calling.
         """
 
+        if vectorized:
+            variables = linearised_sv_variables(
+                n_level_nodes=self.n_level_nodes,
+                length=self.length,
+                h_b_up=self.h_b_up,
+                h_b_down=self.h_b_down,
+                q_nominal=self.q_nominal,
+                width=self.width,
+                y_nominal=self.y_nominal,
+                y_nominal_down=self.y_nominal_down,
+                friction_coefficient=self.friction_coefficient,
+            )
+            for name, value in variables.items():
+                setattr(self, name, value)
+            return
+
         s_b = (self.h_b_up - self.h_b_down) / self.length
         g_n = 9.80665
         dx = self.length / (self.n_level_nodes - 1)
@@ -828,7 +2437,7 @@ class GetLinearSVVariables:
 
         # Calculate self.deltas
         self.delta = [None] * (self.n_level_nodes + 1)
-        if self.q_nominal ==0:
+        if self.q_nominal == 0:
             self.delta = [0.0] * (self.n_level_nodes + 1)
         else:
             self.delta[0] = (2 * g_n / self.v0[0]) * (s_b - self.dydx[0])
@@ -886,9 +2495,50 @@ class GetLinearSVVariables:
             * self.dydx[2 * self.n_level_nodes - 2]
         )
 
+    def result(self, keep_intermediates=False):
+        """
+        Return the coefficients computed by :meth:`getVariables` as a compact
+        :class:`LinearSVResult`, which holds only ``T0``, ``V0``, ``Delta``,
+        ``Gamma`` and ``C0`` as float64 arrays.
+
+        Parameters
+        ----------
+        keep_intermediates : bool, default=False
+            If True, the other variables are kept in the ``intermediates``
+            dictionary of the result.
+        """
+        data = np.concatenate(
+            [
+                np.asarray(getattr(self, variable), dtype=float)
+                for variable, _ in LINEARISED_SV_PARAMETERS.values()
+            ]
+        )
+        intermediates = None
+        if keep_intermediates:
+            intermediates = {
+                name: getattr(self, name)
+                for name in (
+                    "q0",
+                    "t0",
+                    "y0",
+                    "a0",
+                    "p0",
+                    "r",
+                    "v0",
+                    "sf",
+                    "c0",
+                    "f0",
+                    "dydx",
+                    "delta",
+                    "kappa",
+                    "f2",
+                    "gamma",
+                )
+            }
+        return LinearSVResult.from_array(data, self.n_level_nodes, intermediates)
+
 
 class GetIDZVariables:
-    
     """
     Compute IDZ (Integrator Delay Zero) model variables for a 1D open‑channel flow
     segment, based on nominal discharge, geometry, slope, and friction.
@@ -901,7 +2551,8 @@ class GetIDZVariables:
         - Travel times: tu_hat, td_hat
         - Additional geometric outputs: yn, x2 (not stored here)
 
-    The class stores the key IDZ coefficients and mean delay time.
+    The class stores the key IDZ coefficients and the mean delay time
+    ``Delay_in_hour``, which, despite its name, is in seconds.
 
     **Intended use**
     ----------------
@@ -918,6 +2569,8 @@ class GetIDZVariables:
     - The computation relies on the function `IdzFun`, which must be available
       in the current namespace.
     - This class stores only a subset of the results produced by `IdzFun`.
+    - For circular channels (``shape=1``), ``width`` is the radius and
+      ``side_slope`` is not used.
     """
 
     def __init__(
@@ -930,6 +2583,7 @@ class GetIDZVariables:
         y_nominal=0,
         side_slope=0,
         friction_coefficient=0,
+        shape=0,
     ):
         self.length = length
         self.h_b_up = h_b_up
@@ -939,6 +2593,7 @@ class GetIDZVariables:
         self.y_nominal = y_nominal
         self.side_slope = side_slope
         self.friction_coefficient = friction_coefficient
+        self.shape = shape
 
     def getVariables(self):
         # s_b = (self.h_b_up - self.h_b_down) / self.length
@@ -961,7 +2616,7 @@ class GetIDZVariables:
             td_hat,
             yn,
             x2,
-        ) = IdzFun(q, n, B, m, Sb, Y0, L, 0)
+        ) = IdzFun(q, n, B, m, Sb, Y0, L, self.shape)
 
         self.Delay_in_hour = (tu_hat + td_hat) / 2
         self.p11 = p11_inf_hat
@@ -971,4 +2626,27 @@ class GetIDZVariables:
         self.p21 = p21_inf_hat
         self.p22 = p22_inf_hat
 
+    def result(self):
+        """
+        Return the parameters computed by :meth:`getVariables` as a compact
+        :class:`IDZResult`.
+        """
+        return IDZResult(*(float(getattr(self, name)) for name in IDZ_PARAMETERS))
 
+    def diagnostics(self, normal_depth_method="bisection"):
+        """
+        Return the diagnostics of the IDZ computation of this branch as a
+        structured array with a single row, see :func:`idz_diagnostics_batch`.
+        """
+        return idz_diagnostics_batch(
+            [self.length],
+            [self.h_b_up],
+            [self.h_b_down],
+            [self.q_nominal],
+            [self.width],
+            [self.y_nominal],
+            [self.side_slope],
+            [self.friction_coefficient],
+            normal_depth_method=normal_depth_method,
+            shape=self.shape,
+        )
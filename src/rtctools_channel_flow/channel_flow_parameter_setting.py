@@ -1,26 +1,180 @@
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from rtctools_channel_flow.branch_geometry import (
+    IDZ_CIRCULAR_COLUMNS,
+    IDZ_COLUMNS,
+    LINEARISED_SV_COLUMNS,
+    BranchGeometryTable,
+)
 from rtctools_channel_flow.calculate_parameters import (
-    GetLinearSVVariables,
-    GetIDZVariables,
+    IDZ_PARAMETERS,
+    LINEARISED_SV_PARAMETERS,
+    SECTION_SHAPES,
+    IDZResult,
+    LinearSVResult,
+    idz_diagnostics_batch,
+    idz_results,
+    linearised_sv_node_counts,
+    linearised_sv_results,
+    linearised_sv_states,
+    linearised_sv_uniform,
+)
+from rtctools_channel_flow.delay_table import DelayTable
+from rtctools_channel_flow.parameter_cache import (
+    ParameterCache,
+    PersistentParameterCache,
 )
 
-from functools import lru_cache
+from functools import lru_cache, partial
+
+import numpy as np
 
 logger = logging.getLogger("rtctools")
 
+# Default size of the parameter cache, relative to the branch inputs per computation
+_PARAMETER_CACHE_SIZE_FACTOR = 4
+
+# Result type of each block, to rebuild the entries of the persistent cache
+_RESULT_TYPES = {"LinearisedSV": LinearSVResult, "IDZ": IDZResult}
+
 
 @lru_cache(None)
 def inform_once(logger, msg):
     logger.info(msg)
 
 
+class _PhaseTimer:
+    """
+    Context manager recording the wall time and cache use of a phase of the
+    parameter computations.
+    """
+
+    __slots__ = ("profile", "phase", "n_branches", "cache", "start", "hits", "misses")
+
+    def __init__(self, profile, phase, n_branches, cache):
+        self.profile = profile
+        self.phase = phase
+        self.n_branches = n_branches
+        self.cache = cache
+
+    def __enter__(self):
+        self.hits = self.cache.hits
+        self.misses = self.cache.misses
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        hits = self.cache.hits - self.hits
+        misses = self.cache.misses - self.misses
+        record = self.profile.setdefault(
+            self.phase,
+            {
+                "calls": 0,
+                "time": 0.0,
+                "branches": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
+            },
+        )
+        record["calls"] += 1
+        record["time"] += elapsed
+        record["branches"] += self.n_branches
+        record["cache_hits"] += hits
+        record["cache_misses"] += misses
+        logger.info(
+            f"Channel flow phase {self.phase} took {elapsed:.6f} s for "
+            f"{self.n_branches} branches",
+            extra={
+                "channel_flow_phase": {
+                    "phase": self.phase,
+                    "time": elapsed,
+                    "branches": self.n_branches,
+                    "cache_hits": hits,
+                    "cache_misses": misses,
+                }
+            },
+        )
+
+
+_NO_PROFILING = nullcontext()
+
+
+def _linear_sv_branch_parameters(inputs, keep_intermediates=False):
+    return linearised_sv_results(**inputs, keep_intermediates=keep_intermediates)
+
+
+@lru_cache(None)
+def _linear_sv_parameter_keys(channel, n_level_nodes):
+    """
+    Names of the LinearisedSV coefficients of a branch, in the order of
+    ``LINEARISED_SV_PARAMETERS`` and node index.
+    """
+    sizes = {"h": n_level_nodes, "q": n_level_nodes + 1, "s": 2 * n_level_nodes - 1}
+    return tuple(
+        channel + "." + name + "[" + str(j + 1) + "]"
+        for name, (_, grid) in LINEARISED_SV_PARAMETERS.items()
+        for j in range(sizes[grid])
+    )
+
+
+@lru_cache(None)
+def _idz_parameter_keys(channel):
+    """
+    Names of the IDZ parameters of a branch, in the order of ``IDZ_PARAMETERS``.
+    """
+    return tuple(channel + "." + name for name in IDZ_PARAMETERS)
+
+
+def _lateral_map(connections, n_level_nodes):
+    """
+    Dense inflow map of a branch from its node and weight lists.
+
+    :param connections: List with, for each inflow, a list of ``(node, weight)``
+                        pairs. Nodes are numbered from 1, as in Modelica. The
+                        weights of repeated nodes are added.
+    :param n_level_nodes: Number of level nodes of the branch.
+    :return: Array with a row per inflow and a column per level node.
+    """
+    rows = [i for i, entries in enumerate(connections) for _ in entries]
+    nodes = np.array(
+        [node for entries in connections for node, _ in entries], dtype=int
+    )
+    weights = np.array(
+        [weight for entries in connections for _, weight in entries], dtype=float
+    )
+    if np.any((nodes < 1) | (nodes > n_level_nodes)):
+        raise ValueError(
+            f"Lateral map nodes should be between 1 and {n_level_nodes}, got "
+            f"{sorted(set(nodes[(nodes < 1) | (nodes > n_level_nodes)].tolist()))}."
+        )
+    if not np.all(np.isfinite(weights)):
+        raise ValueError("Lateral map weights should be finite.")
+    lateral_map = np.zeros((len(connections), n_level_nodes))
+    np.add.at(lateral_map, (rows, nodes - 1), weights)
+    return lateral_map
+
+
+def _idz_branch_parameters(inputs, normal_depth_method, keep_intermediates=False):
+    return idz_results(
+        **inputs,
+        normal_depth_method=normal_depth_method,
+        keep_intermediates=keep_intermediates,
+    )
+
+
 class ChannelFlowParameterSettingOpimizationMixin:
     """
     Sets parameters for channel flow blocks using in optimization mode.
 
     Supported blocks:
     Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSV
+    Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSVTimeVarying
     Deltares.ChannelFlow.Hydraulic.Branches.IDZ
+    Deltares.ChannelFlow.Hydraulic.Branches.IDZCircular
+    Deltares.ChannelFlow.Hydraulic.Branches.IDZDiscreteDelay
 
     :cvar linearised_sv: True if LinearisedSV branch is used.
                         Default is ``None``.
@@ -38,6 +192,8 @@ class ChannelFlowParameterSettingOpimizationMixin:
             key: "H_b_up" or "H_b_down":
             value: nominal water depths. Can be a fixed value or a timeseries.
                 These are the values around which the linearization is done.
+                They replace the ``H_nominal`` and ``H_nominal_down`` parameters
+                of the branch, respectively.
                 Possible types:
 
                 - fixed value: float
@@ -53,6 +209,15 @@ class ChannelFlowParameterSettingOpimizationMixin:
                     Note that the value at the start of the optimization run will be
                     used as the nominal flow.
 
+        Branches or keys that are not in the dictionary keep the nominal values
+        of the model.
+
+        Branches whose upstream and downstream nominal depths are exactly equal
+        are linearized with a faster uniform-depth computation. The test is an
+        exact floating point comparison of ``H_nominal`` and ``H_nominal_down``
+        after the dynamic nominals are applied, so depths that differ only by
+        round-off use the general computation. Both computations give the same
+        coefficients up to round-off.
 
         example:
             {my_branch_name: {
@@ -60,12 +225,27 @@ class ChannelFlowParameterSettingOpimizationMixin:
                 "H_b_down": "H_nominal_down_timeseries",
                 "Q_nominal": "Q_nominal_timeseries_name"
             }}
-        :cvar idz: True if IDZ branch is used.
+    :cvar linearised_sv_time_varying: True if the LinearisedSV coefficients
+        ``T0``, ``V0``, ``Delta``, ``Gamma`` and ``C0`` should follow the nominal
+        values over the whole optimization horizon, instead of being fixed at
+        the start of the run. The coefficients are then fixed to timeseries
+        through the bounds, and the branches should use the block
+        ``Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSVTimeVarying``.
+        Timeseries in ``linearised_sv_nominal_levels`` are interpolated at
+        every time step. The dynamic nominals are not written to the
+        ``H_nominal``, ``H_nominal_down`` and ``Q_nominal`` parameters, which
+        remain the reference values of the relative states.
+        Default is ``False``.
+
+    :cvar idz: True if IDZ branch is used.
         Default is ``None``.
 
     :cvar idz_branches: List of IDZ branches to set parameters for.
         Each entry should be the full Modelica path to an
-        ``Deltares.ChannelFlow.Hydraulic.Branches.IDZ`` block.
+        ``Deltares.ChannelFlow.Hydraulic.Branches.IDZ``,
+        ``Deltares.ChannelFlow.Hydraulic.Branches.IDZCircular`` or
+        ``Deltares.ChannelFlow.Hydraulic.Branches.IDZDiscreteDelay`` block.
+        Branches with a ``radius`` parameter are treated as circular.
         Default is ``None``.
 
     :cvar idz_use_dynamic_nominals: True if dynamic nominal water depths
@@ -97,22 +277,202 @@ class ChannelFlowParameterSettingOpimizationMixin:
                     "H_nominal": 2.0
                 }
             }
+
+    :cvar idz_normal_depth_method: Solver used for the normal depth of IDZ
+        branches: ``"bisection"`` (25 fixed bisection steps) or ``"newton"``
+        (safeguarded Newton iterations converging to machine precision).
+        Default is ``"bisection"``.
+
+    :cvar idz_discrete_delay_branches: List of IDZ branches that use the block
+        ``Deltares.ChannelFlow.Hydraulic.Branches.IDZDiscreteDelay``. Instead
+        of with ``delay()``, their delayed flows are related to ``HQUp.Q`` and
+        ``HQDown.Q`` by constraints that shift these by a fixed number of time
+        steps, see :meth:`idz_delay_table`.
+        The delayed flows are then plain references to other time steps, which
+        keeps the collocation problem small for long horizons. This requires an
+        equidistant time grid. Before the start of the horizon, the flows are
+        assumed to equal their initial values. The branches must also be in
+        ``idz_branches``.
+        Default is ``None``.
+
+    :cvar idz_discrete_delay_fractional: True if the delays of the
+        ``idz_discrete_delay_branches`` should be interpolated linearly between
+        two time steps. If False, they are rounded to the nearest whole number of
+        time steps.
+        Default is ``True``.
+
+    :cvar channel_flow_parameter_cache: True if computed branch parameters should
+        be cached in memory, keyed on the numeric inputs of each branch. Ensemble
+        members, or repeated calls, with identical branch inputs then reuse the
+        computed values. Use :meth:`channel_flow_parameter_cache_info` to inspect
+        the number of hits and misses.
+        Default is ``True``.
+
+    :cvar channel_flow_parameter_cache_size: Maximum number of branches kept in
+        the parameter cache. The least recently used entries are evicted first.
+        If ``None``, the cache keeps four times the number of branch inputs of the
+        latest computation of each block. This bounds the cache when the inputs
+        change between calls, e.g. with dynamic nominals.
+        Default is ``None``.
+
+    :cvar channel_flow_persistent_cache: True if computed branch parameters should
+        also be stored in an SQLite file, so that new processes running the same
+        network can skip the hydraulic computations. Entries are keyed on a hash
+        of the branch inputs and the library version.
+        Default is ``False``.
+
+    :cvar channel_flow_persistent_cache_path: Path of the SQLite file of the
+        persistent cache. Required if ``channel_flow_persistent_cache`` is True.
+        Default is ``None``.
+
+    :cvar channel_flow_persistent_cache_max_entries: Maximum number of branches
+        kept in the persistent cache. The least recently used entries are
+        evicted first.
+        Default is ``100000``.
+
+    :cvar channel_flow_parameter_workers: Number of worker processes used to
+        compute branch parameters. The branches that are not served from the
+        caches are split into chunks, which are computed in a process pool and
+        merged back in branch order. The results are bit-identical to the serial
+        computation. The pool is created on first use and shut down in
+        :meth:`post`. ``None`` or ``1`` computes serially in the main process.
+        Default is ``None``.
+
+    :cvar channel_flow_parameter_chunk_size: Number of branches per chunk sent
+        to a worker process. If no more branches than this need to be computed,
+        they are computed in the main process.
+        Default is ``500``.
+
+    :cvar channel_flow_precompute_ensemble: True if the parameters of all
+        ensemble members should be computed at once in :meth:`pre`, see
+        :meth:`precompute_channel_flow_parameters`. Calls to :meth:`parameters`
+        then only read the precomputed values.
+        Default is ``False``.
+
+    :cvar channel_flow_keep_intermediates: True if the intermediate variables
+        of the hydraulic computations, such as velocities, Froude numbers and
+        normal depths, should be kept for debugging. They are available from
+        :meth:`channel_flow_branch_results`. By default, only the parameters of
+        the blocks are kept, as compact per-branch results. The persistent
+        cache is not used while intermediates are kept.
+        Default is ``False``.
+
+    :cvar channel_flow_profiling: Instrumentation of the parameter computations.
+        If True, the wall time, number of branches and cache hits and misses of
+        every phase (reading the inputs, computing and writing the parameters of
+        each block, setting the dynamic nominals) are recorded. If
+        ``"branches"``, the distinct branches that need computing are also
+        computed and timed one by one, to find the slowest reaches. This gives
+        the same results, but without the speed of the batch computations. The
+        records are available from :meth:`channel_flow_profile`, and every phase
+        is logged with the structured record in the ``channel_flow_phase``
+        attribute of the log record. If False, nothing is recorded.
+        Default is ``False``.
+
+    :cvar channel_flow_lateral_maps: dict
+        Sparse description of the ``QForcing_map`` and ``QLateral_map``
+        parameters of LinearisedSV, LinearisedSVTimeVarying and homotopic
+        branches. The default maps distribute every inflow uniformly over all
+        level nodes, which couples every inflow to every node. With this option,
+        each inflow is only connected to the nodes it feeds. The maps are
+        written as dense parameters with zeros elsewhere, and the zero entries
+        drop out of the model once rtctools substitutes the parameter values,
+        so the model and its Jacobian grow with the number of connections.
+
+        key: branch name,
+            key: "QForcing" or "QLateral":
+            value: list with, for each QForcing or QLateral of the branch, a
+                list of ``(node, weight)`` pairs. Nodes are numbered from 1 to
+                ``n_level_nodes``. To preserve mass, the weights of an inflow
+                should sum to 1.0.
+
+        Branches or keys that are not in the dictionary keep the maps of the
+        model.
+
+        example:
+            {my_branch_name: {
+                "QForcing": [[(1, 1.0)], [(3, 0.5), (4, 0.5)]],
+                "QLateral": [[(10, 1.0)]]
+            }}
+        Default is ``None``.
     """
 
     linearised_sv = None
     linearised_sv_branches = None
     linearised_sv_use_dynamic_nominals = False
     linearised_sv_nominal_levels = None
+    linearised_sv_time_varying = False
     idz = None
     idz_branches = None
     idz_use_dynamic_nominals = False
+    idz_nominal_levels = None
+    idz_normal_depth_method = "bisection"
+    idz_discrete_delay_branches = None
+    idz_discrete_delay_fractional = True
+    channel_flow_parameter_cache = True
+    channel_flow_parameter_cache_size = None
+    channel_flow_persistent_cache = False
+    channel_flow_persistent_cache_path = None
+    channel_flow_persistent_cache_max_entries = 100000
+    channel_flow_parameter_workers = None
+    channel_flow_parameter_chunk_size = 500
+    channel_flow_precompute_ensemble = False
+    channel_flow_keep_intermediates = False
+    channel_flow_profiling = False
+    channel_flow_lateral_maps = None
+
+    def __init__(self, *args, **kwargs):
+        self.__parameter_cache = ParameterCache(
+            max_entries=self.channel_flow_parameter_cache_size
+        )
+        self.__parameter_cache_batch_sizes = {}
+        self.__persistent_parameter_cache = None
+        self.__previous_results = {}
+        self.__key_tables = {}
+        self.__geometry_tables = {}
+        self.__idz_shapes = None
+        self.__delay_tables = {}
+        self.__branch_results = {}
+        self.__profile_phases = {}
+        self.__profile_branches = {}
+        self.__executor = None
+        self.__precomputed_parameters = {}
+        self.__lateral_map_parameters = {}
+        super().__init__(*args, **kwargs)
 
     def parameters(self, ensemble_member):
         """
         Set the parameters for the channel flow blocks.
+
+        If the parameters have been precomputed with
+        :meth:`precompute_channel_flow_parameters`, they are only read from the
+        table of the ensemble member.
         """
         p = super().parameters(ensemble_member)
+        if self.channel_flow_lateral_maps:
+            p = self.set_lateral_maps(p)
+
+        table = self.__precomputed_parameters.get(ensemble_member)
+        if table is not None:
+            p.update(table)
+            return p
+
+        with self.__phase("nominals"):
+            p = self.__set_channel_flow_nominals(p, ensemble_member)
+        if self.linearised_sv and not self.linearised_sv_time_varying:
+            p = self.set_linear_sv_parameters(p=p)
+        if self.idz:
+            p = self.set_idz_parameters(p=p)
+        return p
 
+    def __set_channel_flow_nominals(self, p, ensemble_member):
+        """
+        Check the branch lists and set the dynamic nominals, if enabled.
+
+        :param p: The parameters of the model.
+        :param ensemble_member: The ensemble member index.
+        :return: Updated parameters with the dynamic nominals.
+        """
         if self.linearised_sv:
             # check if linearised_sv_branches is set
             if self.linearised_sv_branches is None:
@@ -120,8 +480,12 @@ class ChannelFlowParameterSettingOpimizationMixin:
                     "List of linearised_sv_branches is not provided while linearised_sv "
                     "is True. Cannot set parameters for LinearisedSV block."
                 )
-            p = self.set_linear_sv_parameters(p=p)
-            if self.linearised_sv_use_dynamic_nominals:
+            # Time-varying coefficients are set through bounds(), around the
+            # nominals of each time step, and the nominal parameters are kept.
+            if (
+                self.linearised_sv_use_dynamic_nominals
+                and not self.linearised_sv_time_varying
+            ):
                 # check if linearised_sv_nominal_levels is set
                 if self.linearised_sv_nominal_levels is None:
                     raise ValueError(
@@ -129,7 +493,9 @@ class ChannelFlowParameterSettingOpimizationMixin:
                         "while linearised_sv_use_dynamic_nominals is True. Cannot set "
                         "dynamic nominal water depths for LinearisedSV block."
                     )
-                p = self.set_linear_sv_dynamic_nominal(p=p)
+                p = self.set_linear_sv_dynamic_nominal(
+                    p=p, ensemble_member=ensemble_member
+                )
 
         if self.idz:
             if self.idz_branches is None:
@@ -137,16 +503,126 @@ class ChannelFlowParameterSettingOpimizationMixin:
                     "List of idz is not provided while idz "
                     "is True. Cannot set parameters for IDZ block."
                 )
-            p = self.set_idz_parameters(p=p)
             if self.idz_use_dynamic_nominals:
-                # check if linearised_sv_nominal_levels is set
+                # check if idz_nominal_levels is set
                 if self.idz_nominal_levels is None:
                     raise ValueError(
                         "Dictionary of idz_nominal_levels is not provided "
                         "while idz_use_dynamic_nominals is True. Cannot set "
                         "dynamic nominal water depths for IDZ block."
                     )
-                p = self.set_idz_dynamic_nominal(p=p)
+                p = self.set_idz_dynamic_nominal(p=p, ensemble_member=ensemble_member)
+        return p
+
+    def precompute_channel_flow_parameters(self):
+        """
+        Compute the channel flow parameters of all ensemble members at once.
+
+        The branch inputs of all members are collected first. Identical inputs,
+        e.g. branches whose nominals do not differ between members, are computed
+        only once, and the distinct inputs are computed together, in the worker
+        pool if ``channel_flow_parameter_workers`` is set. The results are stored
+        in a table per ensemble member, which :meth:`parameters` then only reads.
+
+        This method is called from :meth:`pre` if
+        ``channel_flow_precompute_ensemble`` is True. The tables are discarded in
+        :meth:`post`.
+        """
+        members = range(self.ensemble_size)
+        tables = {}
+        sv_inputs = []
+        idz_inputs = []
+        for ensemble_member in members:
+            # The dynamic nominal setters only write, so a fresh dictionary
+            # captures the nominals of the member
+            nominals = self.__set_channel_flow_nominals({}, ensemble_member)
+            tables[ensemble_member] = dict(nominals)
+            p = super().parameters(ensemble_member)
+            p.update(nominals)
+            if self.linearised_sv and not self.linearised_sv_time_varying:
+                sv_inputs.append(self.__linear_sv_inputs(p))
+            if self.idz:
+                idz_inputs.append(self.__idz_inputs(p))
+
+        def merge(member_inputs):
+            return {
+                name: np.concatenate([inputs[name] for inputs in member_inputs])
+                for name in member_inputs[0].keys()
+            }
+
+        if sv_inputs:
+            n_branches = len(self.linearised_sv_branches)
+            with self.__phase("LinearisedSV.precompute", n_branches * len(members)):
+                results = self.__compute_linear_sv_parameters(
+                    merge(sv_inputs), self.linearised_sv_branches * len(members)
+                )
+            for ensemble_member, inputs in zip(members, sv_inputs):
+                start = ensemble_member * n_branches
+                self.__write_linear_sv_parameters(
+                    tables[ensemble_member],
+                    inputs,
+                    results[start : start + n_branches],
+                )
+
+        if idz_inputs:
+            n_branches = len(self.idz_branches)
+            with self.__phase("IDZ.precompute", n_branches * len(members)):
+                results = self.__compute_idz_parameters(
+                    merge(idz_inputs), self.idz_branches * len(members)
+                )
+            for ensemble_member in members:
+                start = ensemble_member * n_branches
+                self.__write_idz_parameters(
+                    tables[ensemble_member], results[start : start + n_branches]
+                )
+
+        self.__precomputed_parameters = tables
+        logger.debug(
+            f"Precomputed channel flow parameters for {len(tables)} ensemble members"
+        )
+
+    def pre(self):
+        """
+        Precompute the channel flow parameters of all ensemble members, if
+        ``channel_flow_precompute_ensemble`` is True.
+        """
+        super().pre()
+        if self.channel_flow_precompute_ensemble:
+            self.precompute_channel_flow_parameters()
+
+    def set_lateral_maps(self, p):
+        """
+        Set the ``QForcing_map`` and ``QLateral_map`` parameters of the branches
+        in ``channel_flow_lateral_maps``.
+
+        :param p: The parameters of the model.
+        :return: Updated parameters with the lateral maps.
+        """
+        for branch, maps in self.channel_flow_lateral_maps.items():
+            n_level_nodes = int(p[f"{branch}.n_level_nodes"])
+            for name, connections in maps.items():
+                if name not in ("QForcing", "QLateral"):
+                    raise ValueError(
+                        f"Unknown lateral map {name} for branch {branch}, expected "
+                        "QForcing or QLateral."
+                    )
+                n_inflows = p.get(f"{branch}.n_{name}")
+                if n_inflows is not None and int(n_inflows) != len(connections):
+                    raise ValueError(
+                        f"Lateral map {name} of branch {branch} has "
+                        f"{len(connections)} rows, but the branch has {int(n_inflows)}."
+                    )
+                key = (branch, name, n_level_nodes)
+                parameters = self.__lateral_map_parameters.get(key)
+                if parameters is None:
+                    lateral_map = _lateral_map(connections, n_level_nodes)
+                    parameters = {
+                        f"{branch}.{name}_map[{i + 1},{j + 1}]": value
+                        for i, row in enumerate(lateral_map.tolist())
+                        for j, value in enumerate(row)
+                    }
+                    self.__lateral_map_parameters[key] = parameters
+                p.update(parameters)
         return p
 
     def set_linear_sv_parameters(self, p):
@@ -164,62 +640,322 @@ class ChannelFlowParameterSettingOpimizationMixin:
         # use_convective_acceleration = True
         # use_upwind = False
 
-        required_params = [
-            ".n_level_nodes",
-            ".length",
-            ".H_b_up",
-            ".H_b_down",
-            ".Q_nominal",
-            ".width",
-            ".H_nominal",
-            ".H_nominal_down",
-            ".friction_coefficient",
-        ]
+        n_branches = len(self.linearised_sv_branches)
+        with self.__phase("LinearisedSV.inputs", n_branches):
+            inputs = self.__linear_sv_inputs(p)
+        with self.__phase("LinearisedSV.compute", n_branches):
+            results = self.__compute_linear_sv_parameters(
+                inputs, self.linearised_sv_branches
+            )
+        with self.__phase("LinearisedSV.write", n_branches):
+            self.__write_linear_sv_parameters(p, inputs, results)
+
+        return p
+
+    def __write_linear_sv_parameters(self, p, inputs, results):
+        """
+        Write the computed LinearisedSV coefficients of all branches.
+
+        :param p: Dictionary to write the parameters to.
+        :param inputs: Dictionary of per-branch input lists.
+        :param results: List with the computed coefficients of each branch.
+        """
+        if self.channel_flow_keep_intermediates:
+            self.__branch_results.update(zip(self.linearised_sv_branches, results))
+
+        keys = self.__key_table(
+            "LinearisedSV",
+            tuple(zip(self.linearised_sv_branches, inputs["n_level_nodes"].tolist())),
+            _linear_sv_parameter_keys,
+        )
+        values = np.concatenate(
+            [result[name] for result in results for name in LINEARISED_SV_PARAMETERS]
+        )
+        p.update(dict(zip(keys, values.tolist())))
+
+        if logger.isEnabledFor(logging.DEBUG):
+            uniform = linearised_sv_uniform(
+                inputs["y_nominal"], inputs["y_nominal_down"]
+            )
+            for channel, fast in zip(self.linearised_sv_branches, uniform):
+                logger.debug(
+                    f"Set Linear SV parameters for channel {channel} for channel flow"
+                    " block Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSV"
+                    f" using the {'uniform-depth' if fast else 'general'} path"
+                )
+            logger.debug(
+                f"{np.count_nonzero(uniform)} of {len(uniform)} LinearisedSV branches "
+                "used the uniform-depth fast path"
+            )
+
+    def __linear_sv_inputs(self, p):
+        """
+        Collect the inputs of the LinearisedSV computations from the parameters.
+
+        :param p: The parameters of the model.
+        :return: Dictionary of per-branch input arrays.
+        """
+        return self.__geometry_table(
+            p, "LinearisedSV", self.linearised_sv_branches, LINEARISED_SV_COLUMNS
+        ).inputs()
+
+    def bounds(self):
+        """
+        Fix the time-varying LinearisedSV coefficients to their timeseries.
+        """
+        bounds = super().bounds()
+
+        if self.linearised_sv and self.linearised_sv_time_varying:
+            if self.linearised_sv_branches is None:
+                raise ValueError(
+                    "List of linearised_sv_branches is not provided while linearised_sv "
+                    "is True. Cannot set bounds for LinearisedSVTimeVarying block."
+                )
+            coefficients = self.linear_sv_time_varying_coefficients(
+                super().parameters(0)
+            )
+            bounds.update({name: (ts, ts) for name, ts in coefficients.items()})
+
+        return bounds
+
+    def linear_sv_time_varying_coefficients(self, p, ensemble_member=0):
+        """
+        Compute the coefficient timeseries for the block:
+        Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSVTimeVarying.
 
-        for channel in self.linearised_sv_branches:
-            # check if all required parameters are present
-            for param in required_params:
-                if channel + param not in p:
+        The nominal values of every branch are evaluated at all times of the
+        optimization horizon. Fixed values in ``linearised_sv_nominal_levels``
+        are constant in time, timeseries are interpolated, and missing entries
+        fall back to the nominal parameters of the branch. All (branch, time)
+        combinations are linearized together, in one vectorized computation per
+        number of level nodes, so that no loop over the times is needed. Time
+        steps with identical nominals are served from the parameter cache.
+
+        The coefficients are variables of the block, which :meth:`bounds` fixes
+        to these timeseries. As bounds do not depend on the ensemble member, the
+        nominals of the first ensemble member are used there.
+
+        :param p: The parameters of the model, without the dynamic nominals
+            applied.
+        :param ensemble_member: The ensemble member index.
+
+        :return: A dictionary with the ``T0``, ``V0``, ``Delta``, ``Gamma`` and
+            ``C0`` timeseries of each branch, keyed on the variable names,
+            e.g. ``branch.T0[1]``.
+        """
+        from rtctools.optimization.timeseries import Timeseries
+
+        times = self.times()
+        branches = self.linearised_sv_branches
+        nominal_levels = {}
+        if self.linearised_sv_use_dynamic_nominals:
+            if self.linearised_sv_nominal_levels is None:
+                raise ValueError(
+                    "Dictionary of linearised_sv_nominal_levels is not provided "
+                    "while linearised_sv_use_dynamic_nominals is True. Cannot set "
+                    "dynamic nominal water depths for LinearisedSV block."
+                )
+            nominal_levels = self.linearised_sv_nominal_levels
+            for branch in nominal_levels.keys():
+                if branch not in branches:
+                    raise ValueError(
+                        f"Dynamic nominals are provided for {branch}, which is not "
+                        "in the list of LinearisedSV branches."
+                    )
+
+        # One row per (branch, time), with the time varying fastest
+        branch_inputs = self.__linear_sv_inputs(p)
+        rows = {
+            name: np.repeat(np.asarray(values), len(times))
+            for name, values in branch_inputs.items()
+        }
+        nominal_inputs = {
+            "H_b_up": "y_nominal",
+            "H_b_down": "y_nominal_down",
+            "Q_nominal": "q_nominal",
+        }
+        for i, branch in enumerate(branches):
+            for key, nominal in nominal_levels.get(branch, {}).items():
+                if key not in nominal_inputs:
+                    raise ValueError(
+                        f"Unknown nominal {key} for LinearisedSV branch {branch}. "
+                        f"Supported nominals are {', '.join(nominal_inputs.keys())}."
+                    )
+                if isinstance(nominal, str):
+                    ts = self.get_timeseries(nominal, ensemble_member)
+                    values = self.interpolate(times, ts.times, ts.values)
+                else:
+                    values = np.full(len(times), float(nominal))
+                if not np.all(np.isfinite(values)):
                     raise ValueError(
-                        f"Parameter {channel + param} is required to set "
-                        "LinearisedSV parameters but is missing. "
-                        "This parameter can be set via the declaration of "
-                        f"the LinearisedSV branch, {channel}, in the model "
-                        ".mo file."
+                        f"Nominal {key} for LinearisedSV branch {branch} is not finite "
+                        "over the whole optimization horizon."
                     )
-            variableGetter = GetLinearSVVariables(
-                n_level_nodes=int(p[channel + ".n_level_nodes"]),
-                length=float(p[channel + ".length"]),
-                h_b_up=float(p[channel + ".H_b_up"]),
-                h_b_down=float(p[channel + ".H_b_down"]),
-                q_nominal=float(p[channel + ".Q_nominal"]),
-                width=float(p[channel + ".width"]),
-                y_nominal=float(p[channel + ".H_nominal"]),
-                y_nominal_down=float(p[channel + ".H_nominal_down"]),
-                friction_coefficient=float(p[channel + ".friction_coefficient"]),
+                rows[nominal_inputs[key]][i * len(times) : (i + 1) * len(times)] = (
+                    values
+                )
+
+        with self.__phase("LinearisedSV.time_varying", len(branches) * len(times)):
+            results = self.__compute_linear_sv_parameters(
+                rows, np.repeat(branches, len(times)).tolist()
+            )
+
+        coefficients = {}
+        for i, channel in enumerate(branches):
+            branch_results = results[i * len(times) : (i + 1) * len(times)]
+            # One row per coefficient, one column per time
+            values = np.stack(
+                [
+                    np.concatenate([result[name] for name in LINEARISED_SV_PARAMETERS])
+                    for result in branch_results
+                ],
+                axis=1,
+            )
+            keys = _linear_sv_parameter_keys(
+                channel, int(branch_inputs["n_level_nodes"][i])
             )
-            variableGetter.getVariables()
-            for i in range(len(variableGetter.t0)):
-                p[channel + ".T0[" + str(i + 1) + "]"] = variableGetter.t0[i]
-            for i in range(len(variableGetter.v0)):
-                p[channel + ".V0[" + str(i + 1) + "]"] = variableGetter.v0[i]
-            for i in range(len(variableGetter.delta)):
-                p[channel + ".Delta[" + str(i + 1) + "]"] = variableGetter.delta[i]
-            for i in range(len(variableGetter.gamma)):
-                p[channel + ".Gamma[" + str(i + 1) + "]"] = variableGetter.gamma[i]
-            for i in range(len(variableGetter.c0)):
-                p[channel + ".C0[" + str(i + 1) + "]"] = variableGetter.c0[i]
+            coefficients.update(zip(keys, (Timeseries(times, row) for row in values)))
             logger.debug(
-                f"Set Linear SV parameters for channel {channel} for channel flow"
-                " block Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSV"
+                f"Computed time-varying Linear SV coefficients for channel {channel} for "
+                "channel flow block "
+                "Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSVTimeVarying"
             )
 
-        return p
+        return coefficients
+
+    def select_linear_sv_node_counts(
+        self,
+        p=None,
+        ensemble_member=0,
+        period=None,
+        points_per_wavelength=8.0,
+        max_courant=2.0,
+    ):
+        """
+        Select the smallest number of level nodes of each LinearisedSV branch,
+        see :func:`~rtctools_channel_flow.calculate_parameters.linearised_sv_node_counts`.
+
+        The branches are linearized around their nominal values with their
+        current ``n_level_nodes``, and the node spacing is chosen from the
+        Courant and wave-number criteria on the resulting ``C0`` and ``V0``, for
+        the smallest time step of the optimization time grid. The parameters are
+        not changed.
+
+        Note that ``n_level_nodes`` sets the sizes of the arrays of the block,
+        so the counts take effect when the model is built with them, e.g. by
+        passing them as modifications of the branches in the model .mo file.
+
+        The selected count of a branch can exceed its current count if the
+        current grid does not resolve the waves, in which case a warning is
+        logged. ``"states_saved"`` is then smaller, and can be negative.
+
+        :param p: The parameters to read the branches from. Default is the
+            parameters of the ensemble member.
+        :param ensemble_member: The ensemble member index, used if ``p`` is not
+            given.
+        :param period: Shortest wave period to resolve [s]. Default is
+            ``points_per_wavelength`` time steps.
+        :param points_per_wavelength: Minimum number of nodes per wavelength.
+        :param max_courant: Maximum Courant number.
+
+        :return: A dictionary with the selected ``"n_level_nodes"`` of each
+            branch, the total number of ``"states"`` of the branches before and
+            ``"selected_states"`` after the selection, and the number of
+            ``"states_saved"``.
+        """
+        if self.linearised_sv_branches is None:
+            raise ValueError(
+                "List of linearised_sv_branches is not provided. Cannot select "
+                "node counts for LinearisedSV block."
+            )
+        if p is None:
+            p = self.parameters(ensemble_member)
+
+        inputs = self.__linear_sv_inputs(p)
+        counts = linearised_sv_node_counts(
+            **inputs,
+            time_step=float(np.min(np.diff(self.times()))),
+            period=period,
+            points_per_wavelength=points_per_wavelength,
+            max_courant=max_courant,
+        )
+        refined = [
+            branch
+            for branch, n, current in zip(
+                self.linearised_sv_branches, counts, inputs["n_level_nodes"]
+            )
+            if n > current
+        ]
+        if refined:
+            logger.warning(
+                f"{len(refined)} LinearisedSV branches need more level nodes than "
+                f"they have to resolve the waves of the time grid: {', '.join(refined)}"
+            )
+
+        states = int(linearised_sv_states(inputs["n_level_nodes"]).sum())
+        selected_states = int(linearised_sv_states(counts).sum())
+        logger.info(
+            f"Selected node counts of {len(counts)} LinearisedSV branches: "
+            f"{selected_states} instead of {states} states "
+            f"({states - selected_states} saved)"
+        )
+        return {
+            "n_level_nodes": dict(zip(self.linearised_sv_branches, counts.tolist())),
+            "states": states,
+            "selected_states": selected_states,
+            "states_saved": states - selected_states,
+        }
+
+    def linear_sv_state_spaces(self, ensemble_member=0):
+        """
+        Export the LinearisedSV branches as state-space models, for simulation
+        outside of the optimization problem, see
+        :func:`~rtctools_channel_flow.state_space.linear_sv_state_space`.
+
+        The coefficients are computed for the parameters of the ensemble member.
+        Models of connected branches can be combined with
+        :func:`~rtctools_channel_flow.state_space.linear_sv_chain_state_space`.
+
+        :param ensemble_member: The ensemble member index.
+
+        :return: A dictionary with the :class:`StateSpace` model of each branch.
+        """
+        from rtctools_channel_flow.state_space import linear_sv_state_space
+
+        if self.linearised_sv_branches is None:
+            raise ValueError(
+                "List of linearised_sv_branches is not provided. Cannot export "
+                "state-space models of LinearisedSV block."
+            )
+
+        p = self.parameters(ensemble_member)
+        inputs = self.__linear_sv_inputs(p)
+        results = self.__compute_linear_sv_parameters(
+            inputs, self.linearised_sv_branches
+        )
+
+        models = {}
+        for i, (branch, result) in enumerate(zip(self.linearised_sv_branches, results)):
+            models[branch] = linear_sv_state_space(
+                inputs["n_level_nodes"][i],
+                length=inputs["length"][i],
+                width=inputs["width"][i],
+                q_nominal=inputs["q_nominal"][i],
+                h_b_up=inputs["h_b_up"][i],
+                h_b_down=inputs["h_b_down"][i],
+                y_nominal=inputs["y_nominal"][i],
+                y_nominal_down=inputs["y_nominal_down"][i],
+                **dict(result.items()),
+                density_water=p.get(branch + ".density_water", 1000.0),
+                name=branch,
+            )
+        return models
 
     def set_idz_parameters(self, p):
         """
-        Set the parameters for the block:
-        ``Deltares.ChannelFlow.Hydraulic.Branches.IDZ``.
+        Set the parameters for the blocks:
+        ``Deltares.ChannelFlow.Hydraulic.Branches.IDZ`` and
+        ``Deltares.ChannelFlow.Hydraulic.Branches.IDZCircular``.
 
         This method computes and assigns the internal IDZ parameters
         based on geometric properties, hydraulic characteristics, and
@@ -244,6 +980,9 @@ class ChannelFlowParameterSettingOpimizationMixin:
             - ``.side_slope`` :
                 Side slope of the channel cross section [-]
 
+        Circular branches, ``Deltares.ChannelFlow.Hydraulic.Branches.IDZCircular``,
+        have a ``.radius`` [m] instead of ``.width`` and ``.side_slope``.
+
         Based on these inputs, the following IDZ parameters are computed
         and written to the parameter dictionary:
 
@@ -254,7 +993,8 @@ class ChannelFlowParameterSettingOpimizationMixin:
             - ``Ad`` :
                 Downstream wetted cross-sectional area [m²]
             - ``Delay_in_hour`` :
-                Hydraulic delay through the channel [h]
+                Hydraulic delay through the channel [s]. Despite its name, the
+                delay is a duration in seconds, as used by ``delay()``.
 
         :param p: dict
             Dictionary containing the current model parameters.
@@ -262,64 +1002,692 @@ class ChannelFlowParameterSettingOpimizationMixin:
             Updated parameter dictionary including computed IDZ parameters.
         """
 
-        required_params = [
-            ".length",
-            ".H_b_up",
-            ".H_b_down",
-            ".Q_nominal",
-            ".width",
-            ".H_nominal",
-            ".friction_coefficient",
-            ".side_slope",
-        ]
+        n_branches = len(self.idz_branches)
+        with self.__phase("IDZ.inputs", n_branches):
+            inputs = self.__idz_inputs(p)
+        with self.__phase("IDZ.compute", n_branches):
+            results = self.__compute_idz_parameters(inputs, self.idz_branches)
+        with self.__phase("IDZ.write", n_branches):
+            self.__write_idz_parameters(p, results)
 
-        for channel in self.idz_branches:
-            # check if all required parameters are present
-            for param in required_params:
-                if channel + param not in p:
-                    raise ValueError(
-                        f"Parameter {channel + param} is required to set "
-                        "IDZ parameters but is missing. "
-                        "This parameter can be set via the declaration of "
-                        f"the IDZ branch, {channel}, in the model "
-                        ".mo file."
+        return p
+
+    def __idz_inputs(self, p):
+        """
+        Collect the inputs of the IDZ computations from the parameters.
+
+        :param p: The parameters of the model.
+        :return: Dictionary of per-branch input arrays.
+        """
+        shape = self.__idz_shape(p)
+        circular = shape == SECTION_SHAPES["circular"]
+        if not circular.any():
+            inputs = self.__geometry_table(
+                p, "IDZ", self.idz_branches, IDZ_COLUMNS
+            ).inputs()
+        else:
+            # Circular branches have no side slope, it is left at zero
+            inputs = {name: np.zeros(len(shape)) for name in IDZ_COLUMNS}
+            for block, mask, columns in (
+                ("IDZ", ~circular, IDZ_COLUMNS),
+                ("IDZCircular", circular, IDZ_CIRCULAR_COLUMNS),
+            ):
+                branches = [branch for branch, m in zip(self.idz_branches, mask) if m]
+                if branches:
+                    table = self.__geometry_table(p, block, branches, columns)
+                    for name, values in table.inputs().items():
+                        inputs[name][mask] = values
+        inputs["shape"] = shape
+        return inputs
+
+    def __idz_shape(self, p):
+        """
+        Return the shape identifier of each IDZ branch. Branches with a
+        ``radius`` parameter are circular, all others trapezoidal. The shapes
+        are determined once and reused as long as the branches do not change.
+
+        :param p: The parameters of the model.
+        :return: Array with the shape of each branch, see ``SECTION_SHAPES``.
+        """
+        branches = tuple(self.idz_branches)
+        if self.__idz_shapes is None or self.__idz_shapes[0] != branches:
+            shape = np.array(
+                [
+                    SECTION_SHAPES[
+                        "circular" if branch + ".radius" in p else "trapezoidal"
+                    ]
+                    for branch in branches
+                ],
+                dtype=int,
+            )
+            self.__idz_shapes = (branches, shape)
+        return self.__idz_shapes[1]
+
+    def __geometry_table(self, p, block, branches, columns):
+        """
+        Load the geometry table of a block from the parameters. The table, with
+        its parameter names, is built once and reused as long as the branches do
+        not change.
+
+        :param p: The parameters of the model.
+        :param block: Name of the block.
+        :param branches: List of branches of the block.
+        :param columns: Dictionary mapping column names to parameter suffixes.
+        :return: The loaded :class:`BranchGeometryTable`.
+        """
+        table = self.__geometry_tables.get(block)
+        if table is None or table.branches != tuple(branches):
+            table = BranchGeometryTable(branches, columns, block)
+            self.__geometry_tables[block] = table
+        return table.load(p)
+
+    def __compute_linear_sv_parameters(self, inputs, names):
+        """
+        Compute the LinearisedSV coefficients of a set of branches.
+        """
+        keep = self.channel_flow_keep_intermediates
+        return self.__compute_branch_parameters(
+            ("LinearisedSV",) + (("intermediates",) if keep else ()),
+            inputs,
+            partial(_linear_sv_branch_parameters, keep_intermediates=keep),
+            names,
+        )
+
+    def __compute_idz_parameters(self, inputs, names):
+        """
+        Compute the IDZ parameters of a set of branches with the configured
+        normal depth solver.
+        """
+        keep = self.channel_flow_keep_intermediates
+        return self.__compute_branch_parameters(
+            ("IDZ", self.idz_normal_depth_method)
+            + (("intermediates",) if keep else ()),
+            inputs,
+            partial(
+                _idz_branch_parameters,
+                normal_depth_method=self.idz_normal_depth_method,
+                keep_intermediates=keep,
+            ),
+            names,
+        )
+
+    def __write_idz_parameters(self, p, results):
+        """
+        Write the computed IDZ parameters of all branches.
+
+        :param p: Dictionary to write the parameters to.
+        :param results: List with the computed parameters of each branch.
+        """
+        if self.channel_flow_keep_intermediates:
+            self.__branch_results.update(zip(self.idz_branches, results))
+
+        keys = self.__key_table(
+            "IDZ",
+            tuple((channel,) for channel in self.idz_branches),
+            _idz_parameter_keys,
+        )
+        p.update(
+            dict(
+                zip(
+                    keys,
+                    (result[name] for result in results for name in IDZ_PARAMETERS),
+                )
+            )
+        )
+
+        if logger.isEnabledFor(logging.DEBUG):
+            circular = self.__idz_shape(p) == SECTION_SHAPES["circular"]
+            for channel, is_circular in zip(self.idz_branches, circular.tolist()):
+                logger.debug(
+                    f"Set IDZ parameters for channel {channel} for channel flow"
+                    " block Deltares.ChannelFlow.Hydraulic.Branches."
+                    f"{'IDZCircular' if is_circular else 'IDZ'}"
+                )
+
+    def channel_flow_parameter_cache_info(self):
+        """
+        Return the statistics of the parameter caches.
+
+        :return: A dictionary with the number of cache ``hits``, ``misses`` and
+            ``entries`` of the in-memory cache. Every branch looked up counts as a
+            hit or a miss. If the persistent cache is enabled, its statistics are
+            included under the key ``"persistent"``.
+        """
+        info = self.__parameter_cache.info()
+        if self.__persistent_parameter_cache is not None:
+            info["persistent"] = self.__persistent_parameter_cache.info()
+        return info
+
+    def channel_flow_branch_results(self):
+        """
+        Return the results of the most recent parameter computation of each
+        branch. Only available if ``channel_flow_keep_intermediates`` is True.
+
+        :return: A dictionary mapping branch names to
+            :class:`~rtctools_channel_flow.calculate_parameters.LinearSVResult` or
+            :class:`~rtctools_channel_flow.calculate_parameters.IDZResult`
+            objects, whose ``intermediates`` hold all variables of the
+            computation.
+        """
+        if not self.channel_flow_keep_intermediates:
+            raise ValueError(
+                "Branch results are only kept if channel_flow_keep_intermediates "
+                "is True."
+            )
+        return dict(self.__branch_results)
+
+    def constraints(self, ensemble_member):
+        """
+        Relate the delayed flows of the ``idz_discrete_delay_branches`` to their
+        upstream and downstream flows.
+        """
+        constraints = super().constraints(ensemble_member)
+        if self.idz and self.idz_discrete_delay_branches:
+            constraints.extend(self.__idz_discrete_delay_constraints(ensemble_member))
+        return constraints
+
+    def __idz_discrete_delay_constraints(self, ensemble_member):
+        """
+        Build the constraints of the discrete delays of all
+        ``idz_discrete_delay_branches``, with one vector constraint over all
+        times per delayed flow.
+
+        :param ensemble_member: The ensemble member index.
+        :return: A list of ``(f, m, M)`` constraints.
+        """
+        branches = self.idz_discrete_delay_branches
+        unknown = [branch for branch in branches if branch not in self.idz_branches]
+        if unknown:
+            raise ValueError(
+                f"Discrete delays are requested for {', '.join(unknown)}, which "
+                "are not in the list of IDZ branches."
+            )
+
+        table = self.idz_delay_table(ensemble_member)
+        n_times = len(self.times())
+        zeros = np.zeros(n_times)
+        constraints = []
+        for branch in branches:
+            before, previous, w = table.indices(branch, n_times)
+            before = before.tolist()
+            previous = previous.tolist()
+            for flow, delayed_flow in (
+                (".HQUp.Q", ".Q_upstream_delayed"),
+                (".HQDown.Q", ".Q_downstream_delayed"),
+            ):
+                q = self.__collocated_vector(branch + flow, ensemble_member)
+                delayed = self.__collocated_vector(
+                    branch + delayed_flow, ensemble_member
+                )
+                if w == 0.0:
+                    constraints.append((delayed - q[before], zeros, zeros))
+                else:
+                    constraints.append(
+                        (delayed - (1 - w) * q[before] - w * q[previous], zeros, zeros)
                     )
-            variableGetter = GetIDZVariables(
-                length=float(p[channel + ".length"]),
-                h_b_up=float(p[channel + ".H_b_up"]),
-                h_b_down=float(p[channel + ".H_b_down"]),
-                q_nominal=float(p[channel + ".Q_nominal"]),
-                width=float(p[channel + ".width"]),
-                y_nominal=float(p[channel + ".H_nominal"]),
-                friction_coefficient=float(p[channel + ".friction_coefficient"]),
-                side_slope=float(p[channel + ".side_slope"]),
+
+        logger.debug(
+            f"Set discrete delays of {len(branches)} IDZ branches for ensemble "
+            f"member {ensemble_member}"
+        )
+        return constraints
+
+    def idz_delay_table(self, ensemble_member=0):
+        """
+        Return the discrete delays of all IDZ branches on the optimization time
+        grid.
+
+        The ``Delay_in_hour`` parameters of the branches, which are durations in
+        seconds, are converted to a whole number of time steps and a fractional
+        weight, see ``idz_discrete_delay_fractional``. The table is kept per
+        ensemble member. On later calls, e.g. in later cycles of a model
+        predictive control loop, only the branches whose delay changed are
+        converted again.
+
+        :param ensemble_member: The ensemble member whose parameters are used.
+
+        :return: A :class:`~rtctools_channel_flow.delay_table.DelayTable`.
+        """
+        if not self.idz:
+            raise ValueError("IDZ delay tables are only available if idz is True.")
+
+        steps = np.diff(self.times())
+        if len(steps) == 0 or not np.allclose(steps, steps[0]):
+            raise ValueError(
+                "Discrete IDZ delays require an equidistant time grid with at least "
+                "two times."
             )
-            variableGetter.getVariables()
-            p[channel + ".p11"] = variableGetter.p11
-            p[channel + ".p12"] = variableGetter.p12
-            p[channel + ".p21"] = variableGetter.p21
-            p[channel + ".p22"] = variableGetter.p22
-            p[channel + ".Au"] = variableGetter.Au
-            p[channel + ".Ad"] = variableGetter.Ad
-            p[channel + ".Delay_in_hour"] = variableGetter.Delay_in_hour
-            logger.debug(
-                f"Set IDZ parameters for channel {channel} for channel flow"
-                " block Deltares.ChannelFlow.Hydraulic.Branches.IDZ"
+
+        table = self.__delay_tables.get(ensemble_member)
+        if table is None or not table.matches(
+            steps[0], self.idz_discrete_delay_fractional
+        ):
+            table = DelayTable(steps[0], self.idz_discrete_delay_fractional)
+            self.__delay_tables[ensemble_member] = table
+
+        p = self.parameters(ensemble_member)
+        table.update(
+            self.idz_branches,
+            [p[branch + ".Delay_in_hour"] for branch in self.idz_branches],
+        )
+        return table
+
+    def __collocated_vector(self, variable, ensemble_member):
+        """
+        Return the values of a variable at all times, in model units.
+        """
+        canonical, sign = self.alias_relation.canonical_signed(variable)
+        return (
+            sign
+            * self.variable_nominal(canonical)
+            * self.state_vector(canonical, ensemble_member)
+        )
+
+    def idz_diagnostics(self, ensemble_member=0):
+        """
+        Return diagnostics of the IDZ parameter computation of all IDZ branches,
+        such as the normal depth, the location of the backwater section, the
+        Froude numbers and the flow regime. They can be written to a file with
+        :func:`~rtctools_channel_flow.calculate_parameters.save_idz_diagnostics`.
+
+        :param ensemble_member: The ensemble member whose parameters are used.
+
+        :return: A structured array with one row per branch, see
+            :func:`~rtctools_channel_flow.calculate_parameters.idz_diagnostics_batch`.
+            The first field, ``branch``, holds the branch names.
+        """
+        if not self.idz:
+            raise ValueError("IDZ diagnostics are only available if idz is True.")
+        return idz_diagnostics_batch(
+            **self.__idz_inputs(self.parameters(ensemble_member)),
+            normal_depth_method=self.idz_normal_depth_method,
+            branches=self.idz_branches,
+        )
+
+    def idz_transfer_matrices(self, omega, ensemble_member=0):
+        """
+        Evaluate the transfer matrices of all IDZ branches over a frequency
+        grid, see
+        :func:`~rtctools_channel_flow.frequency_response.idz_transfer_matrix`.
+
+        :param omega: Angular frequencies [rad/s].
+        :param ensemble_member: The ensemble member whose parameters are used.
+
+        :return: Complex array of shape ``(n_branches, n_frequencies, 2, 2)``,
+            in the order of ``idz_branches``.
+        """
+        from rtctools_channel_flow.frequency_response import idz_transfer_matrix
+
+        return idz_transfer_matrix(omega, self.__idz_parameter_arrays(ensemble_member))
+
+    def idz_step_responses(self, times, ensemble_member=0):
+        """
+        Evaluate the step responses of all IDZ branches, see
+        :func:`~rtctools_channel_flow.frequency_response.idz_step_response`.
+
+        :param times: Times since the step [s].
+        :param ensemble_member: The ensemble member whose parameters are used.
+
+        :return: Array of shape ``(n_branches, n_times, 2, 2)``, in the order of
+            ``idz_branches``.
+        """
+        from rtctools_channel_flow.frequency_response import idz_step_response
+
+        return idz_step_response(times, self.__idz_parameter_arrays(ensemble_member))
+
+    def __idz_parameter_arrays(self, ensemble_member):
+        """
+        Return the IDZ parameters of all IDZ branches as arrays.
+        """
+        if not self.idz:
+            raise ValueError("IDZ transfer matrices are only available if idz is True.")
+        p = self.parameters(ensemble_member)
+        return {
+            name: np.array([p[f"{branch}.{name}"] for branch in self.idz_branches])
+            for name in IDZ_PARAMETERS
+        }
+
+    def __key_table(self, block, signature, branch_keys):
+        """
+        Return the flat list of parameter names of a set of branches. The list is
+        built once and reused as long as the branches do not change.
+
+        :param block: Name of the block.
+        :param signature: Tuple with the arguments of ``branch_keys`` for each branch.
+        :param branch_keys: Function returning the parameter names of a branch.
+        :return: A list of parameter names.
+        """
+        table = self.__key_tables.get(block)
+        if table is None or table[0] != signature:
+            keys = [key for args in signature for key in branch_keys(*args)]
+            table = self.__key_tables[block] = (signature, keys)
+        return table[1]
+
+    def __get_persistent_parameter_cache(self):
+        if self.__persistent_parameter_cache is None:
+            if self.channel_flow_persistent_cache_path is None:
+                raise ValueError(
+                    "channel_flow_persistent_cache_path is not provided while "
+                    "channel_flow_persistent_cache is True. Cannot open the "
+                    "persistent parameter cache."
+                )
+            self.__persistent_parameter_cache = PersistentParameterCache(
+                self.channel_flow_persistent_cache_path,
+                max_entries=self.channel_flow_persistent_cache_max_entries,
             )
+        return self.__persistent_parameter_cache
 
-        return p
+    def __compute_branch_parameters(self, kind, inputs, compute, names):
+        """
+        Compute the parameters of a set of branches, reusing cached results for
+        branches whose inputs have been seen before. Branches with identical
+        inputs are computed only once, and branches whose inputs did not change
+        since the previous call for the same block reuse their previous results,
+        also if the caches are disabled.
+
+        :param kind: Tuple identifying the block type, prepended to the cache keys.
+        :param inputs: Dictionary of per-branch input lists.
+        :param compute: Function computing a list of per-branch results from a
+            dictionary of input arrays.
+        :param names: List with the branch name of each row of the inputs, used
+            for the per-branch profile.
+        :return: A list with the result of each branch.
+        """
+        inputs = {name: np.asarray(values) for name, values in inputs.items()}
+        use_memory = self.channel_flow_parameter_cache
+        # The persistent cache does not store intermediate variables
+        use_disk = (
+            self.channel_flow_persistent_cache
+            and not self.channel_flow_keep_intermediates
+        )
 
-    def set_idz_dynamic_nominal(self, p):
+        keys = [
+            kind + row for row in zip(*(values.tolist() for values in inputs.values()))
+        ]
+        if use_memory:
+            if self.channel_flow_parameter_cache_size is None:
+                self.__parameter_cache_batch_sizes[kind] = len(keys)
+                self.__parameter_cache.max_entries = _PARAMETER_CACHE_SIZE_FACTOR * sum(
+                    self.__parameter_cache_batch_sizes.values()
+                )
+            results = [self.__parameter_cache.get(key) for key in keys]
+        else:
+            results = [None] * len(keys)
+
+        # Reuse the results of the previous call for unchanged inputs
+        previous = self.__previous_results.get(kind, {})
+        for i, key in enumerate(keys):
+            if results[i] is None and key in previous:
+                results[i] = previous[key]
+
+        # Look up each distinct missing input only once
+        missing = {}
+        for i, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[i], []).append(i)
+
+        found = {}
+        if missing and use_disk:
+            # The persistent cache stores plain dictionaries
+            result_type = _RESULT_TYPES[kind[0]]
+            cached = self.__get_persistent_parameter_cache().get_many(missing.keys())
+            found = {key: result_type(**value) for key, value in cached.items()}
+
+        computed = {}
+        to_compute = [key for key in missing.keys() if key not in found]
+        if to_compute:
+            index = [missing[key][0] for key in to_compute]
+            subset = {name: values[index] for name, values in inputs.items()}
+            if self.channel_flow_profiling == "branches":
+                computed_results = self.__compute_timed(
+                    compute,
+                    subset,
+                    [[names[i] for i in missing[key]] for key in to_compute],
+                )
+            else:
+                computed_results = self.__map_compute(compute, subset)
+            computed = dict(zip(to_compute, computed_results))
+            if use_disk:
+                self.__get_persistent_parameter_cache().put_many(computed.items())
+
+        for key, branches in missing.items():
+            result = found[key] if key in found else computed[key]
+            if use_memory:
+                self.__parameter_cache.put(key, result)
+            for i in branches:
+                results[i] = result
+
+        logger.debug(
+            f"Computed parameters for {len(to_compute)} of {len(keys)} {kind[0]} "
+            "branches"
+        )
+        self.__previous_results[kind] = dict(zip(keys, results))
+
+        return results
+
+    def __map_compute(self, compute, inputs):
+        """
+        Apply ``compute`` to a set of branches, in chunks in the worker pool if
+        parallel computation is enabled.
+
+        :param compute: Function computing a list of per-branch results from a
+            dictionary of input arrays. It must be picklable.
+        :param inputs: Dictionary of per-branch input arrays.
+        :return: A list with the result of each branch, in the order of the inputs.
+        """
+        workers = self.channel_flow_parameter_workers
+        chunk_size = self.channel_flow_parameter_chunk_size
+        if workers is None or workers <= 1:
+            return compute(inputs)
+        if chunk_size < 1:
+            raise ValueError(
+                f"channel_flow_parameter_chunk_size must be positive, got {chunk_size}."
+            )
+
+        n_branches = len(next(iter(inputs.values())))
+        if n_branches <= chunk_size:
+            return compute(inputs)
+
+        chunks = [
+            {
+                name: values[start : start + chunk_size]
+                for name, values in inputs.items()
+            }
+            for start in range(0, n_branches, chunk_size)
+        ]
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=workers)
+        # map() yields the results in the order of the chunks
+        results = []
+        for chunk_results in self.__executor.map(compute, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def __compute_timed(self, compute, inputs, names):
+        """
+        Apply ``compute`` to the branches one by one and record the time of each.
+
+        :param compute: Function computing a list of per-branch results from a
+            dictionary of input arrays.
+        :param inputs: Dictionary of per-branch input arrays.
+        :param names: For each row of the inputs, the list of branches that share
+            its result.
+        :return: A list with the result of each row.
+        """
+        results = []
+        for i, branches in enumerate(names):
+            start = time.perf_counter()
+            results.extend(
+                compute({name: values[i : i + 1] for name, values in inputs.items()})
+            )
+            elapsed = time.perf_counter() - start
+            for branch in branches:
+                record = self.__profile_branches.setdefault(
+                    branch, {"calls": 0, "time": 0.0, "max_time": 0.0}
+                )
+                record["calls"] += 1
+                record["time"] += elapsed
+                record["max_time"] = max(record["max_time"], elapsed)
+        return results
+
+    def __phase(self, phase, n_branches=0):
+        """
+        Return a context manager that records a phase, if profiling is enabled.
+        """
+        if not self.channel_flow_profiling:
+            return _NO_PROFILING
+        return _PhaseTimer(
+            self.__profile_phases, phase, n_branches, self.__parameter_cache
+        )
+
+    def channel_flow_profile(self, n_slowest=10, reset=False):
+        """
+        Return the profile of the parameter computations, see
+        ``channel_flow_profiling``.
+
+        :param n_slowest: Number of slowest branches to report.
+        :param reset: True if the records should be cleared afterwards.
+
+        :return: A dictionary with:
+
+            - ``"phases"``: for each phase, the number of ``calls``, total
+              ``time`` in seconds, number of ``branches`` and the in-memory
+              ``cache_hits`` and ``cache_misses``.
+            - ``"branches"``: for each timed branch, the number of ``calls``, the
+              total ``time`` and the ``max_time`` of a single computation.
+            - ``"slowest_branches"``: list of ``(branch, max_time)`` tuples of the
+              slowest branches, slowest first.
+        """
+        branches = {
+            name: dict(record) for name, record in self.__profile_branches.items()
+        }
+        profile = {
+            "phases": {
+                name: dict(record) for name, record in self.__profile_phases.items()
+            },
+            "branches": branches,
+            "slowest_branches": sorted(
+                ((name, record["max_time"]) for name, record in branches.items()),
+                key=lambda item: item[1],
+                reverse=True,
+            )[:n_slowest],
+        }
+        if reset:
+            self.__profile_phases.clear()
+            self.__profile_branches.clear()
+        return profile
+
+    def post(self):
+        """
+        Shut down the worker pool of the parameter computations, close the
+        persistent parameter cache and discard the precomputed parameters.
+        """
+        self.__precomputed_parameters = {}
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+        if self.__persistent_parameter_cache is not None:
+            self.__persistent_parameter_cache.close()
+            self.__persistent_parameter_cache = None
+        super().post()
+
+    def set_linear_sv_dynamic_nominal(self, p, ensemble_member=0):
+        """
+        Set the dynamic nominal water depths and flows for the block:
+        Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSV.
+        If the required nominal data is not provided, the
+        default nominal depths are used.
+
+        The nominals are read from ``linearised_sv_nominal_levels`` and written
+        to the ``H_nominal``, ``H_nominal_down`` and ``Q_nominal`` parameters,
+        around which :meth:`set_linear_sv_parameters` linearizes. Only branches
+        whose nominals changed since the previous call are re-linearized; the
+        others reuse their previous parameters.
+
+        :param p: The parameters of the model.
+        :param ensemble_member: The ensemble member index.
+
+        :return: Updated parameters with dynamic nominal water depths.
+        """
+        return self.__set_dynamic_nominals(
+            p,
+            "LinearisedSV",
+            self.linearised_sv_branches,
+            self.linearised_sv_nominal_levels,
+            {
+                "H_b_up": ".H_nominal",
+                "H_b_down": ".H_nominal_down",
+                "Q_nominal": ".Q_nominal",
+            },
+            ensemble_member,
+        )
+
+    def set_idz_dynamic_nominal(self, p, ensemble_member=0):
         """
         Set the dynamic nominal water depths for the block:
         Deltares.ChannelFlow.Hydraulic.Branches.IDZ.
         If the required nominal data is not provided, the
         default nominal depths are used.
 
+        The nominals are read from ``idz_nominal_levels`` and written to the
+        ``H_nominal`` parameter, around which :meth:`set_idz_parameters`
+        linearizes. Only branches whose nominal changed since the previous call
+        are re-linearized; the others reuse their previous parameters.
+
         :param p: The parameters of the model.
+        :param ensemble_member: The ensemble member index.
 
         :return: Updated parameters with dynamic nominal water depths.
         """
-        raise NotImplementedError("Dynamic nominal idz is not yet implemented.")
+        return self.__set_dynamic_nominals(
+            p,
+            "IDZ",
+            self.idz_branches,
+            self.idz_nominal_levels,
+            {"H_nominal": ".H_nominal"},
+            ensemble_member,
+        )
+
+    def __set_dynamic_nominals(
+        self, p, block, branches, nominal_levels, parameters, ensemble_member
+    ):
+        """
+        Resolve the nominal values of a set of branches and write them to the
+        parameters.
+
+        :param p: The parameters of the model.
+        :param block: Name of the block, used in messages.
+        :param branches: List of branches of the block.
+        :param nominal_levels: Dictionary of nominal values per branch.
+        :param parameters: Dictionary mapping the keys of ``nominal_levels`` to
+            parameter name suffixes.
+        :param ensemble_member: The ensemble member index.
+
+        :return: Updated parameters with the nominal values.
+        """
+        for branch, nominals in nominal_levels.items():
+            if branch not in branches:
+                raise ValueError(
+                    f"Dynamic nominals are provided for {branch}, which is not "
+                    f"in the list of {block} branches."
+                )
+            for key, nominal in nominals.items():
+                if key not in parameters:
+                    raise ValueError(
+                        f"Unknown nominal {key} for {block} branch {branch}. "
+                        f"Supported nominals are {', '.join(parameters.keys())}."
+                    )
+                if isinstance(nominal, str):
+                    value = float(
+                        self.timeseries_at(nominal, self.initial_time, ensemble_member)
+                    )
+                else:
+                    value = float(nominal)
+                if not np.isfinite(value):
+                    raise ValueError(
+                        f"Nominal {key} for {block} branch {branch} is not finite "
+                        "at the start of the optimization run."
+                    )
+                p[branch + parameters[key]] = value
 
         return p
@@ -0,0 +1,110 @@
+import numpy as np
+
+from rtctools_channel_flow.calculate_parameters import idz_discrete_delay
+
+
+class DelayTable:
+    """
+    Discrete delays of a set of IDZ branches on an equidistant time grid.
+
+    The ``Delay_in_hour`` parameters of the IDZ blocks are durations in seconds.
+    The table converts them to a whole number of time steps, the shift, and a
+    fractional interpolation weight, see
+    :func:`~rtctools_channel_flow.calculate_parameters.idz_discrete_delay`. The
+    offsets are kept per branch, and on an update only branches whose delay
+    changed are converted again. The table keeps track of the number of branches
+    that were reused (hits) and converted (misses).
+
+    :param step: Time step of the optimization time grid [s].
+    :param fractional: True if delays should be interpolated between two time
+        steps, False if they should be rounded to the nearest time step.
+        Default is ``True``.
+    """
+
+    def __init__(self, step, fractional=True):
+        self.step = float(step)
+        self.fractional = bool(fractional)
+        self.hits = 0
+        self.misses = 0
+        # Branch name -> (delay, shift, weight)
+        self.__entries = {}
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, branch):
+        return branch in self.__entries
+
+    def __getitem__(self, branch):
+        """
+        :param branch: Name of the branch.
+        :return: Tuple ``(delay, shift, weight)`` of the branch.
+        """
+        return self.__entries[branch]
+
+    def matches(self, step, fractional):
+        """
+        :return: True if the table was built for this time step and rounding mode.
+        """
+        return self.step == float(step) and self.fractional == bool(fractional)
+
+    def update(self, branches, delays):
+        """
+        Set the delays of a set of branches, and convert those that changed.
+
+        :param branches: List of branch names.
+        :param delays: Delay of each branch [s].
+        :return: Tuple of arrays ``(shift, weight)``, in the order of ``branches``.
+        """
+        delays = np.asarray(delays, dtype=float)
+        changed = [
+            i
+            for i, (branch, delay) in enumerate(zip(branches, delays.tolist()))
+            if self.__entries.get(branch, (None,))[0] != delay
+        ]
+        if changed:
+            shift, weight = idz_discrete_delay(
+                delays[changed], self.step, self.fractional
+            )
+            for i, k, w in zip(changed, shift.tolist(), weight.tolist()):
+                self.__entries[branches[i]] = (float(delays[i]), k, w)
+        self.misses += len(changed)
+        self.hits += len(branches) - len(changed)
+
+        entries = [self.__entries[branch] for branch in branches]
+        return (
+            np.array([entry[1] for entry in entries], dtype=int),
+            np.array([entry[2] for entry in entries], dtype=float),
+        )
+
+    def indices(self, branch, n_times):
+        """
+        Return the time indices the delayed flow of a branch refers to.
+
+        The delayed flow at time index ``i`` is ``(1 - weight) * Q[before[i]] +
+        weight * Q[previous[i]]``. Before the start of the time grid, the first
+        time index is used.
+
+        :param branch: Name of the branch.
+        :param n_times: Number of times of the time grid.
+        :return: Tuple ``(before, previous, weight)`` with two integer arrays and
+            the weight of the branch.
+        """
+        _, shift, weight = self.__entries[branch]
+        index = np.arange(n_times)
+        return np.maximum(index - shift, 0), np.maximum(index - shift - 1, 0), weight
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        :return: A dictionary with the number of ``hits``, ``misses`` and
+            ``entries`` of the table.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
@@ -0,0 +1,139 @@
+import numpy as np
+
+from rtctools_channel_flow.calculate_parameters import IDZ_PARAMETERS
+
+
+def _idz_transfer_arrays(parameters, separate_delays):
+    """
+    Return the IDZ parameters as arrays with one entry per branch, and the
+    delays of the flows from the downstream end (``P12``) and from the
+    upstream end (``P21``).
+    """
+    missing = [name for name in IDZ_PARAMETERS if name not in parameters]
+    if separate_delays:
+        missing += [name for name in ("tu", "td") if name not in parameters]
+    if missing:
+        raise ValueError(f"IDZ parameters {', '.join(missing)} are missing.")
+
+    values = {
+        name: np.atleast_1d(np.asarray(parameters[name], dtype=float))
+        for name in IDZ_PARAMETERS
+    }
+    if separate_delays:
+        delay_up = np.asarray(parameters["tu"], dtype=float)
+        delay_down = np.asarray(parameters["td"], dtype=float)
+    else:
+        delay_up = delay_down = values["Delay_in_hour"]
+
+    arrays = np.broadcast_arrays(*values.values(), delay_up, delay_down)
+    return dict(zip(values, arrays)), arrays[-2], arrays[-1]
+
+
+def idz_transfer_matrix(omega, parameters, separate_delays=False):
+    """
+    Evaluate the transfer matrix of many IDZ branches over a frequency grid.
+
+    The IDZ block relates the water levels at the ends of a branch to the flows
+    into the branch at its ends, in the Laplace domain:
+
+    .. math::
+
+        \\begin{bmatrix} H_u \\\\ H_d \\end{bmatrix} =
+        \\begin{bmatrix}
+            \\frac{1}{A_u s} + p_{11} & (\\frac{1}{A_u s} + p_{12}) e^{-\\tau_u s} \\\\
+            (\\frac{1}{A_d s} + p_{21}) e^{-\\tau_d s} & \\frac{1}{A_d s} + p_{22}
+        \\end{bmatrix}
+        \\begin{bmatrix} Q_u \\\\ Q_d \\end{bmatrix}
+
+    where ``Q_u`` is ``HQUp.Q`` and ``Q_d`` is ``HQDown.Q``, i.e. minus the flow
+    out of the downstream end. Lateral inflows act as ``Q_u`` and ``Q_d``
+    without delay and without the ``p`` terms.
+
+    Parameters
+    ----------
+    omega : array_like of float
+        Angular frequencies [rad/s], nonzero, as the transfer matrix has
+        integrator poles at ``s = 0``.
+    parameters : dict[str, array_like]
+        IDZ parameters of the branches keyed by the parameter names of the
+        Modelica block, e.g. as returned by :func:`idz_variables_batch`. Scalars
+        are taken as a single branch.
+    separate_delays : bool, default=False
+        If False, both delays ``tau_u`` and ``tau_d`` are ``Delay_in_hour``, as
+        in the IDZ block. If True, the delays ``tu`` of waves travelling
+        upstream and ``td`` of waves travelling downstream are used, which
+        ``idz_variables_batch`` returns with ``keep_intermediates=True``.
+
+    Returns
+    -------
+    np.ndarray
+        Complex array of shape ``(n_branches, n_frequencies, 2, 2)``, with the
+        levels ``[H_u, H_d]`` as rows and the flows ``[Q_u, Q_d]`` as columns.
+    """
+    omega = np.atleast_1d(np.asarray(omega, dtype=float))
+    if np.any(omega == 0.0):
+        raise ValueError("The IDZ transfer matrix is not defined at zero frequency.")
+    values, delay_up, delay_down = _idz_transfer_arrays(parameters, separate_delays)
+
+    s = 1j * omega[None, :]
+    integrator_up = 1.0 / (values["Au"][:, None] * s)
+    integrator_down = 1.0 / (values["Ad"][:, None] * s)
+
+    shift_up = np.exp(-s * delay_up[:, None])
+    # With the single delay of the IDZ block, both directions share the shift
+    shift_down = np.exp(-s * delay_down[:, None]) if separate_delays else shift_up
+
+    P = np.empty(integrator_up.shape + (2, 2), dtype=complex)
+    P[..., 0, 0] = integrator_up + values["p11"][:, None]
+    P[..., 0, 1] = (integrator_up + values["p12"][:, None]) * shift_up
+    P[..., 1, 0] = (integrator_down + values["p21"][:, None]) * shift_down
+    P[..., 1, 1] = integrator_down + values["p22"][:, None]
+    return P
+
+
+def idz_step_response(times, parameters, separate_delays=False):
+    """
+    Evaluate the step responses of many IDZ branches.
+
+    The response of a level to a unit step of a flow at ``t = 0`` is the
+    inverse Laplace transform of the entry of the transfer matrix, see
+    :func:`idz_transfer_matrix`, divided by ``s``. For entry ``(i, j)`` with
+    area ``A``, gain ``p`` and delay ``tau`` this is
+
+    .. math::
+
+        h(t) = \\left(\\frac{t - \\tau}{A} + p\\right) \\mathbb{1}(t \\geq \\tau)
+
+    so a ramp due to the storage in the branch, and a jump of ``p`` when the
+    wave arrives.
+
+    Parameters
+    ----------
+    times : array_like of float
+        Times since the step [s].
+    parameters : dict[str, array_like]
+        IDZ parameters of the branches, see :func:`idz_transfer_matrix`.
+    separate_delays : bool, default=False
+        See :func:`idz_transfer_matrix`.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape ``(n_branches, n_times, 2, 2)`` with the level changes
+        [m] per unit of flow [m³/s], with the levels ``[H_u, H_d]`` as rows and
+        the flows ``[Q_u, Q_d]`` as columns.
+    """
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    values, delay_up, delay_down = _idz_transfer_arrays(parameters, separate_delays)
+
+    def response(area, p, delay):
+        t = times[None, :] - delay[:, None]
+        return np.where(t >= 0.0, t / area[:, None] + p[:, None], 0.0)
+
+    zero = np.zeros_like(values["Au"])
+    h = np.empty((len(values["Au"]), len(times), 2, 2))
+    h[..., 0, 0] = response(values["Au"], values["p11"], zero)
+    h[..., 0, 1] = response(values["Au"], values["p12"], delay_up)
+    h[..., 1, 0] = response(values["Ad"], values["p21"], delay_down)
+    h[..., 1, 1] = response(values["Ad"], values["p22"], zero)
+    return h
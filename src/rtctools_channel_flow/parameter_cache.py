@@ -0,0 +1,240 @@
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from rtctools_channel_flow import __version__
+
+
+class ParameterCache:
+    """
+    In-memory cache of computed channel flow parameters.
+
+    Entries are keyed on the numeric inputs of a branch, so branches, or
+    ensemble members, with identical geometry and nominal values share a single
+    computation. The cache keeps track of the number of hits and misses.
+
+    :param max_entries: Maximum number of entries. When exceeded, the least
+        recently used entry is evicted. Default is ``None`` (unbounded).
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key):
+        """
+        Look up an entry and update the hit and miss counters.
+
+        :param key: Hashable key of the entry.
+        :return: The cached value, or ``None`` if the key is not in the cache.
+        """
+        try:
+            value = self.__entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Store an entry, evicting the least recently used entry if the cache
+        is full.
+
+        :param key: Hashable key of the entry.
+        :param value: Value to store.
+        """
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        :return: A dictionary with the number of ``hits``, ``misses`` and
+            ``entries`` of the cache.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+
+class PersistentParameterCache:
+    """
+    On-disk cache of computed channel flow parameters, stored in an SQLite file.
+
+    Entries are keyed on a stable hash of the branch inputs and the version of
+    this library, so they survive process restarts but are invalidated when the
+    library is upgraded. The values are stored as little-endian float64 blobs
+    together with a short layout string. The number of entries is capped, and the
+    least recently used entries are evicted first.
+
+    :param path: Path of the SQLite file. It is created if it does not exist.
+    :param max_entries: Maximum number of entries in the file. Default is
+        ``100000``.
+    """
+
+    # SQLite limits the number of variables in a single statement
+    _CHUNK_SIZE = 500
+
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.__connection = sqlite3.connect(path, timeout=60)
+        with self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS parameters "
+                "(key TEXT PRIMARY KEY, layout TEXT NOT NULL, value BLOB NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+            self.__connection.execute(
+                "CREATE INDEX IF NOT EXISTS parameters_last_access "
+                "ON parameters (last_access)"
+            )
+
+    def __len__(self):
+        return self.__connection.execute("SELECT COUNT(*) FROM parameters").fetchone()[
+            0
+        ]
+
+    @staticmethod
+    def hash_key(key):
+        """
+        Compute the stable hash under which an entry is stored.
+
+        :param key: Tuple of strings and numbers identifying the branch inputs.
+        :return: Hexadecimal SHA-256 digest of the key and the library version.
+        """
+        return hashlib.sha256(repr((__version__,) + tuple(key)).encode()).hexdigest()
+
+    @staticmethod
+    def _serialize(value):
+        # Layout of the blob, e.g. "T0:4,V0:7" for arrays and "p11:" for floats
+        items = list(value.items())
+        layout = ",".join(
+            name + ":" + (str(len(v)) if np.ndim(v) else "") for name, v in items
+        )
+        data = np.concatenate([np.atleast_1d(v) for _, v in items])
+        return layout, np.asarray(data, dtype="<f8").tobytes()
+
+    @staticmethod
+    def _deserialize(layout, blob):
+        data = np.frombuffer(blob, dtype="<f8")
+        value = {}
+        start = 0
+        for entry in layout.split(","):
+            name, size = entry.split(":")
+            if size:
+                value[name] = data[start : start + int(size)]
+                start += int(size)
+            else:
+                value[name] = float(data[start])
+                start += 1
+        return value
+
+    def get_many(self, keys):
+        """
+        Look up several entries and update the hit and miss counters.
+
+        :param keys: Iterable of keys, see :meth:`hash_key`.
+        :return: A dictionary with the cached value of each key that was found.
+            Values are dictionaries of arrays or floats.
+        """
+        hashes = {self.hash_key(key): key for key in keys}
+        found = {}
+        found_hashes = []
+        hash_list = list(hashes.keys())
+        for start in range(0, len(hash_list), self._CHUNK_SIZE):
+            chunk = hash_list[start : start + self._CHUNK_SIZE]
+            rows = self.__connection.execute(
+                "SELECT key, layout, value FROM parameters WHERE key IN ({})".format(
+                    ",".join("?" * len(chunk))
+                ),
+                chunk,
+            ).fetchall()
+            for key_hash, layout, blob in rows:
+                found[hashes[key_hash]] = self._deserialize(layout, blob)
+                found_hashes.append(key_hash)
+
+        if found_hashes:
+            now = time.time()
+            with self.__connection:
+                self.__connection.executemany(
+                    "UPDATE parameters SET last_access = ? WHERE key = ?",
+                    [(now, key_hash) for key_hash in found_hashes],
+                )
+        self.hits += len(found)
+        self.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, items):
+        """
+        Store several entries, evicting the least recently used entries if the
+        maximum number of entries is exceeded.
+
+        :param items: Iterable of ``(key, value)`` pairs. Values are dictionaries
+            of arrays or floats, or other objects with an ``items()`` method.
+        """
+        now = time.time()
+        with self.__connection:
+            self.__connection.executemany(
+                "INSERT OR REPLACE INTO parameters (key, layout, value, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (self.hash_key(key), *self._serialize(value), now)
+                    for key, value in items
+                ],
+            )
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self.__connection.execute(
+                    "DELETE FROM parameters WHERE key IN "
+                    "(SELECT key FROM parameters ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        with self.__connection:
+            self.__connection.execute("DELETE FROM parameters")
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        """
+        Close the connection to the SQLite file.
+        """
+        self.__connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def info(self):
+        """
+        :return: A dictionary with the number of ``hits``, ``misses`` and
+            ``entries`` of the cache.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
@@ -0,0 +1,380 @@
+import warnings
+
+import numpy as np
+import scipy.linalg
+import scipy.sparse
+import scipy.sparse.linalg
+
+from rtctools_channel_flow.calculate_parameters import LINEARISED_SV_MIN_LEVEL_NODES
+
+
+class StateSpace:
+    """
+    Affine continuous-time state-space model
+
+    .. math::
+
+        \\dot{x} = A x + B u + f, \\qquad y = C x + D u + g
+
+    The matrices ``A``, ``B``, ``C`` and ``D`` are scipy CSR matrices, and the
+    offsets ``f`` and ``g`` are arrays. The names of the states, inputs and
+    outputs are kept in ``states``, ``inputs`` and ``outputs``.
+    """
+
+    __slots__ = ("A", "B", "C", "D", "f", "g", "states", "inputs", "outputs")
+
+    def __init__(self, A, B, C, D, f, g, states, inputs, outputs):
+        self.A = scipy.sparse.csr_matrix(A)
+        self.B = scipy.sparse.csr_matrix(B)
+        self.C = scipy.sparse.csr_matrix(C)
+        self.D = scipy.sparse.csr_matrix(D)
+        self.f = np.asarray(f, dtype=float)
+        self.g = np.asarray(g, dtype=float)
+        self.states = list(states)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+
+    @property
+    def n_states(self):
+        return self.A.shape[0]
+
+    @property
+    def n_inputs(self):
+        return self.B.shape[1]
+
+    @property
+    def n_outputs(self):
+        return self.C.shape[0]
+
+    def input_index(self, name):
+        return self.inputs.index(name)
+
+    def output_index(self, name):
+        return self.outputs.index(name)
+
+
+def linear_sv_state_space(
+    n_level_nodes,
+    length,
+    width,
+    q_nominal,
+    h_b_up,
+    h_b_down,
+    y_nominal,
+    y_nominal_down,
+    T0,
+    V0,
+    Delta,
+    Gamma,
+    C0,
+    density_water=1000.0,
+    name="branch",
+):
+    """
+    Assemble the state-space model of a LinearisedSV branch.
+
+    The equations are those of ``Deltares.ChannelFlow.Hydraulic.Branches.LinearisedSV``
+    with the coefficients fixed. The states are the relative flows
+    ``Q_relative[2:n_level_nodes]`` and the relative cross sections at the level
+    nodes.
+
+    Parameters
+    ----------
+    n_level_nodes : int
+        Number of water level nodes, at least ``LINEARISED_SV_MIN_LEVEL_NODES``.
+    length, width, q_nominal, h_b_up, h_b_down, y_nominal, y_nominal_down : float
+        Branch geometry and nominal values, see :class:`GetLinearSVVariables`.
+        ``y_nominal`` and ``y_nominal_down`` are the nominal depths.
+    T0, V0, Delta, Gamma, C0 : array_like of float
+        Linearisation coefficients of the branch, e.g. from
+        :func:`linearised_sv_results`.
+    density_water : float, default=1000.0
+        Density of water [kg/m³].
+    name : str, default="branch"
+        Name of the branch, used as prefix of the state, input and output names.
+
+    Returns
+    -------
+    StateSpace
+        Model with the inputs:
+
+        - ``name.Q_up``: flow into the branch at the upstream end [m³/s],
+        - ``name.Q_down``: flow out of the branch at the downstream end [m³/s],
+        - ``name.Q_lateral``: lateral inflow, distributed evenly over the level
+          nodes as by the default ``QLateral_map`` [m³/s],
+        - ``name.wind_stress``: wind stress along the branch [N/m²],
+
+        and the outputs ``name.H[i]``, the water levels at the level nodes, and
+        ``name.Q[i]``, the flows at the flow nodes. For the nominal flow at both
+        ends and no lateral inflow or wind, the zero state is a steady state.
+    """
+    n = int(n_level_nodes)
+    if n < LINEARISED_SV_MIN_LEVEL_NODES:
+        raise ValueError(
+            f"A LinearisedSV state-space model needs at least "
+            f"{LINEARISED_SV_MIN_LEVEL_NODES} level nodes, got {n}."
+        )
+    T0, V0, Delta, Gamma, C0 = (
+        np.asarray(values, dtype=float) for values in (T0, V0, Delta, Gamma, C0)
+    )
+    dx = length / (n - 1)
+
+    # States: Q_relative[2:n] at 0 .. n - 2, cross sections at n - 1 .. 2n - 2
+    n_states = 2 * n - 1
+    Q_UP, Q_DOWN, Q_LATERAL, WIND = range(4)
+    A = scipy.sparse.lil_matrix((n_states, n_states))
+    B = scipy.sparse.lil_matrix((n_states, 4))
+    f = np.zeros(n_states)
+
+    def flow(row, k, coefficient):
+        # Add coefficient * Q_relative[k] (1-based) to a row
+        if k == 1:
+            B[row, Q_UP] += coefficient
+            f[row] -= coefficient * q_nominal
+        elif k == n + 1:
+            B[row, Q_DOWN] += coefficient
+            f[row] -= coefficient * q_nominal
+        else:
+            A[row, k - 2] += coefficient
+
+    def level(row, k, coefficient):
+        # Add coefficient * Y_relative[k] (1-based) to a row
+        A[row, n - 2 + k] += coefficient / T0[k - 1]
+
+    # Momentum equations
+    for k in range(2, n + 1):
+        row = k - 2
+        v = V0[2 * k - 3]
+        dx_q = (1.5 if k in (2, n) else 2.0) * dx
+        pressure = (C0[k - 1] ** 2 - v**2) * (T0[k - 2] + T0[k - 1]) / 2 / dx
+        flow(row, k + 1, -2 * v / dx_q)
+        flow(row, k - 1, 2 * v / dx_q)
+        flow(row, k, -Delta[k - 1])
+        level(row, k, -pressure + Gamma[k - 1] / 2)
+        level(row, k - 1, pressure + Gamma[k - 2] / 2)
+        B[row, WIND] = width / density_water
+
+    # Mass balance equations, with half cells at the boundaries
+    for k in range(1, n + 1):
+        row = n - 2 + k
+        scale = (2.0 if k in (1, n) else 1.0) / dx
+        flow(row, k + 1, -scale)
+        flow(row, k, scale)
+        B[row, Q_LATERAL] = scale / n
+
+    # Outputs: levels at the level nodes, flows at the flow nodes
+    C = scipy.sparse.lil_matrix((2 * n + 1, n_states))
+    D = scipy.sparse.lil_matrix((2 * n + 1, 4))
+    g = np.zeros(2 * n + 1)
+    for k in range(1, n + 1):
+        C[k - 1, n - 2 + k] = 1 / T0[k - 1]
+    g[:n] = np.linspace(y_nominal, y_nominal_down, n) + np.linspace(h_b_up, h_b_down, n)
+    D[n, Q_UP] = 1.0
+    for k in range(2, n + 1):
+        C[n + k - 1, k - 2] = 1.0
+        g[n + k - 1] = q_nominal
+    D[2 * n, Q_DOWN] = 1.0
+
+    return StateSpace(
+        A,
+        B,
+        C,
+        D,
+        f,
+        g,
+        states=[f"{name}.Q_relative[{k}]" for k in range(2, n + 1)]
+        + [f"{name}._cross_section[{k}]" for k in range(1, n + 1)],
+        inputs=[f"{name}.{u}" for u in ("Q_up", "Q_down", "Q_lateral", "wind_stress")],
+        outputs=[f"{name}.H[{k}]" for k in range(1, n + 1)]
+        + [f"{name}.Q[{k}]" for k in range(1, n + 2)],
+    )
+
+
+def linear_sv_chain_state_space(branches):
+    """
+    Assemble the state-space model of a chain of LinearisedSV branches, in which
+    the downstream end of each branch is connected to the upstream end of the
+    next.
+
+    At every junction, the flow out of one branch enters the next, and the water
+    levels are equal. The junction flows are eliminated with the time derivative
+    of the level condition, so the levels at a junction remain equal if they are
+    equal initially, e.g. for the zero state of branches with matching nominal
+    levels.
+
+    Parameters
+    ----------
+    branches : list of StateSpace
+        Models of the branches, from upstream to downstream, as returned by
+        :func:`linear_sv_state_space`.
+
+    Returns
+    -------
+    StateSpace
+        Model with the states and outputs of all branches, and as inputs the
+        upstream flow of the first branch, the downstream flow of the last
+        branch, and the lateral inflow and wind stress of every branch.
+    """
+    if not branches:
+        raise ValueError("A chain needs at least one branch.")
+
+    A = scipy.sparse.block_diag([b.A for b in branches], format="csr")
+    B = scipy.sparse.block_diag([b.B for b in branches], format="csr")
+    C = scipy.sparse.block_diag([b.C for b in branches], format="csr")
+    D = scipy.sparse.block_diag([b.D for b in branches], format="csr")
+    f = np.concatenate([b.f for b in branches])
+    g = np.concatenate([b.g for b in branches])
+
+    # Branch inputs u = S U + J q, with U the inputs of the chain and q the
+    # junction flows
+    input_offsets = np.cumsum([0] + [b.n_inputs for b in branches])
+    output_offsets = np.cumsum([0] + [b.n_outputs for b in branches])
+    n_junctions = len(branches) - 1
+    chain_inputs = [branches[0].inputs[0], branches[-1].inputs[1]]
+    selected = [input_offsets[0], input_offsets[-2] + 1]
+    for i, b in enumerate(branches):
+        for j in range(2, b.n_inputs):
+            chain_inputs.append(b.inputs[j])
+            selected.append(input_offsets[i] + j)
+    S = scipy.sparse.csr_matrix(
+        (np.ones(len(selected)), (selected, np.arange(len(selected)))),
+        shape=(input_offsets[-1], len(selected)),
+    )
+    if n_junctions == 0:
+        return StateSpace(
+            A,
+            B @ S,
+            C,
+            D @ S,
+            f,
+            g,
+            branches[0].states,
+            chain_inputs,
+            branches[0].outputs,
+        )
+
+    rows = []
+    for i in range(n_junctions):
+        # Q_down of the upstream branch and Q_up of the downstream branch
+        rows += [input_offsets[i] + 1, input_offsets[i + 1]]
+    J = scipy.sparse.csr_matrix(
+        (np.ones(2 * n_junctions), (rows, np.repeat(np.arange(n_junctions), 2))),
+        shape=(input_offsets[-1], n_junctions),
+    )
+
+    # Level condition at each junction: last level of the upstream branch minus
+    # first level of the downstream branch
+    levels = []
+    for i in range(n_junctions):
+        n_up = (branches[i].n_outputs - 1) // 2
+        levels.append((output_offsets[i] + n_up - 1, output_offsets[i + 1]))
+    M = scipy.sparse.vstack([C[up] - C[down] for up, down in levels], format="csr")
+
+    # d/dt (M x) = M (A x + B S U + B J q + f) = 0, solved for q = -G (...)
+    MBJ = (M @ B @ J).tocsc()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", scipy.sparse.linalg.MatrixRankWarning)
+            G = scipy.sparse.csr_matrix(scipy.sparse.linalg.spsolve(MBJ, M.tocsc()))
+    except (RuntimeError, scipy.sparse.linalg.MatrixRankWarning):
+        G = None
+    # The junction flows are only determined if they change the level differences,
+    # which is not the case for branches without storage at their ends
+    if G is None or not np.all(np.isfinite(G.data)):
+        raise ValueError(
+            "The junction flows of the chain cannot be eliminated, as the levels "
+            "at the junctions do not depend on them."
+        )
+    if G.shape != M.shape:
+        G = G.reshape(M.shape)
+    K = -(G @ A)
+    L = -(G @ B @ S)
+    c = -(G @ f)
+
+    BJ = B @ J
+    DJ = D @ J
+    return StateSpace(
+        A + BJ @ K,
+        B @ S + BJ @ L,
+        C + DJ @ K,
+        D @ S + DJ @ L,
+        f + BJ @ c,
+        g + DJ @ c,
+        [state for b in branches for state in b.states],
+        chain_inputs,
+        [output for b in branches for output in b.outputs],
+    )
+
+
+class ExponentialIntegrator:
+    """
+    Exact simulation of a :class:`StateSpace` model for inputs that are constant
+    over each time step (zero-order hold).
+
+    The model is discretized once, with the matrix exponential of the augmented
+    matrix ``[[A, B, f], [0, 0, 0]] * dt``. Simulations then only need matrix
+    products, and many scenarios are propagated together.
+
+    :param model: The :class:`StateSpace` model.
+    :param dt: Time step [s].
+    """
+
+    def __init__(self, model, dt):
+        if not dt > 0:
+            raise ValueError(f"Time step must be positive, got {dt}.")
+        self.model = model
+        self.dt = float(dt)
+        n_x, n_u = model.n_states, model.n_inputs
+        augmented = np.zeros((n_x + n_u + 1, n_x + n_u + 1))
+        augmented[:n_x, :n_x] = model.A.toarray()
+        augmented[:n_x, n_x : n_x + n_u] = model.B.toarray()
+        augmented[:n_x, -1] = model.f
+        discrete = scipy.linalg.expm(augmented * self.dt)
+        self.Ad = discrete[:n_x, :n_x]
+        self.Bd = discrete[:n_x, n_x : n_x + n_u]
+        self.fd = discrete[:n_x, -1]
+
+    def simulate(self, u, x0=None):
+        """
+        Simulate one or more scenarios.
+
+        :param u: Inputs, an array of shape ``(n_steps, n_inputs)`` or, for a
+            batch of scenarios, ``(n_scenarios, n_steps, n_inputs)``. Input
+            ``u[..., k, :]`` holds from time ``k * dt`` to ``(k + 1) * dt``.
+        :param x0: Initial states, of shape ``(n_states,)`` or ``(n_scenarios,
+            n_states)``. Default is the zero state.
+
+        :return: Tuple ``(x, y)`` with the states and outputs at the times ``0,
+            dt, ..., n_steps * dt``, of shapes ``(..., n_steps + 1, n_states)``
+            and ``(..., n_steps + 1, n_outputs)``. The outputs at the last time
+            use the inputs of the last step.
+        """
+        u = np.asarray(u, dtype=float)
+        single = u.ndim == 2
+        if single:
+            u = u[None]
+        n_scenarios, n_steps, n_u = u.shape
+        if n_u != self.model.n_inputs:
+            raise ValueError(f"Expected {self.model.n_inputs} inputs, got {n_u}.")
+
+        n_x = self.model.n_states
+        # Time-major storage, so that the states of each step are contiguous
+        x = np.empty((n_steps + 1, n_scenarios, n_x))
+        x[0] = 0.0 if x0 is None else x0
+        # The input terms of all steps at once
+        u_steps = np.ascontiguousarray(u.transpose(1, 0, 2)).reshape(-1, n_u)
+        forcing = (u_steps @ self.Bd.T + self.fd).reshape(n_steps, n_scenarios, n_x)
+        Ad_T = np.ascontiguousarray(self.Ad.T)
+        for k in range(n_steps):
+            np.matmul(x[k], Ad_T, out=x[k + 1])
+            x[k + 1] += forcing[k]
+
+        u_held = np.concatenate([u_steps, u_steps[-n_scenarios:]])
+        y = (
+            self.model.C @ x.reshape(-1, n_x).T + self.model.D @ u_held.T
+        ).T + self.model.g
+        x = x.transpose(1, 0, 2)
+        y = y.reshape(n_steps + 1, n_scenarios, -1).transpose(1, 0, 2)
+        if single:
+            return x[0], y[0]
+        return x, y
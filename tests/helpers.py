@@ -0,0 +1,241 @@
+"""
+Synthetic channel networks shared by the tests and the benchmarks.
+
+The parameter setting mixin is run on top of a minimal base class that only
+provides the model parameters, so that no Modelica model needs to be compiled.
+"""
+
+import numpy as np
+from rtctools.optimization.timeseries import Timeseries
+
+from rtctools_channel_flow.calculate_parameters import linearised_sv_results
+from rtctools_channel_flow.channel_flow_parameter_setting import (
+    ChannelFlowParameterSettingOpimizationMixin,
+)
+from rtctools_channel_flow.state_space import linear_sv_state_space
+
+LINEAR_SV_PARAMETER_NAMES = {
+    "n_level_nodes": "n_level_nodes",
+    "length": "length",
+    "h_b_up": "H_b_up",
+    "h_b_down": "H_b_down",
+    "q_nominal": "Q_nominal",
+    "width": "width",
+    "y_nominal": "H_nominal",
+    "y_nominal_down": "H_nominal_down",
+    "friction_coefficient": "friction_coefficient",
+}
+
+IDZ_PARAMETER_NAMES = {
+    "length": "length",
+    "h_b_up": "H_b_up",
+    "h_b_down": "H_b_down",
+    "q_nominal": "Q_nominal",
+    "width": "width",
+    "y_nominal": "H_nominal",
+    "side_slope": "side_slope",
+    "friction_coefficient": "friction_coefficient",
+}
+
+
+def linear_sv_inputs(n_branches, n_level_nodes, seed=0):
+    """
+    Inputs of :func:`linearised_sv_variables` for branches with random
+    geometry, as arrays with one entry per branch.
+    """
+    rng = np.random.default_rng(seed)
+    h_b_up = rng.uniform(-5.0, 0.0, n_branches)
+    return {
+        "n_level_nodes": np.full(n_branches, n_level_nodes),
+        "length": rng.uniform(1000.0, 20000.0, n_branches),
+        "h_b_up": h_b_up,
+        "h_b_down": h_b_up - rng.uniform(0.0, 2.0, n_branches),
+        "q_nominal": rng.uniform(1.0, 200.0, n_branches),
+        "width": rng.uniform(5.0, 100.0, n_branches),
+        "y_nominal": rng.uniform(1.0, 5.0, n_branches),
+        "y_nominal_down": rng.uniform(1.0, 5.0, n_branches),
+        "friction_coefficient": rng.uniform(0.02, 0.05, n_branches),
+    }
+
+
+def idz_inputs(n_branches, shape="trapezoidal", seed=0):
+    """
+    Inputs of :func:`idz_variables_batch` for branches with random geometry, as
+    arrays with one entry per branch. For circular branches, the width is the
+    radius and the side slope is zero.
+    """
+    rng = np.random.default_rng(seed)
+    length = rng.uniform(1000.0, 20000.0, n_branches)
+    h_b_up = rng.uniform(-5.0, 0.0, n_branches)
+    h_b_down = h_b_up - rng.uniform(0.1, 2.0, n_branches)
+    friction_coefficient = rng.uniform(0.02, 0.05, n_branches)
+    if shape == "trapezoidal":
+        width = rng.uniform(5.0, 50.0, n_branches)
+        depth = rng.uniform(1.0, 5.0, n_branches)
+        side_slope = rng.uniform(0.5, 2.0, n_branches)
+        q_nominal = rng.uniform(1.0, 100.0, n_branches)
+    else:
+        width = rng.uniform(0.5, 2.0, n_branches)
+        depth = rng.uniform(0.2, 1.6, n_branches) * width
+        side_slope = np.zeros(n_branches)
+        # A fraction of the Manning discharge of the full pipe
+        full_capacity = (
+            np.pi
+            * width**2
+            * (width / 2) ** (2 / 3)
+            * np.sqrt((h_b_up - h_b_down) / length)
+            / friction_coefficient
+        )
+        q_nominal = rng.uniform(0.1, 0.8, n_branches) * full_capacity
+    return {
+        "length": length,
+        "h_b_up": h_b_up,
+        "h_b_down": h_b_down,
+        "q_nominal": q_nominal,
+        "width": width,
+        "y_nominal": h_b_down + depth,
+        "side_slope": side_slope,
+        "friction_coefficient": friction_coefficient,
+    }
+
+
+def idz_fun_arguments(inputs, shape="trapezoidal"):
+    """
+    Convert the inputs of :func:`idz_inputs` to the arguments ``q, n, B, m, Sb,
+    Y0, L, shape`` of :func:`IdzFun`, as arrays with one entry per branch.
+    """
+    return (
+        inputs["q_nominal"],
+        inputs["friction_coefficient"],
+        inputs["width"],
+        inputs["side_slope"],
+        (inputs["h_b_up"] - inputs["h_b_down"]) / inputs["length"],
+        inputs["y_nominal"] - inputs["h_b_down"],
+        inputs["length"],
+        np.full(len(inputs["length"]), 0 if shape == "trapezoidal" else 1),
+    )
+
+
+def branch_parameters(prefix, inputs, names):
+    """
+    Model parameters of a set of branches named ``prefix0``, ``prefix1``, ...
+
+    :param inputs: Dictionary of per-branch input arrays.
+    :param names: Dictionary mapping the input names to parameter names.
+    """
+    p = {}
+    for name, values in inputs.items():
+        for i, value in enumerate(values.tolist()):
+            p[f"{prefix}{i}.{names[name]}"] = value
+    return p
+
+
+def linear_sv_network(n_branches, n_level_nodes, seed=0):
+    """
+    Parameters of a network of LinearisedSV branches with random geometry.
+    """
+    return branch_parameters(
+        "sv",
+        linear_sv_inputs(n_branches, n_level_nodes, seed),
+        LINEAR_SV_PARAMETER_NAMES,
+    )
+
+
+def chain_models(n_branches, n_level_nodes=10):
+    """
+    State-space models of synthetic LinearisedSV branches.
+    """
+    inputs = linear_sv_inputs(n_branches, n_level_nodes)
+    # Nominal velocities of at most 0.5 m/s, so that the flow is subcritical and
+    # the linearized branches are stable
+    depth = np.minimum(inputs["y_nominal"], inputs["y_nominal_down"])
+    inputs["q_nominal"] = np.minimum(inputs["q_nominal"], 0.5 * inputs["width"] * depth)
+    results = linearised_sv_results(**inputs)
+    geometry = (
+        "length",
+        "width",
+        "q_nominal",
+        "h_b_up",
+        "h_b_down",
+        "y_nominal",
+        "y_nominal_down",
+    )
+    return [
+        linear_sv_state_space(
+            n_level_nodes,
+            **{name: inputs[name][i] for name in geometry},
+            **dict(result.items()),
+            name=f"branch{i}",
+        )
+        for i, result in enumerate(results)
+    ]
+
+
+def idz_network(n_branches, seed=0):
+    """
+    Parameters of a network of trapezoidal IDZ branches with random geometry.
+    """
+    return branch_parameters(
+        "idz", idz_inputs(n_branches, seed=seed), IDZ_PARAMETER_NAMES
+    )
+
+
+class ParameterBase:
+    """
+    Stand-in for the optimization problem classes the mixin is used with.
+
+    Timeseries are given as arrays of values at ``times``, hourly by default,
+    or as two-dimensional arrays with a row per ensemble member.
+    """
+
+    ensemble_size = 1
+
+    def __init__(self, parameters, timeseries=None, times=None):
+        self._parameters = parameters
+        self._timeseries = {} if timeseries is None else timeseries
+        self._times = np.arange(3) * 3600.0 if times is None else np.asarray(times)
+
+    @property
+    def initial_time(self):
+        return self._times[0]
+
+    def times(self, variable=None):
+        return self._times
+
+    def __values(self, variable, ensemble_member):
+        values = np.asarray(self._timeseries[variable])
+        return values[ensemble_member] if values.ndim == 2 else values
+
+    def timeseries_at(self, variable, t, ensemble_member=0):
+        return np.interp(t, self._times, self.__values(variable, ensemble_member))
+
+    def get_timeseries(self, variable, ensemble_member=0):
+        return Timeseries(self._times, self.__values(variable, ensemble_member))
+
+    def interpolate(self, t, ts, fs, f_left=np.nan, f_right=np.nan, mode=0):
+        return np.interp(t, ts, fs, left=f_left, right=f_right)
+
+    def bounds(self):
+        return {}
+
+    def parameters(self, ensemble_member):
+        return dict(self._parameters)
+
+    def pre(self):
+        pass
+
+    def post(self):
+        pass
+
+
+def make_problem(parameters, timeseries=None, times=None, **attributes):
+    """
+    Instantiate the parameter setting mixin on top of :class:`ParameterBase`.
+    Class attributes of the mixin are passed as keyword arguments.
+    """
+    cls = type(
+        "Problem",
+        (ChannelFlowParameterSettingOpimizationMixin, ParameterBase),
+        attributes,
+    )
+    return cls(parameters, timeseries=timeseries, times=times)
@@ -0,0 +1,73 @@
+"""
+Loading the branch geometry from the model parameters.
+"""
+
+import numpy as np
+import pytest
+
+from tests.helpers import idz_network, linear_sv_network, make_problem
+
+from rtctools_channel_flow.branch_geometry import (
+    IDZ_COLUMNS,
+    LINEARISED_SV_COLUMNS,
+    BranchGeometryTable,
+)
+
+BRANCHES = ["sv0", "sv1", "sv2"]
+
+
+def test_load_reads_all_columns():
+    p = linear_sv_network(len(BRANCHES), 6)
+    table = BranchGeometryTable(BRANCHES, LINEARISED_SV_COLUMNS).load(p)
+    assert len(table) == len(BRANCHES)
+    assert table.data.shape == (len(LINEARISED_SV_COLUMNS), len(BRANCHES))
+    assert table.data.dtype == np.float64
+    for i, (name, suffix) in enumerate(LINEARISED_SV_COLUMNS.items()):
+        expected = [p[branch + suffix] for branch in BRANCHES]
+        np.testing.assert_array_equal(table[name], expected)
+        np.testing.assert_array_equal(table.data[i], expected)
+
+
+def test_inputs_convert_counts_to_integers():
+    p = linear_sv_network(len(BRANCHES), 6)
+    inputs = BranchGeometryTable(BRANCHES, LINEARISED_SV_COLUMNS).load(p).inputs()
+    assert list(inputs.keys()) == list(LINEARISED_SV_COLUMNS.keys())
+    assert inputs["n_level_nodes"].dtype.kind == "i"
+    np.testing.assert_array_equal(inputs["n_level_nodes"], 6)
+    assert inputs["length"].dtype == np.float64
+
+
+def test_load_allocates_new_block():
+    p = linear_sv_network(len(BRANCHES), 6)
+    table = BranchGeometryTable(BRANCHES, LINEARISED_SV_COLUMNS)
+    length = table.load(p)["length"]
+    p["sv0.length"] = 1.0
+    assert table.load(p)["length"][0] == 1.0
+    assert length[0] != 1.0
+
+
+def test_missing_parameter():
+    p = idz_network(2)
+    del p["idz1.side_slope"]
+    table = BranchGeometryTable(["idz0", "idz1"], IDZ_COLUMNS, "IDZ")
+    with pytest.raises(ValueError, match="Parameter idz1.side_slope is required"):
+        table.load(p)
+
+
+def test_mixin_reports_missing_parameter():
+    p = linear_sv_network(2, 6)
+    del p["sv0.width"]
+    problem = make_problem(p, linearised_sv=True, linearised_sv_branches=["sv0", "sv1"])
+    with pytest.raises(ValueError, match="required to set LinearisedSV parameters"):
+        problem.parameters(0)
+
+
+def test_mixin_rebuilds_table_when_branches_change():
+    p = linear_sv_network(len(BRANCHES), 6)
+    problem = make_problem(p, linearised_sv=True, linearised_sv_branches=BRANCHES[:2])
+    assert "sv2.T0[1]" not in problem.parameters(0)
+    problem.linearised_sv_branches = BRANCHES
+    reference = make_problem(
+        p, linearised_sv=True, linearised_sv_branches=BRANCHES
+    ).parameters(0)
+    assert problem.parameters(0) == reference
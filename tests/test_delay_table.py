@@ -0,0 +1,71 @@
+"""
+Per-branch tables of discrete IDZ delays.
+"""
+
+from rtctools_channel_flow.calculate_parameters import idz_discrete_delay
+from rtctools_channel_flow.delay_table import DelayTable
+
+STEP = 600.0
+BRANCHES = ["a", "b", "c"]
+DELAYS = [0.0, 2.25 * STEP, 5 * STEP]
+
+
+def test_update_matches_idz_discrete_delay():
+    table = DelayTable(STEP)
+    shift, weight = table.update(BRANCHES, DELAYS)
+
+    expected_shift, expected_weight = idz_discrete_delay(DELAYS, STEP)
+    assert shift.tolist() == expected_shift.tolist()
+    assert weight.tolist() == expected_weight.tolist()
+    assert table["b"] == (2.25 * STEP, 2, 0.25)
+    assert "c" in table and "d" not in table
+
+
+def test_update_only_converts_changed_delays():
+    table = DelayTable(STEP)
+    table.update(BRANCHES, DELAYS)
+    assert table.info() == {"hits": 0, "misses": 3, "entries": 3}
+
+    table.update(BRANCHES, DELAYS)
+    assert table.info() == {"hits": 3, "misses": 3, "entries": 3}
+
+    shift, weight = table.update(BRANCHES, [0.0, 3.5 * STEP, 5 * STEP])
+    assert table.info() == {"hits": 5, "misses": 4, "entries": 3}
+    assert shift.tolist() == [0, 3, 5]
+    assert weight.tolist() == [0.0, 0.5, 0.0]
+
+    # Branches are kept when they are not part of an update
+    table.update(["d"], [STEP])
+    assert table.info() == {"hits": 5, "misses": 5, "entries": 4}
+
+    table.clear()
+    assert table.info() == {"hits": 0, "misses": 0, "entries": 0}
+
+
+def test_indices_clamp_at_start():
+    table = DelayTable(STEP)
+    table.update(BRANCHES, DELAYS)
+
+    before, previous, weight = table.indices("b", 6)
+    assert before.tolist() == [0, 0, 0, 1, 2, 3]
+    assert previous.tolist() == [0, 0, 0, 0, 1, 2]
+    assert weight == 0.25
+
+    before, previous, weight = table.indices("a", 3)
+    assert before.tolist() == [0, 1, 2]
+    assert weight == 0.0
+
+    # A delay beyond the horizon refers to the first time only
+    before, previous, _ = table.indices("c", 4)
+    assert before.tolist() == [0, 0, 0, 0]
+    assert previous.tolist() == [0, 0, 0, 0]
+
+
+def test_rounded_table():
+    table = DelayTable(STEP, fractional=False)
+    shift, weight = table.update(BRANCHES, DELAYS)
+    assert shift.tolist() == [0, 2, 5]
+    assert weight.tolist() == [0.0, 0.0, 0.0]
+    assert table.matches(STEP, False)
+    assert not table.matches(STEP, True)
+    assert not table.matches(2 * STEP, False)
@@ -0,0 +1,114 @@
+"""
+Diagnostics of the IDZ computation and their export to CSV and npz files.
+"""
+
+import csv
+
+import numpy as np
+import pytest
+
+from tests.helpers import idz_inputs, idz_network, make_problem
+
+from rtctools_channel_flow.calculate_parameters import (
+    IDZ_DIAGNOSTICS_FIELDS,
+    IDZ_REGIME_BACKWATER,
+    IDZ_REGIME_UNIFORM_BACKWATER,
+    GetIDZVariables,
+    idz_diagnostics_batch,
+    idz_variables_batch,
+    save_idz_diagnostics,
+)
+
+N_BRANCHES = 20
+FIELDS = [name for name, _ in IDZ_DIAGNOSTICS_FIELDS]
+
+
+def assert_diagnostics_equal(actual, desired):
+    # Compared per field, as structured arrays with NaN never compare equal
+    for name in FIELDS:
+        np.testing.assert_array_equal(actual[name], desired[name], err_msg=name)
+
+
+def test_diagnostics_match_idz_intermediates():
+    inputs = idz_inputs(N_BRANCHES)
+    diagnostics = idz_diagnostics_batch(**inputs)
+    parameters = idz_variables_batch(**inputs, keep_intermediates=True)
+
+    assert list(diagnostics.dtype.names) == FIELDS
+    assert len(diagnostics) == N_BRANCHES
+    for name in ("yn", "x2", "tu", "td"):
+        np.testing.assert_array_equal(diagnostics[name], parameters[name])
+    assert set(diagnostics["regime"]) <= {
+        IDZ_REGIME_BACKWATER,
+        IDZ_REGIME_UNIFORM_BACKWATER,
+    }
+    # Only branches with a uniform flow section have its Froude number
+    uniform = diagnostics["regime"] == IDZ_REGIME_UNIFORM_BACKWATER
+    assert np.all(np.isfinite(diagnostics["froude_uniform"][uniform]))
+    assert np.all(np.isnan(diagnostics["froude_uniform"][~uniform]))
+
+
+def test_single_branch_diagnostics():
+    inputs = idz_inputs(3)
+    diagnostics = idz_diagnostics_batch(**inputs)
+    for i in range(3):
+        branch = GetIDZVariables(
+            **{name: float(values[i]) for name, values in inputs.items()}
+        )
+        assert_diagnostics_equal(branch.diagnostics(), diagnostics[i : i + 1])
+
+
+def test_branch_names():
+    diagnostics = idz_diagnostics_batch(**idz_inputs(2), branches=["a", "bc"])
+    assert diagnostics.dtype.names == ("branch", *FIELDS)
+    assert diagnostics["branch"].tolist() == ["a", "bc"]
+    with pytest.raises(ValueError, match="Got 1 branch names for 2 branches"):
+        idz_diagnostics_batch(**idz_inputs(2), branches=["a"])
+
+
+def test_save_csv(tmp_path):
+    diagnostics = idz_diagnostics_batch(
+        **idz_inputs(N_BRANCHES), branches=[f"idz{i}" for i in range(N_BRANCHES)]
+    )
+    path = tmp_path / "diagnostics.csv"
+    save_idz_diagnostics(path, diagnostics)
+
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["branch", *FIELDS]
+    assert len(rows) == N_BRANCHES + 1
+    for row, expected in zip(rows[1:], diagnostics):
+        assert row[0] == expected["branch"]
+        for name, value in zip(FIELDS, row[1:]):
+            np.testing.assert_equal(float(value), expected[name])
+
+
+def test_save_npz(tmp_path):
+    diagnostics = idz_diagnostics_batch(**idz_inputs(N_BRANCHES))
+    path = tmp_path / "diagnostics.npz"
+    save_idz_diagnostics(str(path), diagnostics)
+
+    with np.load(path) as archive:
+        assert sorted(archive.files) == sorted(FIELDS)
+        for name in FIELDS:
+            assert archive[name].dtype == diagnostics[name].dtype
+            np.testing.assert_array_equal(archive[name], diagnostics[name])
+
+
+def test_save_unsupported_format(tmp_path):
+    diagnostics = idz_diagnostics_batch(**idz_inputs(2))
+    with pytest.raises(ValueError, match="use a .csv or .npz file"):
+        save_idz_diagnostics(tmp_path / "diagnostics.parquet", diagnostics)
+
+
+def test_mixin_diagnostics():
+    branches = [f"idz{i}" for i in range(4)]
+    problem = make_problem(idz_network(4), idz=True, idz_branches=branches)
+    diagnostics = problem.idz_diagnostics()
+    assert diagnostics["branch"].tolist() == branches
+    assert_diagnostics_equal(diagnostics, idz_diagnostics_batch(**idz_inputs(4)))
+
+
+def test_mixin_diagnostics_without_idz():
+    with pytest.raises(ValueError, match="only available if idz is True"):
+        make_problem(idz_network(1)).idz_diagnostics()
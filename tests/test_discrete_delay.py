@@ -0,0 +1,168 @@
+"""
+Discrete IDZ delays on the optimization time grid.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from tests.helpers import ParameterBase
+
+from rtctools_channel_flow.calculate_parameters import idz_discrete_delay
+from rtctools_channel_flow.channel_flow_parameter_setting import (
+    ChannelFlowParameterSettingOpimizationMixin,
+)
+
+STEP = 600.0
+TIMES = np.arange(12) * STEP
+FLOWS = {
+    "idz0.HQUp.Q": 10.0 + 5.0 * np.sin(TIMES / 2000.0),
+    "idz0.HQDown.Q": -(8.0 + np.cos(TIMES / 3000.0)),
+}
+
+
+class CollocationBase(ParameterBase):
+    """
+    Stand-in for the collocated states of an optimization problem, with the
+    values of ``FLOWS`` and the delayed flows set by the test.
+    """
+
+    alias_relation = SimpleNamespace(canonical_signed=lambda variable: (variable, 1))
+
+    def __init__(self, delay, delayed):
+        super().__init__({}, times=TIMES)
+        self.delay = delay
+        self.states = dict(FLOWS, **delayed)
+
+    def parameters(self, ensemble_member):
+        return {"idz0.Delay_in_hour": self.delay}
+
+    def variable_nominal(self, variable):
+        return 1.0
+
+    def state_vector(self, variable, ensemble_member=0):
+        return self.states[variable]
+
+    def constraints(self, ensemble_member):
+        return []
+
+
+class Problem(ChannelFlowParameterSettingOpimizationMixin, CollocationBase):
+    idz = True
+    idz_branches = ["idz0"]
+    idz_discrete_delay_branches = ["idz0"]
+
+    def parameters(self, ensemble_member):
+        # Skip the IDZ parameter computation, the delay is given
+        return CollocationBase.parameters(self, ensemble_member)
+
+
+def delayed_flows(delay):
+    return {
+        "idz0.Q_upstream_delayed": np.interp(
+            TIMES - delay, TIMES, FLOWS["idz0.HQUp.Q"], left=FLOWS["idz0.HQUp.Q"][0]
+        ),
+        "idz0.Q_downstream_delayed": np.interp(
+            TIMES - delay,
+            TIMES,
+            FLOWS["idz0.HQDown.Q"],
+            left=FLOWS["idz0.HQDown.Q"][0],
+        ),
+    }
+
+
+@pytest.mark.parametrize(
+    "delay, shift, weight",
+    [
+        (0.0, 0, 0.0),
+        (3 * STEP, 3, 0.0),
+        (3 * STEP * (1 + 1e-13), 3, 0.0),
+        (2.25 * STEP, 2, 0.25),
+        (0.5 * STEP, 0, 0.5),
+    ],
+)
+def test_shift_and_weight(delay, shift, weight):
+    shifts, weights = idz_discrete_delay([delay], STEP)
+    assert shifts.tolist() == [shift]
+    np.testing.assert_allclose(weights, [weight], atol=1e-12)
+
+
+def test_rounded_shift():
+    shifts, weights = idz_discrete_delay([2.25 * STEP, 2.75 * STEP], STEP, False)
+    assert shifts.tolist() == [2, 3]
+    assert weights.tolist() == [0.0, 0.0]
+
+
+@pytest.mark.parametrize(
+    "delay, step, message",
+    [
+        ([1.0], 0.0, "Time step"),
+        ([-1.0], STEP, "non-negative"),
+        ([np.nan], STEP, "finite"),
+    ],
+)
+def test_invalid_delay(delay, step, message):
+    with pytest.raises(ValueError, match=message):
+        idz_discrete_delay(delay, step)
+
+
+@pytest.mark.parametrize(
+    "delay",
+    [0.0, 3 * STEP, 2.25 * STEP, 0.5 * STEP, 20 * STEP],
+    ids=["zero", "integer", "fractional", "subgrid", "beyond-horizon"],
+)
+def test_constraints_match_interpolation(delay):
+    problem = Problem(delay, delayed_flows(delay))
+    constraints = problem.constraints(0)
+
+    assert len(constraints) == 2
+    for f, lower, upper in constraints:
+        np.testing.assert_allclose(f, 0.0, atol=1e-12)
+        assert np.all(lower == 0.0) and np.all(upper == 0.0)
+
+
+def test_constraints_without_fractional_delays_round_the_delay():
+    problem = Problem(2.25 * STEP, delayed_flows(2 * STEP))
+    problem.idz_discrete_delay_fractional = False
+    for f, _, _ in problem.constraints(0):
+        np.testing.assert_allclose(f, 0.0, atol=1e-12)
+
+
+def test_unknown_branch():
+    problem = Problem(STEP, delayed_flows(STEP))
+    problem.idz_discrete_delay_branches = ["idz0", "idz1"]
+    with pytest.raises(ValueError, match="idz1"):
+        problem.constraints(0)
+
+
+def test_non_equidistant_times():
+    problem = Problem(STEP, delayed_flows(STEP))
+    problem._times = np.array([0.0, STEP, 3 * STEP])
+    with pytest.raises(ValueError, match="equidistant"):
+        problem.constraints(0)
+
+
+def test_delay_table_is_reused():
+    problem = Problem(2.25 * STEP, delayed_flows(2.25 * STEP))
+    problem.constraints(0)
+    table = problem.idz_delay_table(0)
+    assert table.info() == {"hits": 1, "misses": 1, "entries": 1}
+
+    problem.delay = 3 * STEP
+    assert problem.idz_delay_table(0) is table
+    assert table["idz0"] == (3 * STEP, 3, 0.0)
+    assert table.info() == {"hits": 1, "misses": 2, "entries": 1}
+
+    # A new rounding mode needs a new table
+    problem.idz_discrete_delay_fractional = False
+    rounded = problem.idz_delay_table(0)
+    assert rounded is not table
+    assert rounded.info() == {"hits": 0, "misses": 1, "entries": 1}
+
+
+def test_delay_table_requires_idz():
+    problem = Problem(STEP, delayed_flows(STEP))
+    problem.idz = False
+    with pytest.raises(ValueError, match="only available if idz is True"):
+        problem.idz_delay_table(0)
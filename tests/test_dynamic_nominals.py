@@ -0,0 +1,140 @@
+"""
+Dynamic nominals of the LinearisedSV and IDZ branches.
+"""
+
+import numpy as np
+import pytest
+
+from tests.helpers import idz_network, linear_sv_network, make_problem
+
+from rtctools_channel_flow import channel_flow_parameter_setting
+
+N_BRANCHES = 4
+SV_BRANCHES = [f"sv{i}" for i in range(N_BRANCHES)]
+IDZ_BRANCHES = [f"idz{i}" for i in range(N_BRANCHES)]
+
+
+def linear_sv_problem(nominal_levels, timeseries=None, **attributes):
+    return make_problem(
+        linear_sv_network(N_BRANCHES, 6),
+        timeseries=timeseries,
+        linearised_sv=True,
+        linearised_sv_branches=SV_BRANCHES,
+        linearised_sv_use_dynamic_nominals=True,
+        linearised_sv_nominal_levels=nominal_levels,
+        **attributes,
+    )
+
+
+def idz_problem(nominal_levels, timeseries=None, **attributes):
+    return make_problem(
+        idz_network(N_BRANCHES),
+        timeseries=timeseries,
+        idz=True,
+        idz_branches=IDZ_BRANCHES,
+        idz_use_dynamic_nominals=True,
+        idz_nominal_levels=nominal_levels,
+        **attributes,
+    )
+
+
+def count_computed_branches(monkeypatch, name):
+    """
+    Wrap a module level branch computation and record the number of branches
+    computed per call.
+    """
+    counts = []
+    compute = getattr(channel_flow_parameter_setting, name)
+
+    def counting(inputs, *args, **kwargs):
+        counts.append(len(next(iter(inputs.values()))))
+        return compute(inputs, *args, **kwargs)
+
+    monkeypatch.setattr(channel_flow_parameter_setting, name, counting)
+    return counts
+
+
+def test_float_nominals_linearise_around_given_values():
+    nominal_levels = {"sv1": {"H_b_up": 2.5, "H_b_down": 2.0, "Q_nominal": 7.0}}
+    p = linear_sv_problem(nominal_levels).parameters(0)
+
+    parameters = linear_sv_network(N_BRANCHES, 6)
+    parameters.update({"sv1.H_nominal": 2.5, "sv1.H_nominal_down": 2.0})
+    parameters["sv1.Q_nominal"] = 7.0
+    reference = make_problem(
+        parameters, linearised_sv=True, linearised_sv_branches=SV_BRANCHES
+    ).parameters(0)
+
+    assert p["sv1.H_nominal"] == 2.5
+    assert p["sv1.H_nominal_down"] == 2.0
+    assert p["sv1.Q_nominal"] == 7.0
+    for name, value in reference.items():
+        np.testing.assert_equal(p[name], value)
+
+
+def test_branches_without_nominals_keep_model_values():
+    parameters = linear_sv_network(N_BRANCHES, 6)
+    p = linear_sv_problem({"sv1": {"Q_nominal": 7.0}}).parameters(0)
+    assert p["sv0.Q_nominal"] == parameters["sv0.Q_nominal"]
+    assert p["sv1.H_nominal"] == parameters["sv1.H_nominal"]
+
+
+def test_timeseries_nominals_use_value_at_initial_time():
+    timeseries = {"H_up": np.array([2.5, 3.0, 3.5])}
+    p = idz_problem({"idz2": {"H_nominal": "H_up"}}, timeseries).parameters(0)
+    reference = idz_problem({"idz2": {"H_nominal": 2.5}}).parameters(0)
+    assert p["idz2.H_nominal"] == 2.5
+    assert p == reference
+
+
+@pytest.mark.parametrize("cache", [True, False])
+def test_only_changed_branches_are_recomputed(monkeypatch, cache):
+    counts = count_computed_branches(monkeypatch, "_linear_sv_branch_parameters")
+    timeseries = {"Q": np.array([8.0, 8.0, 8.0])}
+    problem = linear_sv_problem(
+        {"sv0": {"Q_nominal": "Q"}, "sv2": {"H_b_up": 2.0}},
+        timeseries,
+        channel_flow_parameter_cache=cache,
+    )
+    first = problem.parameters(0)
+    problem.parameters(0)
+    timeseries["Q"] = np.array([9.0, 9.0, 9.0])
+    second = problem.parameters(0)
+    assert counts == [N_BRANCHES, 1]
+    assert second["sv0.V0[1]"] != first["sv0.V0[1]"]
+    for name in first:
+        if not name.startswith("sv0."):
+            assert second[name] == first[name]
+
+
+def test_only_changed_idz_branches_are_recomputed(monkeypatch):
+    counts = count_computed_branches(monkeypatch, "_idz_branch_parameters")
+    nominal_levels = {"idz1": {"H_nominal": 2.0}}
+    problem = idz_problem(nominal_levels, channel_flow_parameter_cache=False)
+    problem.parameters(0)
+    nominal_levels["idz1"]["H_nominal"] = 2.2
+    problem.parameters(0)
+    problem.parameters(0)
+    assert counts == [N_BRANCHES, 1]
+
+
+def test_missing_nominal_levels():
+    with pytest.raises(ValueError, match="idz_nominal_levels is not provided"):
+        idz_problem(None).parameters(0)
+
+
+def test_unknown_branch():
+    with pytest.raises(ValueError, match="not in the list of LinearisedSV branches"):
+        linear_sv_problem({"sv9": {"Q_nominal": 7.0}}).parameters(0)
+
+
+def test_unknown_nominal():
+    with pytest.raises(ValueError, match="Unknown nominal H_b_up for IDZ branch"):
+        idz_problem({"idz0": {"H_b_up": 2.0}}).parameters(0)
+
+
+@pytest.mark.parametrize("nominal", [np.nan, "H"])
+def test_non_finite_nominal(nominal):
+    timeseries = {"H": np.array([np.nan, 2.0, 2.0])}
+    with pytest.raises(ValueError, match="is not finite"):
+        idz_problem({"idz0": {"H_nominal": nominal}}, timeseries).parameters(0)
@@ -0,0 +1,112 @@
+"""
+Transfer matrices and step responses of IDZ branches compared with the
+equations of ``Deltares.ChannelFlow.Hydraulic.Branches.Internal.PartialIDZBase``.
+"""
+
+import numpy as np
+import pytest
+
+from tests.helpers import idz_inputs
+
+from rtctools_channel_flow.calculate_parameters import (
+    IDZ_PARAMETERS,
+    idz_variables_batch,
+)
+from rtctools_channel_flow.frequency_response import (
+    idz_step_response,
+    idz_transfer_matrix,
+)
+
+PARAMETERS = idz_variables_batch(**idz_inputs(5), keep_intermediates=True)
+OMEGA = np.logspace(-5, -1, 30)
+
+# Level, flow, area, gain and delay of each entry of the transfer matrix, after
+# der(HQUp.H) = HQUp.Q / Au + p11 * der(HQUp.Q)
+#     + Q_downstream_delayed / Au + p12 * der(Q_downstream_delayed)
+# der(HQDown.H) = Q_upstream_delayed / Ad + p21 * der(Q_upstream_delayed)
+#     + HQDown.Q / Ad + p22 * der(HQDown.Q)
+ENTRIES = {
+    (0, 0): ("Au", "p11", None),
+    (0, 1): ("Au", "p12", "tu"),
+    (1, 0): ("Ad", "p21", "td"),
+    (1, 1): ("Ad", "p22", None),
+}
+
+
+def delays(separate_delays):
+    if separate_delays:
+        return {"tu": PARAMETERS["tu"], "td": PARAMETERS["td"]}
+    return {"tu": PARAMETERS["Delay_in_hour"], "td": PARAMETERS["Delay_in_hour"]}
+
+
+@pytest.mark.parametrize("separate_delays", [False, True])
+def test_transfer_matrix_matches_idz_equations(separate_delays):
+    P = idz_transfer_matrix(OMEGA, PARAMETERS, separate_delays=separate_delays)
+    assert P.shape == (5, len(OMEGA), 2, 2)
+
+    tau = delays(separate_delays)
+    for i in range(5):
+        s = 1j * OMEGA
+        for (row, column), (area, gain, delay) in ENTRIES.items():
+            # Laplace transform of the equation: s H = Q / A + p s Q
+            shift = 1.0 if delay is None else np.exp(-s * tau[delay][i])
+            expected = (1 / (PARAMETERS[area][i] * s) + PARAMETERS[gain][i]) * shift
+            np.testing.assert_allclose(P[i, :, row, column], expected, rtol=1e-12)
+
+
+def test_delays_are_the_mean_of_the_wave_delays():
+    # The single delay of the IDZ block is the mean of the delays of the waves
+    # travelling upstream and downstream
+    np.testing.assert_allclose(
+        PARAMETERS["Delay_in_hour"],
+        (PARAMETERS["tu"] + PARAMETERS["td"]) / 2,
+    )
+    P = idz_transfer_matrix(OMEGA, PARAMETERS)
+    separate = idz_transfer_matrix(OMEGA, PARAMETERS, separate_delays=True)
+    np.testing.assert_allclose(P[..., 0, 0], separate[..., 0, 0])
+    np.testing.assert_allclose(P[..., 1, 1], separate[..., 1, 1])
+    np.testing.assert_allclose(
+        np.abs(P[..., 0, 1]), np.abs(separate[..., 0, 1]), rtol=1e-12
+    )
+
+
+@pytest.mark.parametrize("separate_delays", [False, True])
+def test_step_response_integrates_idz_equations(separate_delays):
+    times = np.linspace(0.0, 4 * PARAMETERS["td"].max(), 2001)
+    h = idz_step_response(times, PARAMETERS, separate_delays=separate_delays)
+    assert h.shape == (5, len(times), 2, 2)
+
+    tau = delays(separate_delays)
+    dt = times[1] - times[0]
+    for i in range(5):
+        for (row, column), (area, gain, delay) in ENTRIES.items():
+            # Integrate the equation in time for a unit step of the delayed flow
+            flow = (times >= (0.0 if delay is None else tau[delay][i])).astype(float)
+            storage = np.concatenate([[0.0], np.cumsum(flow[1:]) * dt])
+            expected = storage / PARAMETERS[area][i] + PARAMETERS[gain][i] * flow
+            np.testing.assert_allclose(
+                h[i, :, row, column], expected, atol=dt / PARAMETERS[area][i]
+            )
+
+
+def test_single_branch_of_scalars():
+    parameters = {name: float(PARAMETERS[name][0]) for name in IDZ_PARAMETERS}
+    P = idz_transfer_matrix(1e-3, parameters)
+    assert P.shape == (1, 1, 2, 2)
+    np.testing.assert_allclose(P[0], idz_transfer_matrix(1e-3, PARAMETERS)[0])
+    assert idz_step_response([0.0, 100.0], parameters).shape == (1, 2, 2, 2)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError, match="zero frequency"):
+        idz_transfer_matrix([0.0, 1e-3], PARAMETERS)
+
+    parameters = {name: PARAMETERS[name] for name in IDZ_PARAMETERS if name != "Au"}
+    with pytest.raises(ValueError, match="Au are missing"):
+        idz_transfer_matrix(OMEGA, parameters)
+    with pytest.raises(ValueError, match="Au are missing"):
+        idz_step_response([0.0], parameters)
+
+    parameters = {name: PARAMETERS[name] for name in IDZ_PARAMETERS}
+    with pytest.raises(ValueError, match="tu, td are missing"):
+        idz_transfer_matrix(OMEGA, parameters, separate_delays=True)
@@ -0,0 +1,141 @@
+"""
+Array implementations of the IDZ parameters compared with the per-branch
+reference implementation of ``IdzFun`` and ``GetIDZVariables``.
+"""
+
+import numpy as np
+import pytest
+
+from tests.helpers import idz_fun_arguments, idz_inputs
+
+from rtctools_channel_flow.calculate_parameters import (
+    GetIDZVariables,
+    IDZ_PARAMETERS,
+    IDZResult,
+    IdzFun,
+    IdzFunVectorized,
+    alpha_kappa,
+    alpha_kappa_section,
+    calculate_gamma,
+    calculate_gamma_section,
+    idz_results,
+    idz_variables_batch,
+    normal_depth,
+    normal_depth_vectorized,
+)
+
+SHAPES = {"trapezoidal": 0, "circular": 1}
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_vectorized_matches_idz_fun(shape):
+    arguments = idz_fun_arguments(idz_inputs(20, shape), shape)
+    values = IdzFunVectorized(*arguments)
+
+    for i in range(20):
+        reference = IdzFun(*(float(a[i]) for a in arguments))
+        np.testing.assert_allclose(
+            [v[i] for v in values], reference, rtol=1e-12, atol=1e-14
+        )
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_batch_matches_get_idz_variables(shape):
+    inputs = idz_inputs(20, shape)
+    parameters = idz_variables_batch(**inputs, shape=SHAPES[shape])
+
+    for i in range(20):
+        reference = GetIDZVariables(
+            **{name: float(values[i]) for name, values in inputs.items()},
+            shape=SHAPES[shape],
+        )
+        reference.getVariables()
+        for name in IDZ_PARAMETERS:
+            np.testing.assert_allclose(
+                parameters[name][i],
+                getattr(reference, name),
+                rtol=1e-12,
+                atol=1e-14,
+                err_msg=name,
+            )
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_newton_matches_bisection(shape):
+    q, n, B, m, Sb, Y0, L, shapes = idz_fun_arguments(idz_inputs(20, shape), shape)
+    bisection = normal_depth_vectorized(q, n, B, m, Sb, Y0, shapes)
+    newton = normal_depth_vectorized(q, n, B, m, Sb, Y0, shapes, method="newton")
+
+    # The 25 bisection iterations are accurate to about 1e-7, but return the
+    # upper bound of the search interval if it does not contain the root
+    bracketed = newton < 5 * Y0
+    assert bracketed.sum() > 15
+    np.testing.assert_allclose(newton[bracketed], bisection[bracketed], rtol=1e-6)
+    np.testing.assert_allclose(bisection[~bracketed], 5 * Y0[~bracketed])
+    for i in range(20):
+        np.testing.assert_allclose(
+            normal_depth(
+                q[i], n[i], B[i], m[i], Sb[i], Y0[i], L[i], shapes[i], method="newton"
+            ),
+            newton[i],
+            rtol=1e-12,
+        )
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_newton_idz_parameters_match_bisection(shape):
+    inputs = idz_inputs(20, shape)
+    q, n, B, m, Sb, Y0, L, shapes = idz_fun_arguments(inputs, shape)
+    newton_depth = normal_depth_vectorized(q, n, B, m, Sb, Y0, shapes, method="newton")
+    inputs = {name: values[newton_depth < 5 * Y0] for name, values in inputs.items()}
+    bisection = idz_variables_batch(**inputs, shape=SHAPES[shape])
+    newton = idz_variables_batch(
+        **inputs, normal_depth_method="newton", shape=SHAPES[shape]
+    )
+
+    for name in IDZ_PARAMETERS:
+        np.testing.assert_allclose(
+            newton[name], bisection[name], rtol=1e-4, err_msg=name
+        )
+
+
+@pytest.mark.parametrize("keep_intermediates", [False, True])
+def test_results_match_batch(keep_intermediates):
+    inputs = idz_inputs(20)
+    parameters = idz_variables_batch(**inputs, keep_intermediates=True)
+    results = idz_results(**inputs, keep_intermediates=keep_intermediates)
+
+    for i, result in enumerate(results):
+        assert isinstance(result, IDZResult)
+        assert not hasattr(result, "__dict__")
+        assert dict(result.items()) == {
+            name: parameters[name][i] for name in IDZ_PARAMETERS
+        }
+        if keep_intermediates:
+            assert result.intermediates == {
+                name: parameters[name][i] for name in ("tu", "td", "yn", "x2")
+            }
+        else:
+            assert result.intermediates is None
+
+
+def test_reference_result():
+    inputs = idz_inputs(1)
+    reference = GetIDZVariables(
+        **{name: float(values[0]) for name, values in inputs.items()}
+    )
+    reference.getVariables()
+    result = reference.result()
+    assert isinstance(result, IDZResult)
+    for name in IDZ_PARAMETERS:
+        assert result[name] == getattr(reference, name)
+
+
+def test_side_slope_wrappers_match_section_functions():
+    a, t, p, fr, sb, sx, v, m = 40.0, 14.0, 17.0, 0.3, 1e-4, 5e-5, 0.8, 1.5
+    dpdy = 2 * np.sqrt(1 + m**2)
+    assert alpha_kappa(a, t, p, m, fr, sb) == alpha_kappa_section(a, t, p, dpdy, fr, sb)
+    kappa = alpha_kappa(a, t, p, m, fr, sb)[1]
+    assert calculate_gamma(t, kappa, sb, fr, sx, v, m) == calculate_gamma_section(
+        t, kappa, sb, fr, sx, v, 2 * m
+    )
@@ -0,0 +1,66 @@
+"""
+IDZ parameters of networks with trapezoidal and circular branches.
+"""
+
+import logging
+
+import pytest
+
+from tests.helpers import (
+    IDZ_PARAMETER_NAMES,
+    branch_parameters,
+    idz_inputs,
+    make_problem,
+)
+
+from rtctools_channel_flow.calculate_parameters import (
+    GetIDZVariables,
+    IDZ_PARAMETERS,
+    SECTION_SHAPES,
+)
+
+CIRCULAR_PARAMETER_NAMES = dict(IDZ_PARAMETER_NAMES, width="radius")
+
+
+def mixed_network():
+    parameters = branch_parameters("trapezoidal", idz_inputs(1), IDZ_PARAMETER_NAMES)
+    circular = idz_inputs(1, shape="circular")
+    del circular["side_slope"]
+    parameters.update(branch_parameters("circular", circular, CIRCULAR_PARAMETER_NAMES))
+    return parameters
+
+
+def test_debug_log_names_the_block_of_each_branch(caplog):
+    problem = make_problem(
+        mixed_network(), idz=True, idz_branches=["trapezoidal0", "circular0"]
+    )
+    with caplog.at_level(logging.DEBUG, logger="rtctools"):
+        problem.parameters(0)
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(
+        "trapezoidal0" in message and message.endswith("Branches.IDZ")
+        for message in messages
+    )
+    assert any(
+        "circular0" in message and message.endswith("Branches.IDZCircular")
+        for message in messages
+    )
+
+
+def test_parameters_match_scalar_reference():
+    parameters = make_problem(
+        mixed_network(), idz=True, idz_branches=["trapezoidal0", "circular0"]
+    ).parameters(0)
+
+    for branch, shape in (("trapezoidal0", "trapezoidal"), ("circular0", "circular")):
+        inputs = {
+            name: float(values[0]) for name, values in idz_inputs(1, shape).items()
+        }
+        if shape == "circular":
+            inputs["side_slope"] = 0.0
+        reference = GetIDZVariables(**inputs, shape=SECTION_SHAPES[shape])
+        reference.getVariables()
+        for name in IDZ_PARAMETERS:
+            assert parameters[f"{branch}.{name}"] == pytest.approx(
+                getattr(reference, name), rel=1e-12
+            ), name
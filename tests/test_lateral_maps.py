@@ -0,0 +1,122 @@
+"""
+Sparse QForcing and QLateral maps written by the parameter setting mixin.
+"""
+
+import casadi as ca
+import numpy as np
+import pytest
+
+from tests.helpers import make_problem
+
+from rtctools_channel_flow.channel_flow_parameter_setting import _lateral_map
+
+N_LEVEL_NODES = 6
+CONNECTIONS = [[(1, 1.0)], [(3, 0.25), (4, 0.5), (3, 0.25)], [(6, 1.0)]]
+
+
+def sparse_distribution(connections, n_level_nodes, inflows):
+    rows, nodes, weights = zip(
+        *(
+            (i, node, weight)
+            for i, entries in enumerate(connections)
+            for node, weight in entries
+        )
+    )
+    distribution = np.zeros(n_level_nodes)
+    np.add.at(
+        distribution,
+        np.array(nodes) - 1,
+        np.array(weights) * np.asarray(inflows)[list(rows)],
+    )
+    return distribution
+
+
+def test_dense_map_matches_sparse_distribution():
+    lateral_map = _lateral_map(CONNECTIONS, N_LEVEL_NODES)
+    inflows = np.array([2.0, 4.0, -1.0])
+
+    np.testing.assert_allclose(lateral_map.sum(axis=1), 1.0)
+    np.testing.assert_allclose(
+        lateral_map.T @ inflows,
+        sparse_distribution(CONNECTIONS, N_LEVEL_NODES, inflows),
+    )
+
+
+def test_substituted_map_only_couples_connected_nodes():
+    # The distribution as in PartialLinearisedSV, with the map substituted
+    inflows = ca.SX.sym("QForcing", len(CONNECTIONS))
+    symbols = ca.SX.sym("QForcing_map", len(CONNECTIONS), N_LEVEL_NODES)
+    distribution = ca.substitute(
+        ca.mtimes(symbols.T, inflows),
+        ca.vec(symbols),
+        ca.vec(ca.DM(_lateral_map(CONNECTIONS, N_LEVEL_NODES))),
+    )
+
+    jacobian = ca.jacobian(distribution, inflows)
+    assert jacobian.nnz() == 4
+    assert sorted(zip(*jacobian.sparsity().get_triplet())) == [
+        (0, 0),
+        (2, 1),
+        (3, 1),
+        (5, 2),
+    ]
+
+
+@pytest.mark.parametrize(
+    "connections, message",
+    [
+        ([[(0, 1.0)]], "between 1 and 6"),
+        ([[(7, 1.0)]], "between 1 and 6"),
+        ([[(1, np.nan)]], "finite"),
+    ],
+)
+def test_invalid_connections(connections, message):
+    with pytest.raises(ValueError, match=message):
+        _lateral_map(connections, N_LEVEL_NODES)
+
+
+def branch_parameters():
+    return {
+        "branch.n_level_nodes": N_LEVEL_NODES,
+        "branch.n_QForcing": len(CONNECTIONS),
+        "branch.n_QLateral": 1,
+    }
+
+
+def test_mixin_writes_dense_maps():
+    problem = make_problem(
+        branch_parameters(),
+        channel_flow_lateral_maps={
+            "branch": {"QForcing": CONNECTIONS, "QLateral": [[(2, 1.0)]]}
+        },
+    )
+    p = problem.parameters(0)
+
+    lateral_map = _lateral_map(CONNECTIONS, N_LEVEL_NODES)
+    for i in range(len(CONNECTIONS)):
+        for j in range(N_LEVEL_NODES):
+            assert p[f"branch.QForcing_map[{i + 1},{j + 1}]"] == lateral_map[i, j]
+    assert [p[f"branch.QLateral_map[1,{j + 1}]"] for j in range(N_LEVEL_NODES)] == [
+        0.0,
+        1.0,
+        0.0,
+        0.0,
+        0.0,
+        0.0,
+    ]
+    assert problem.parameters(0) == p
+
+
+@pytest.mark.parametrize(
+    "maps, message",
+    [
+        ({"QForcing": CONNECTIONS[:2]}, "has 2 rows, but the branch has 3"),
+        ({"QInflow": CONNECTIONS}, "Unknown lateral map QInflow"),
+    ],
+)
+def test_mixin_errors(maps, message):
+    problem = make_problem(
+        branch_parameters(), channel_flow_lateral_maps={"branch": maps}
+    )
+    with pytest.raises(ValueError, match=message):
+        problem.parameters(0)
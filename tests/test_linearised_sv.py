@@ -0,0 +1,201 @@
+"""
+Array implementations of the LinearisedSV variables compared with the per-node
+reference implementation of ``GetLinearSVVariables``.
+"""
+
+import numpy as np
+import pytest
+
+from tests.helpers import (
+    LINEAR_SV_PARAMETER_NAMES,
+    branch_parameters,
+    linear_sv_inputs,
+    make_problem,
+)
+
+from rtctools_channel_flow.calculate_parameters import (
+    LINEARISED_SV_PARAMETERS,
+    GetLinearSVVariables,
+    LinearSVResult,
+    linearised_sv_results,
+    linearised_sv_variables,
+    linearised_sv_variables_batch,
+    linearised_sv_variables_uniform,
+)
+
+VARIABLES = (
+    "q0",
+    "t0",
+    "y0",
+    "a0",
+    "p0",
+    "r",
+    "v0",
+    "sf",
+    "c0",
+    "f0",
+    "dydx",
+    "delta",
+    "kappa",
+    "f2",
+    "gamma",
+)
+
+
+def reference_variables(inputs, i):
+    model = GetLinearSVVariables(**{name: values[i] for name, values in inputs.items()})
+    model.getVariables()
+    return {name: np.asarray(getattr(model, name), dtype=float) for name in VARIABLES}
+
+
+@pytest.mark.parametrize("n_level_nodes", [4, 7, 50])
+def test_vectorized_matches_reference(n_level_nodes):
+    inputs = linear_sv_inputs(20, n_level_nodes, seed=n_level_nodes)
+    arguments = {
+        name: values for name, values in inputs.items() if name != "n_level_nodes"
+    }
+    variables = linearised_sv_variables(n_level_nodes, **arguments)
+
+    for i in range(20):
+        reference = reference_variables(inputs, i)
+        for name in VARIABLES:
+            np.testing.assert_allclose(
+                variables[name][i],
+                reference[name],
+                rtol=1e-10,
+                atol=1e-14,
+                err_msg=name,
+            )
+
+
+def test_zero_discharge_matches_reference():
+    inputs = linear_sv_inputs(3, 5)
+    inputs["q_nominal"][:] = 0.0
+    arguments = {
+        name: values for name, values in inputs.items() if name != "n_level_nodes"
+    }
+    variables = linearised_sv_variables(5, **arguments)
+
+    for i in range(3):
+        reference = reference_variables(inputs, i)
+        for name in VARIABLES:
+            np.testing.assert_allclose(
+                variables[name][i],
+                reference[name],
+                rtol=1e-10,
+                atol=1e-14,
+                err_msg=name,
+            )
+
+
+def mixed_node_counts():
+    # Interleaved node counts, so that the groups of equal counts are scattered
+    inputs = linear_sv_inputs(12, 4)
+    inputs["n_level_nodes"] = np.tile([7, 4, 12], 4)
+    return inputs
+
+
+def test_batch_keeps_branch_order():
+    inputs = mixed_node_counts()
+    values, offsets = linearised_sv_variables_batch(**inputs)
+
+    for i in range(12):
+        reference = reference_variables(inputs, i)
+        for name, (variable, _) in LINEARISED_SV_PARAMETERS.items():
+            np.testing.assert_allclose(
+                values[name][offsets[name][i] : offsets[name][i + 1]],
+                reference[variable],
+                rtol=1e-10,
+                atol=1e-14,
+                err_msg=name,
+            )
+
+
+def test_mixin_writes_each_branch():
+    inputs = mixed_node_counts()
+    parameters = branch_parameters("sv", inputs, LINEAR_SV_PARAMETER_NAMES)
+    problem = make_problem(
+        dict(parameters),
+        linearised_sv=True,
+        linearised_sv_branches=[f"sv{i}" for i in range(12)],
+    )
+    p = problem.parameters(0)
+
+    written = set()
+    for i in range(12):
+        reference = reference_variables(inputs, i)
+        for name, (variable, _) in LINEARISED_SV_PARAMETERS.items():
+            for j, value in enumerate(reference[variable]):
+                key = f"sv{i}.{name}[{j + 1}]"
+                np.testing.assert_allclose(p[key], value, rtol=1e-10, atol=1e-14)
+                written.add(key)
+    assert p.keys() - parameters.keys() == written
+
+
+@pytest.mark.parametrize("keep_intermediates", [False, True])
+def test_results_match_batch(keep_intermediates):
+    inputs = mixed_node_counts()
+    values, offsets = linearised_sv_variables_batch(**inputs)
+    results = linearised_sv_results(**inputs, keep_intermediates=keep_intermediates)
+
+    for i, result in enumerate(results):
+        assert isinstance(result, LinearSVResult)
+        assert not hasattr(result, "__dict__")
+        assert (result.intermediates is not None) == keep_intermediates
+        assert [name for name, _ in result.items()] == list(LINEARISED_SV_PARAMETERS)
+        for name in LINEARISED_SV_PARAMETERS:
+            assert result[name].dtype == np.float64
+            np.testing.assert_array_equal(
+                result[name], values[name][offsets[name][i] : offsets[name][i + 1]]
+            )
+
+
+def test_reference_result():
+    inputs = mixed_node_counts()
+    reference = GetLinearSVVariables(
+        **{name: values[0] for name, values in inputs.items()}
+    )
+    reference.getVariables()
+    result = reference.result()
+    assert isinstance(result, LinearSVResult)
+    for name, (variable, _) in LINEARISED_SV_PARAMETERS.items():
+        np.testing.assert_array_equal(result[name], getattr(reference, variable))
+
+
+def uniform_inputs(n_branches, n_level_nodes, seed=0):
+    inputs = linear_sv_inputs(n_branches, n_level_nodes, seed=seed)
+    inputs["y_nominal_down"] = inputs["y_nominal"].copy()
+    return {name: values for name, values in inputs.items() if name != "n_level_nodes"}
+
+
+@pytest.mark.parametrize("n_level_nodes", [4, 7, 50])
+def test_uniform_matches_general(n_level_nodes):
+    arguments = uniform_inputs(20, n_level_nodes, seed=n_level_nodes)
+    general = linearised_sv_variables(n_level_nodes, **arguments)
+    del arguments["y_nominal_down"]
+    uniform = linearised_sv_variables_uniform(n_level_nodes, **arguments)
+
+    for name in VARIABLES:
+        np.testing.assert_allclose(
+            uniform[name], general[name], rtol=1e-14, atol=1e-16, err_msg=name
+        )
+
+
+def test_batch_matches_general():
+    # Uniform and non-uniform branches with different node counts
+    inputs = linear_sv_inputs(20, 4)
+    inputs["n_level_nodes"] = np.tile([4, 5, 9, 12], 5)
+    inputs["y_nominal_down"][::2] = inputs["y_nominal"][::2]
+    values, offsets = linearised_sv_variables_batch(**inputs)
+
+    for i in range(20):
+        arguments = {name: value[i] for name, value in inputs.items()}
+        variables = linearised_sv_variables(**arguments)
+        for name, (variable, _) in LINEARISED_SV_PARAMETERS.items():
+            np.testing.assert_allclose(
+                values[name][offsets[name][i] : offsets[name][i + 1]],
+                variables[variable],
+                rtol=1e-14,
+                atol=1e-16,
+                err_msg=name,
+            )
@@ -0,0 +1,154 @@
+"""
+Selection of the number of level nodes of LinearisedSV branches.
+"""
+
+import logging
+
+import numpy as np
+import pytest
+
+from tests.helpers import linear_sv_inputs, linear_sv_network, make_problem
+
+from rtctools_channel_flow.calculate_parameters import (
+    LINEARISED_SV_MIN_LEVEL_NODES,
+    linearised_sv_node_counts,
+    linearised_sv_states,
+    linearised_sv_variables_batch,
+)
+
+N_BRANCHES = 20
+
+
+def wave_speeds(inputs):
+    """
+    Slowest and fastest characteristic speed of each branch.
+    """
+    values, offsets = linearised_sv_variables_batch(**inputs)
+    c0_min = np.minimum.reduceat(values["C0"], offsets["C0"][:-1])
+    c0_max = np.maximum.reduceat(values["C0"], offsets["C0"][:-1])
+    v0_max = np.maximum.reduceat(np.abs(values["V0"]), offsets["V0"][:-1])
+    return np.abs(c0_min - v0_max), c0_max + v0_max
+
+
+def spacing(inputs, counts):
+    return inputs["length"] / (counts - 1)
+
+
+def test_courant_limit():
+    # A short period makes the wave-number criterion ask for a fine grid, which
+    # the Courant criterion caps
+    inputs = linear_sv_inputs(N_BRANCHES, 10)
+    time_step = 60.0
+    counts = linearised_sv_node_counts(
+        **inputs, time_step=time_step, period=1.0, max_courant=2.0
+    )
+    _, fast = wave_speeds(inputs)
+
+    courant = fast * time_step / spacing(inputs, counts)
+    assert np.all(courant <= 2.0 + 1e-9)
+    refined = counts > LINEARISED_SV_MIN_LEVEL_NODES
+    assert refined.any()
+    # One node more would exceed the Courant number
+    finer = fast * time_step / spacing(inputs, counts + 1)
+    assert np.all(finer[refined] > 2.0)
+
+
+def test_wave_number_limit():
+    inputs = linear_sv_inputs(N_BRANCHES, 10)
+    time_step = 60.0
+    counts = linearised_sv_node_counts(
+        **inputs,
+        time_step=time_step,
+        period=3600.0,
+        points_per_wavelength=8.0,
+        max_courant=1e6,
+    )
+    slow, _ = wave_speeds(inputs)
+
+    points = slow * 3600.0 / spacing(inputs, counts)
+    assert np.all(points >= 8.0 - 1e-9)
+    refined = counts > LINEARISED_SV_MIN_LEVEL_NODES
+    assert refined.any()
+    # One node less would not resolve the wavelength
+    assert np.all(slow[refined] * 3600.0 / spacing(inputs, counts - 1)[refined] < 8.0)
+
+
+def test_default_period():
+    inputs = linear_sv_inputs(N_BRANCHES, 10)
+    np.testing.assert_array_equal(
+        linearised_sv_node_counts(**inputs, time_step=300.0),
+        linearised_sv_node_counts(**inputs, time_step=300.0, period=8 * 300.0),
+    )
+
+
+def test_minimum_count():
+    inputs = linear_sv_inputs(N_BRANCHES, 10)
+    counts = linearised_sv_node_counts(**inputs, time_step=86400.0)
+    assert counts.tolist() == [LINEARISED_SV_MIN_LEVEL_NODES] * N_BRANCHES
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        (dict(time_step=0.0), "Time step must be positive"),
+        (dict(time_step=60.0, period=-1.0), "must be positive"),
+        (dict(time_step=60.0, max_courant=0.0), "must be positive"),
+    ],
+)
+def test_invalid_options(options, message):
+    with pytest.raises(ValueError, match=message):
+        linearised_sv_node_counts(**linear_sv_inputs(1, 10), **options)
+
+
+def test_states():
+    assert linearised_sv_states(4) == 7
+    assert linearised_sv_states([4, 10]).tolist() == [7, 19]
+
+
+def make_sv_problem(n_level_nodes, time_step):
+    branches = [f"sv{i}" for i in range(N_BRANCHES)]
+    return make_problem(
+        linear_sv_network(N_BRANCHES, n_level_nodes),
+        times=np.arange(4) * time_step,
+        linearised_sv=True,
+        linearised_sv_branches=branches,
+    )
+
+
+def test_mixin_selection_does_not_change_parameters(caplog):
+    problem = make_sv_problem(10, 86400.0)
+    p = problem.parameters(0)
+    reference = dict(p)
+
+    with caplog.at_level(logging.WARNING, logger="rtctools"):
+        selection = problem.select_linear_sv_node_counts(p)
+    assert p == reference
+    assert not caplog.records
+
+    counts = list(selection["n_level_nodes"].values())
+    assert counts == [LINEARISED_SV_MIN_LEVEL_NODES] * N_BRANCHES
+    assert selection["states"] == N_BRANCHES * 19
+    assert selection["selected_states"] == N_BRANCHES * 7
+    assert selection["states_saved"] == N_BRANCHES * 12
+
+
+def test_mixin_warns_about_refined_branches(caplog):
+    problem = make_sv_problem(LINEARISED_SV_MIN_LEVEL_NODES, 10.0)
+
+    with caplog.at_level(logging.WARNING, logger="rtctools"):
+        selection = problem.select_linear_sv_node_counts(period=600.0)
+    refined = [
+        branch
+        for branch, n in selection["n_level_nodes"].items()
+        if n > LINEARISED_SV_MIN_LEVEL_NODES
+    ]
+    assert refined
+    assert selection["states_saved"] < 0
+    assert len(caplog.records) == 1
+    assert all(branch in caplog.records[0].getMessage() for branch in refined)
+
+
+def test_mixin_requires_branches():
+    problem = make_problem({})
+    with pytest.raises(ValueError, match="linearised_sv_branches"):
+        problem.select_linear_sv_node_counts({})
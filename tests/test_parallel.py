@@ -0,0 +1,44 @@
+"""
+Branch parameters computed in the worker pool compared with the serial path.
+"""
+
+import pytest
+
+from tests.helpers import idz_network, linear_sv_network, make_problem
+
+N_BRANCHES = 10
+NETWORKS = {
+    "linearised_sv": (
+        linear_sv_network(N_BRANCHES, 6),
+        dict(
+            linearised_sv=True,
+            linearised_sv_branches=[f"sv{i}" for i in range(N_BRANCHES)],
+        ),
+    ),
+    "idz": (
+        idz_network(N_BRANCHES),
+        dict(idz=True, idz_branches=[f"idz{i}" for i in range(N_BRANCHES)]),
+    ),
+}
+
+
+@pytest.mark.parametrize("network", NETWORKS)
+def test_pool_matches_serial(network):
+    parameters, attributes = NETWORKS[network]
+    serial = make_problem(dict(parameters), **attributes).parameters(0)
+
+    # Several chunks per worker, and a last chunk that is not full
+    problem = make_problem(
+        dict(parameters),
+        channel_flow_parameter_workers=2,
+        channel_flow_parameter_chunk_size=3,
+        **attributes,
+    )
+    try:
+        pooled = problem.parameters(0)
+    finally:
+        problem.post()
+
+    assert pooled.keys() == serial.keys()
+    for name, value in serial.items():
+        assert pooled[name] == value, name
@@ -0,0 +1,214 @@
+"""
+In-memory and persistent caches of the computed branch parameters.
+"""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from rtctools_channel_flow import parameter_cache
+from rtctools_channel_flow.calculate_parameters import IDZResult, LinearSVResult
+from rtctools_channel_flow.parameter_cache import (
+    ParameterCache,
+    PersistentParameterCache,
+)
+from tests.helpers import idz_network, linear_sv_network, make_problem
+
+N_BRANCHES = 5
+ATTRIBUTES = dict(
+    linearised_sv=True,
+    linearised_sv_branches=[f"sv{i}" for i in range(N_BRANCHES)],
+)
+
+
+def test_repeated_inputs_hit_the_cache():
+    problem = make_problem(linear_sv_network(N_BRANCHES, 6), **ATTRIBUTES)
+    problem.parameters(0)
+    problem.parameters(0)
+    info = problem.channel_flow_parameter_cache_info()
+    assert info["misses"] == N_BRANCHES
+    assert info["hits"] == N_BRANCHES
+
+
+def test_default_cache_size_is_bounded():
+    # Changing nominals, as with dynamic nominals in a receding horizon, give new
+    # cache keys on every call
+    parameters = linear_sv_network(N_BRANCHES, 6)
+    problem = make_problem(parameters, **ATTRIBUTES)
+    for cycle in range(20):
+        for i in range(N_BRANCHES):
+            parameters[f"sv{i}.Q_nominal"] = 10.0 + cycle
+        problem._parameters = parameters
+        problem.parameters(0)
+    info = problem.channel_flow_parameter_cache_info()
+    assert info["entries"] <= 4 * N_BRANCHES
+
+
+def test_explicit_cache_size():
+    parameters = linear_sv_network(N_BRANCHES, 6)
+    problem = make_problem(
+        parameters, channel_flow_parameter_cache_size=2, **ATTRIBUTES
+    )
+    problem.parameters(0)
+    assert problem.channel_flow_parameter_cache_info()["entries"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ParameterCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    # Looking up "a" makes "b" the least recently used entry
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_put_refreshes_existing_entry():
+    cache = ParameterCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+
+
+def test_hit_and_miss_counters():
+    cache = ParameterCache()
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("a")
+    assert cache.info() == {"hits": 2, "misses": 1, "entries": 1}
+    cache.clear()
+    assert cache.info() == {"hits": 0, "misses": 0, "entries": 0}
+
+
+def test_ensemble_members_share_entries():
+    problem = make_problem(linear_sv_network(N_BRANCHES, 6), **ATTRIBUTES)
+    first = problem.parameters(0)
+    second = problem.parameters(1)
+    assert first == second
+    info = problem.channel_flow_parameter_cache_info()
+    assert info == {"hits": N_BRANCHES, "misses": N_BRANCHES, "entries": N_BRANCHES}
+
+
+def test_identical_branches_are_computed_once():
+    parameters = linear_sv_network(1, 6)
+    parameters.update(
+        {name.replace("sv0", "sv1", 1): value for name, value in parameters.items()}
+    )
+    problem = make_problem(
+        parameters, linearised_sv=True, linearised_sv_branches=["sv0", "sv1"]
+    )
+    p = problem.parameters(0)
+    assert problem.channel_flow_parameter_cache_info()["entries"] == 1
+    assert p["sv0.C0[1]"] == p["sv1.C0[1]"]
+
+
+def test_changed_input_is_a_miss():
+    parameters = linear_sv_network(N_BRANCHES, 6)
+    problem = make_problem(parameters, **ATTRIBUTES)
+    before = problem.parameters(0)
+    parameters["sv0.Q_nominal"] *= 2.0
+    after = problem.parameters(0)
+    info = problem.channel_flow_parameter_cache_info()
+    assert info["misses"] == N_BRANCHES + 1
+    assert info["hits"] == N_BRANCHES - 1
+    assert after["sv0.V0[1]"] != before["sv0.V0[1]"]
+    assert after["sv1.V0[1]"] == before["sv1.V0[1]"]
+
+
+@pytest.mark.parametrize("cache", [True, False])
+def test_cache_gives_same_idz_parameters(cache):
+    idz = dict(idz=True, idz_branches=[f"idz{i}" for i in range(N_BRANCHES)])
+    reference = make_problem(idz_network(N_BRANCHES), **idz).parameters(0)
+    problem = make_problem(
+        idz_network(N_BRANCHES), channel_flow_parameter_cache=cache, **idz
+    )
+    problem.parameters(0)
+    p = problem.parameters(0)
+    for name, value in reference.items():
+        np.testing.assert_equal(p[name], value)
+
+
+def test_persistent_cache_is_closed_in_post(tmp_path):
+    path = str(tmp_path / "parameters.sqlite")
+    attributes = dict(
+        channel_flow_parameter_cache=False,
+        channel_flow_persistent_cache=True,
+        channel_flow_persistent_cache_path=path,
+        **ATTRIBUTES,
+    )
+    problem = make_problem(linear_sv_network(N_BRANCHES, 6), **attributes)
+    problem.parameters(0)
+    assert (
+        problem.channel_flow_parameter_cache_info()["persistent"]["misses"]
+        == N_BRANCHES
+    )
+
+    problem.post()
+    assert "persistent" not in problem.channel_flow_parameter_cache_info()
+
+    # The next run opens the file again and finds the stored entries
+    problem = make_problem(linear_sv_network(N_BRANCHES, 6), **attributes)
+    problem.parameters(0)
+    assert (
+        problem.channel_flow_parameter_cache_info()["persistent"]["hits"] == N_BRANCHES
+    )
+    problem.post()
+
+
+@pytest.mark.parametrize(
+    "network, result_type", [("linearised_sv", LinearSVResult), ("idz", IDZResult)]
+)
+def test_persistent_cache_hits_are_result_objects(
+    tmp_path, monkeypatch, network, result_type
+):
+    if network == "linearised_sv":
+        parameters = linear_sv_network(N_BRANCHES, 6)
+        attributes = dict(ATTRIBUTES)
+    else:
+        parameters = idz_network(N_BRANCHES)
+        attributes = dict(idz=True, idz_branches=[f"idz{i}" for i in range(N_BRANCHES)])
+    attributes.update(
+        channel_flow_persistent_cache=True,
+        channel_flow_persistent_cache_path=str(tmp_path / "parameters.sqlite"),
+    )
+    problem = make_problem(dict(parameters), **attributes)
+    reference = problem.parameters(0)
+    problem.post()
+
+    # Record what the next run puts in the memory cache
+    stored = []
+    put = parameter_cache.ParameterCache.put
+
+    def recording_put(self, key, value):
+        stored.append(value)
+        put(self, key, value)
+
+    monkeypatch.setattr(parameter_cache.ParameterCache, "put", recording_put)
+    problem = make_problem(dict(parameters), **attributes)
+    p = problem.parameters(0)
+    assert problem.channel_flow_parameter_cache_info()["persistent"]["hits"] == (
+        N_BRANCHES
+    )
+    problem.post()
+
+    assert len(stored) == N_BRANCHES
+    assert all(type(value) is result_type for value in stored)
+    assert p.keys() == reference.keys()
+    for name, value in reference.items():
+        np.testing.assert_equal(p[name], value)
+
+
+def test_persistent_cache_context_manager(tmp_path):
+    with PersistentParameterCache(str(tmp_path / "parameters.sqlite")) as cache:
+        cache.put_many([(("key", 1.0), {"p11": 1.0})])
+        assert cache.get_many([("key", 1.0)]) == {("key", 1.0): {"p11": 1.0}}
+    with pytest.raises(sqlite3.ProgrammingError):
+        len(cache)
@@ -0,0 +1,61 @@
+"""
+Bulk writes of the branch parameters into the parameters of an rtc-tools
+problem, which are an ``AliasDict`` and not a plain dict.
+"""
+
+import pytest
+from rtctools._internal.alias_tools import AliasDict, AliasRelation
+
+from tests.helpers import (
+    ParameterBase,
+    idz_network,
+    linear_sv_network,
+    make_problem,
+)
+
+from rtctools_channel_flow.channel_flow_parameter_setting import (
+    ChannelFlowParameterSettingOpimizationMixin,
+)
+
+
+class AliasParameterBase(ParameterBase):
+    """
+    Stand-in that returns the parameters as an ``AliasDict``, like
+    ``ModelicaMixin.parameters``.
+    """
+
+    def parameters(self, ensemble_member):
+        return AliasDict(AliasRelation(), self._parameters)
+
+
+def alias_problem(parameters, **attributes):
+    cls = type(
+        "Problem",
+        (ChannelFlowParameterSettingOpimizationMixin, AliasParameterBase),
+        attributes,
+    )
+    return cls(parameters)
+
+
+NETWORKS = {
+    "linearised_sv": (
+        linear_sv_network(5, 6),
+        dict(linearised_sv=True, linearised_sv_branches=[f"sv{i}" for i in range(5)]),
+    ),
+    "idz": (
+        idz_network(5),
+        dict(idz=True, idz_branches=[f"idz{i}" for i in range(5)]),
+    ),
+}
+
+
+@pytest.mark.parametrize("network", NETWORKS.keys())
+def test_bulk_write_into_alias_dict(network):
+    parameters, attributes = NETWORKS[network]
+    p = alias_problem(parameters, **attributes).parameters(0)
+    assert isinstance(p, AliasDict)
+
+    reference = make_problem(parameters, **attributes).parameters(0)
+    assert set(p.keys()) == set(reference.keys())
+    for key, value in reference.items():
+        assert p[key] == value
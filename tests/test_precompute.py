@@ -0,0 +1,82 @@
+"""
+Precomputation of the channel flow parameters of all ensemble members.
+"""
+
+import numpy as np
+
+from tests.helpers import idz_network, linear_sv_network, make_problem
+
+from rtctools_channel_flow import channel_flow_parameter_setting
+
+N_BRANCHES = 4
+ENSEMBLE_SIZE = 3
+# The first two ensemble members have the same nominal discharge
+Q_NOMINAL = np.array([[8.0, 8.0, 8.0], [8.0, 8.0, 8.0], [9.0, 9.0, 9.0]])
+
+
+def ensemble_problem(**attributes):
+    parameters = linear_sv_network(N_BRANCHES, 6)
+    parameters.update(idz_network(N_BRANCHES))
+    return make_problem(
+        parameters,
+        timeseries={"Q": Q_NOMINAL},
+        ensemble_size=ENSEMBLE_SIZE,
+        linearised_sv=True,
+        linearised_sv_branches=[f"sv{i}" for i in range(N_BRANCHES)],
+        linearised_sv_use_dynamic_nominals=True,
+        linearised_sv_nominal_levels={"sv1": {"Q_nominal": "Q"}},
+        idz=True,
+        idz_branches=[f"idz{i}" for i in range(N_BRANCHES)],
+        **attributes,
+    )
+
+
+def test_precomputed_parameters_match_per_member_parameters():
+    reference = ensemble_problem()
+    problem = ensemble_problem()
+    problem.precompute_channel_flow_parameters()
+    for ensemble_member in range(ENSEMBLE_SIZE):
+        assert problem.parameters(ensemble_member) == reference.parameters(
+            ensemble_member
+        )
+    assert problem.parameters(2)["sv1.Q_nominal"] == 9.0
+
+
+def test_distinct_inputs_are_computed_once(monkeypatch):
+    counts = []
+    compute = channel_flow_parameter_setting._linear_sv_branch_parameters
+
+    def counting(inputs, **kwargs):
+        counts.append(len(inputs["length"]))
+        return compute(inputs, **kwargs)
+
+    monkeypatch.setattr(
+        channel_flow_parameter_setting, "_linear_sv_branch_parameters", counting
+    )
+    problem = ensemble_problem(channel_flow_parameter_cache=False)
+    problem.precompute_channel_flow_parameters()
+    for ensemble_member in range(ENSEMBLE_SIZE):
+        problem.parameters(ensemble_member)
+    # All branches of the first member, and the changed branch of the last one
+    assert counts == [N_BRANCHES + 1]
+
+
+def test_pre_precomputes_and_post_discards():
+    problem = ensemble_problem(channel_flow_precompute_ensemble=True)
+    problem.pre()
+    before = problem.parameters(0)
+
+    # Precomputed parameters are read from the table
+    problem._parameters["sv0.length"] *= 2.0
+    assert problem.parameters(0)["sv0.Delta[1]"] == before["sv0.Delta[1]"]
+
+    problem.post()
+    assert problem.parameters(0)["sv0.Delta[1]"] != before["sv0.Delta[1]"]
+
+
+def test_precompute_is_opt_in():
+    problem = ensemble_problem()
+    problem.pre()
+    before = problem.parameters(0)
+    problem._parameters["sv0.length"] *= 2.0
+    assert problem.parameters(0)["sv0.Delta[1]"] != before["sv0.Delta[1]"]
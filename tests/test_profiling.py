@@ -0,0 +1,139 @@
+"""
+Profiling of the parameter computations of the mixin.
+"""
+
+import logging
+
+import numpy as np
+import pytest
+
+from tests.helpers import idz_network, linear_sv_network, make_problem
+
+N_BRANCHES = 4
+SV_BRANCHES = [f"sv{i}" for i in range(N_BRANCHES)]
+IDZ_BRANCHES = [f"idz{i}" for i in range(N_BRANCHES)]
+
+
+def network_problem(**attributes):
+    parameters = linear_sv_network(N_BRANCHES, 6)
+    parameters.update(idz_network(N_BRANCHES))
+    return make_problem(
+        parameters,
+        linearised_sv=True,
+        linearised_sv_branches=SV_BRANCHES,
+        idz=True,
+        idz_branches=IDZ_BRANCHES,
+        **attributes,
+    )
+
+
+def test_profiling_is_disabled_by_default():
+    problem = network_problem()
+    problem.parameters(0)
+    assert problem.channel_flow_profile() == {
+        "phases": {},
+        "branches": {},
+        "slowest_branches": [],
+    }
+
+
+def test_phases_are_recorded():
+    problem = network_problem(channel_flow_profiling=True)
+    problem.parameters(0)
+    problem.parameters(0)
+    phases = problem.channel_flow_profile()["phases"]
+
+    assert set(phases.keys()) == {
+        "nominals",
+        "LinearisedSV.inputs",
+        "LinearisedSV.compute",
+        "LinearisedSV.write",
+        "IDZ.inputs",
+        "IDZ.compute",
+        "IDZ.write",
+    }
+    for record in phases.values():
+        assert record["calls"] == 2
+        assert record["time"] >= 0.0
+    compute = phases["LinearisedSV.compute"]
+    assert compute["branches"] == 2 * N_BRANCHES
+    # The first call misses the cache and the second call hits it
+    assert compute["cache_misses"] == N_BRANCHES
+    assert compute["cache_hits"] == N_BRANCHES
+    assert phases["LinearisedSV.write"]["cache_hits"] == 0
+
+
+def test_branch_profiling_gives_same_parameters():
+    reference = network_problem().parameters(0)
+    problem = network_problem(channel_flow_profiling="branches")
+    p = problem.parameters(0)
+    for name, value in reference.items():
+        np.testing.assert_equal(p[name], value)
+
+    profile = problem.channel_flow_profile(n_slowest=3)
+    assert set(profile["branches"].keys()) == set(SV_BRANCHES + IDZ_BRANCHES)
+    for record in profile["branches"].values():
+        assert record["calls"] == 1
+        assert record["max_time"] == record["time"]
+    slowest = profile["slowest_branches"]
+    assert len(slowest) == 3
+    assert [time for _, time in slowest] == sorted(
+        (record["max_time"] for record in profile["branches"].values()),
+        reverse=True,
+    )[:3]
+
+
+def test_only_computed_branches_are_timed():
+    problem = network_problem(channel_flow_profiling="branches")
+    problem.parameters(0)
+    problem.parameters(0)
+    for record in problem.channel_flow_profile()["branches"].values():
+        assert record["calls"] == 1
+
+
+def test_reset():
+    problem = network_problem(channel_flow_profiling="branches")
+    problem.parameters(0)
+    assert problem.channel_flow_profile(reset=True)["phases"]
+    assert problem.channel_flow_profile() == {
+        "phases": {},
+        "branches": {},
+        "slowest_branches": [],
+    }
+
+
+def test_phases_are_logged(caplog):
+    problem = network_problem(channel_flow_profiling=True)
+    with caplog.at_level(logging.INFO, logger="rtctools"):
+        problem.parameters(0)
+    records = [
+        record.channel_flow_phase
+        for record in caplog.records
+        if hasattr(record, "channel_flow_phase")
+    ]
+    assert {record["phase"] for record in records} == set(
+        problem.channel_flow_profile()["phases"].keys()
+    )
+    idz = next(record for record in records if record["phase"] == "IDZ.compute")
+    assert idz["branches"] == N_BRANCHES
+    assert idz["cache_misses"] == N_BRANCHES
+
+
+@pytest.mark.parametrize("profiling", [True, "branches"])
+def test_precompute_phases(profiling):
+    problem = network_problem(channel_flow_profiling=profiling, ensemble_size=2)
+    problem.precompute_channel_flow_parameters()
+    phases = problem.channel_flow_profile()["phases"]
+    assert phases["LinearisedSV.precompute"]["branches"] == 2 * N_BRANCHES
+    assert phases["IDZ.precompute"]["branches"] == 2 * N_BRANCHES
+
+
+def test_time_varying_phase():
+    problem = network_problem(
+        channel_flow_profiling=True, linearised_sv_time_varying=True
+    )
+    problem.bounds()
+    phases = problem.channel_flow_profile()["phases"]
+    assert phases["LinearisedSV.time_varying"]["branches"] == N_BRANCHES * len(
+        problem.times()
+    )
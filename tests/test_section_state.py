@@ -0,0 +1,125 @@
+"""
+Section and flow properties of ``SectionState`` compared with the closed-form
+expressions of the trapezoidal and circular cross sections.
+"""
+
+import numpy as np
+
+from rtctools_channel_flow.calculate_parameters import (
+    SECTION_SHAPES,
+    SectionState,
+    froude,
+    froudeC,
+    sf0,
+    sf0C,
+)
+
+G = 9.81
+
+rng = np.random.default_rng(0)
+Q = rng.uniform(0.1, 100.0, 50)
+N = rng.uniform(0.02, 0.05, 50)
+WIDTH = rng.uniform(5.0, 50.0, 50)
+SIDE_SLOPE = rng.uniform(0.0, 2.0, 50)
+DEPTH = rng.uniform(0.5, 5.0, 50)
+RADIUS = rng.uniform(0.5, 2.0, 50)
+FILLING = rng.uniform(0.05, 1.95, 50) * RADIUS
+
+
+def trapezoidal_reference(y, q, n, b0, m):
+    area = b0 * y + m * y**2
+    perimeter = b0 + 2 * y * np.sqrt(1 + m**2)
+    top_width = b0 + 2 * y * m
+    celerity = np.sqrt(G * area / top_width)
+    velocity = q / area
+    return {
+        "area": area,
+        "perimeter": perimeter,
+        "top_width": top_width,
+        "hydraulic_radius": area / perimeter,
+        "celerity": celerity,
+        "velocity": velocity,
+        "froude": velocity / celerity,
+        "friction_slope": (q**2 * n**2) / (area**2 * (area / perimeter) ** (4 / 3)),
+    }
+
+
+def circular_reference(y, q, n, r):
+    diameter = 2 * r
+    alpha = np.arccos(1 - y / r)
+    area = (diameter**2) / 4 * (alpha - np.sin(2 * alpha) / 2)
+    hydraulic_radius = diameter / 4 * (1 - np.sin(2 * alpha) / (2 * alpha))
+    top_width = diameter * np.sin(alpha)
+    return {
+        "area": area,
+        "perimeter": alpha * diameter,
+        "top_width": top_width,
+        "hydraulic_radius": hydraulic_radius,
+        "celerity": np.sqrt(G * area / top_width),
+        "velocity": q / area,
+        "friction_slope": (q**2 * n**2) / (area**2 * hydraulic_radius ** (4 / 3)),
+    }
+
+
+def assert_state_matches(state, reference, index=slice(None)):
+    for name, value in reference.items():
+        np.testing.assert_allclose(
+            getattr(state, name)[index], value, rtol=1e-12, err_msg=name
+        )
+
+
+def test_trapezoidal_matches_closed_form():
+    state = SectionState(DEPTH, Q, N, WIDTH, SIDE_SLOPE)
+    assert_state_matches(state, trapezoidal_reference(DEPTH, Q, N, WIDTH, SIDE_SLOPE))
+
+
+def test_circular_matches_closed_form():
+    state = SectionState(FILLING, Q, N, RADIUS, 0.0, SECTION_SHAPES["circular"])
+    assert_state_matches(state, circular_reference(FILLING, Q, N, RADIUS))
+
+
+def test_mixed_shapes_match_single_shapes():
+    shapes = np.tile([SECTION_SHAPES["trapezoidal"], SECTION_SHAPES["circular"]], 25)
+    circular = shapes == SECTION_SHAPES["circular"]
+    y = np.where(circular, FILLING, DEPTH)
+    b0 = np.where(circular, RADIUS, WIDTH)
+    m = np.where(circular, 0.0, SIDE_SLOPE)
+    state = SectionState(y, Q, N, b0, m, shapes)
+
+    trapezoidal = ~circular
+    assert_state_matches(
+        state,
+        trapezoidal_reference(
+            y[trapezoidal],
+            Q[trapezoidal],
+            N[trapezoidal],
+            b0[trapezoidal],
+            m[trapezoidal],
+        ),
+        trapezoidal,
+    )
+    assert_state_matches(
+        state,
+        circular_reference(y[circular], Q[circular], N[circular], b0[circular]),
+        circular,
+    )
+
+
+def test_flow_functions_match_closed_form():
+    trapezoidal = trapezoidal_reference(DEPTH, Q, N, WIDTH, SIDE_SLOPE)
+    np.testing.assert_allclose(
+        froude(DEPTH, Q, N, WIDTH, SIDE_SLOPE), trapezoidal["froude"], rtol=1e-12
+    )
+    np.testing.assert_allclose(
+        sf0(DEPTH, Q, N, WIDTH, SIDE_SLOPE), trapezoidal["friction_slope"], rtol=1e-12
+    )
+
+    circular = circular_reference(FILLING, Q, N, RADIUS)
+    np.testing.assert_allclose(
+        froudeC(FILLING, Q, N, RADIUS, 0.0),
+        circular["velocity"] / circular["celerity"],
+        rtol=1e-12,
+    )
+    np.testing.assert_allclose(
+        sf0C(FILLING, Q, N, RADIUS, 0.0), circular["friction_slope"], rtol=1e-12
+    )
@@ -0,0 +1,140 @@
+"""
+State-space models of LinearisedSV branches and chains, and their simulation
+with the exponential integrator.
+"""
+
+import numpy as np
+import pytest
+import scipy.integrate
+import scipy.sparse
+
+from tests.helpers import chain_models, linear_sv_inputs
+
+from rtctools_channel_flow.calculate_parameters import linearised_sv_results
+from rtctools_channel_flow.state_space import (
+    ExponentialIntegrator,
+    linear_sv_chain_state_space,
+    linear_sv_state_space,
+)
+
+
+def test_zero_state_is_steady_at_nominal_flow():
+    n = 6
+    inputs = linear_sv_inputs(5, n)
+    for i, model in enumerate(chain_models(5, n)):
+        # The nominal flow is in the offsets of the interior flow outputs
+        q_nominal = model.g[n + 1]
+        u = np.array([q_nominal, q_nominal, 0.0, 0.0])
+        residual = model.B @ u + model.f
+        np.testing.assert_allclose(residual, 0.0, atol=1e-12 * np.abs(model.f).max())
+
+        # The outputs are the nominal levels and flows
+        y = model.D @ u + model.g
+        np.testing.assert_allclose(
+            y[:n],
+            np.linspace(inputs["y_nominal"][i], inputs["y_nominal_down"][i], n)
+            + np.linspace(inputs["h_b_up"][i], inputs["h_b_down"][i], n),
+        )
+        np.testing.assert_allclose(y[n:], q_nominal)
+
+
+def test_chain_is_stable():
+    for n_branches in (1, 2, 5):
+        model = linear_sv_chain_state_space(chain_models(n_branches, 6))
+        eigenvalues = np.linalg.eigvals(model.A.toarray())
+        assert eigenvalues.real.max() < 1e-10
+
+
+def test_chain_connects_the_junctions():
+    branches = chain_models(2, 6)
+    model = linear_sv_chain_state_space(branches)
+    assert model.inputs == [
+        "branch0.Q_up",
+        "branch1.Q_down",
+        "branch0.Q_lateral",
+        "branch0.wind_stress",
+        "branch1.Q_lateral",
+        "branch1.wind_stress",
+    ]
+
+    # The levels at the junction change equally for any state and input
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=model.n_states)
+    u = rng.normal(size=model.n_inputs)
+    dx = model.A @ x + model.B @ u + model.f
+    up = model.output_index("branch0.H[6]")
+    down = model.output_index("branch1.H[1]")
+    np.testing.assert_allclose((model.C @ dx)[up], (model.C @ dx)[down], rtol=1e-10)
+
+
+def test_integrator_matches_ode_solution():
+    model = linear_sv_chain_state_space(chain_models(2, 5))
+    dt = 600.0
+    rng = np.random.default_rng(0)
+    u = rng.uniform(0.0, 10.0, (4, model.n_inputs))
+    x, y = ExponentialIntegrator(model, dt).simulate(u)
+
+    A = model.A.toarray()
+    B = model.B.toarray()
+    state = np.zeros(model.n_states)
+    for k in range(len(u)):
+        solution = scipy.integrate.solve_ivp(
+            lambda t, s: A @ s + B @ u[k] + model.f,
+            (0.0, dt),
+            state,
+            method="Radau",
+            rtol=1e-10,
+            atol=1e-12,
+        )
+        state = solution.y[:, -1]
+        np.testing.assert_allclose(x[k + 1], state, rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(y[:-1], (model.C @ x[:-1].T + model.D @ u.T).T + model.g)
+
+
+def test_integrator_scenarios_match_single_runs():
+    model = linear_sv_chain_state_space(chain_models(2, 5))
+    integrator = ExponentialIntegrator(model, 900.0)
+    rng = np.random.default_rng(0)
+    u = rng.uniform(0.0, 10.0, (3, 6, model.n_inputs))
+    x0 = rng.normal(size=(3, model.n_states))
+    x, y = integrator.simulate(u, x0)
+    for i in range(3):
+        x_single, y_single = integrator.simulate(u[i], x0[i])
+        np.testing.assert_allclose(x[i], x_single, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(y[i], y_single, rtol=1e-12, atol=1e-12)
+
+
+def test_invalid_arguments():
+    inputs = linear_sv_inputs(1, 3)
+    result = linearised_sv_results(**{**inputs, "n_level_nodes": np.array([4])})[0]
+    geometry = {
+        name: inputs[name][0]
+        for name in (
+            "length",
+            "width",
+            "q_nominal",
+            "h_b_up",
+            "h_b_down",
+            "y_nominal",
+            "y_nominal_down",
+        )
+    }
+    with pytest.raises(ValueError, match="at least 4 level nodes"):
+        linear_sv_state_space(3, **geometry, **dict(result.items()))
+    with pytest.raises(ValueError, match="at least one branch"):
+        linear_sv_chain_state_space([])
+
+    model = linear_sv_state_space(4, **geometry, **dict(result.items()))
+    with pytest.raises(ValueError, match="positive"):
+        ExponentialIntegrator(model, 0.0)
+    with pytest.raises(ValueError, match="Expected 4 inputs"):
+        ExponentialIntegrator(model, 900.0).simulate(np.zeros((3, 2)))
+
+
+def test_singular_junction():
+    # Neither branch has storage that responds to the flow at the junction
+    branches = chain_models(2, 5)
+    branches[0].B = branches[0].B @ scipy.sparse.diags([1.0, 0.0, 1.0, 1.0])
+    branches[1].B = branches[1].B @ scipy.sparse.diags([0.0, 1.0, 1.0, 1.0])
+    with pytest.raises(ValueError, match="junction flows"):
+        linear_sv_chain_state_space(branches)
@@ -0,0 +1,108 @@
+"""
+Time-varying coefficients of the LinearisedSVTimeVarying block.
+"""
+
+import numpy as np
+import pytest
+
+from tests.helpers import linear_sv_network, make_problem
+
+from rtctools_channel_flow.calculate_parameters import LINEARISED_SV_PARAMETERS
+
+N_BRANCHES = 3
+BRANCHES = [f"sv{i}" for i in range(N_BRANCHES)]
+TIMES = np.arange(4) * 3600.0
+
+
+def time_varying_problem(nominal_levels=None, timeseries=None):
+    return make_problem(
+        linear_sv_network(N_BRANCHES, 6),
+        timeseries=timeseries,
+        times=TIMES,
+        linearised_sv=True,
+        linearised_sv_branches=BRANCHES,
+        linearised_sv_use_dynamic_nominals=nominal_levels is not None,
+        linearised_sv_nominal_levels=nominal_levels,
+        linearised_sv_time_varying=True,
+    )
+
+
+def static_parameters(nominal_levels):
+    return make_problem(
+        linear_sv_network(N_BRANCHES, 6),
+        linearised_sv=True,
+        linearised_sv_branches=BRANCHES,
+        linearised_sv_use_dynamic_nominals=True,
+        linearised_sv_nominal_levels=nominal_levels,
+    ).parameters(0)
+
+
+def coefficient_names(p):
+    return [
+        name
+        for name in p
+        if name.split(".")[1].split("[")[0] in LINEARISED_SV_PARAMETERS
+    ]
+
+
+def test_constant_nominals_give_static_coefficients():
+    nominal_levels = {"sv0": {"H_b_up": 2.5, "Q_nominal": 7.0}}
+    problem = time_varying_problem(nominal_levels)
+    coefficients = problem.linear_sv_time_varying_coefficients(problem.parameters(0))
+    reference = static_parameters(nominal_levels)
+    names = coefficient_names(reference)
+    assert sorted(coefficients.keys()) == sorted(names)
+    for name in names:
+        np.testing.assert_array_equal(coefficients[name].times, TIMES)
+        np.testing.assert_allclose(coefficients[name].values, reference[name])
+
+
+def test_timeseries_nominals_are_followed_per_time_step():
+    q = np.array([6.0, 7.0, 8.0, 9.0])
+    problem = time_varying_problem({"sv1": {"Q_nominal": "Q"}}, {"Q": q})
+    coefficients = problem.linear_sv_time_varying_coefficients(problem.parameters(0))
+    for k, value in enumerate(q):
+        reference = static_parameters({"sv1": {"Q_nominal": value}})
+        for name in coefficient_names(reference):
+            assert coefficients[name].values[k] == pytest.approx(reference[name])
+
+
+def test_parameters_keep_reference_nominals():
+    parameters = linear_sv_network(N_BRANCHES, 6)
+    problem = time_varying_problem({"sv0": {"H_b_up": 2.5, "Q_nominal": 7.0}})
+    p = problem.parameters(0)
+    assert p["sv0.H_nominal"] == parameters["sv0.H_nominal"]
+    assert p["sv0.Q_nominal"] == parameters["sv0.Q_nominal"]
+    assert not coefficient_names(p)
+
+
+def test_bounds_fix_coefficients():
+    problem = time_varying_problem(
+        {"sv2": {"Q_nominal": "Q"}}, {"Q": np.arange(4.0) + 5}
+    )
+    bounds = problem.bounds()
+    coefficients = problem.linear_sv_time_varying_coefficients(problem.parameters(0))
+    assert bounds.keys() == coefficients.keys()
+    for name, (lower, upper) in bounds.items():
+        assert lower is upper
+        np.testing.assert_array_equal(lower.values, coefficients[name].values)
+
+
+def test_unknown_branch():
+    problem = time_varying_problem({"sv9": {"Q_nominal": 7.0}})
+    with pytest.raises(ValueError, match="not in the list of LinearisedSV branches"):
+        problem.bounds()
+
+
+def test_unknown_nominal():
+    problem = time_varying_problem({"sv0": {"H_nominal": 7.0}})
+    with pytest.raises(ValueError, match="Unknown nominal H_nominal"):
+        problem.bounds()
+
+
+def test_non_finite_nominal():
+    problem = time_varying_problem(
+        {"sv0": {"Q_nominal": "Q"}}, {"Q": np.array([6.0, np.nan, 8.0, 9.0])}
+    )
+    with pytest.raises(ValueError, match="over the whole optimization horizon"):
+        problem.bounds()